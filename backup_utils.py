@@ -1,25 +1,210 @@
+import hashlib
 import json
 import os
+import time
 
-def backup_startup_items(items, backup_file="backups/backup.json"):
-    """Backup the list of startup items with their state to a JSON file."""
+from timing_utils import timed
+from startup_item import StartupItem
+
+DEFAULT_BACKUP_DIR = "backups"
+# Snapshots kept before the oldest are dropped
+DEFAULT_RETENTION = 50
+# Deltas allowed in a row before a full snapshot is stored again, bounding restore cost
+MAX_CHAIN = 20
+
+def normalize_item(item):
+    """Turn a StartupItem, a (name, value, status) tuple or a bare name into a backup dict."""
+    if isinstance(item, StartupItem):
+        return item.to_dict()
+    if isinstance(item, dict):
+        return {"name": item["name"], "command": item.get("command", ""),
+                "source": item.get("source", ""), "status": item.get("status", "")}
+    if isinstance(item, str):
+        return {"name": item, "command": "", "source": "", "status": ""}
+    if len(item) >= 4:
+        name, command, source, status = item[:4]
+    else:
+        (name, command, status), source = item[:3], ""
+    return {"name": name, "command": command, "source": source, "status": status}
+
+def item_key(item):
+    """Content hash identifying one item, so identical items are stored once per delta."""
+    encoded = json.dumps(item, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+def _write_json(path, data):
+    # Write then rename so a crash never leaves a half-written file behind
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+class BackupStore:
+    """Versioned backups stored as content-addressed deltas against the previous snapshot.
+
+    index.json lists every snapshot (id, time, item count, object hash and
+    parent) so history never needs to open the objects. Each object under
+    objects/ is named by the SHA-256 of its content and holds either a full
+    item set or the items added and removed since the parent snapshot.
+    """
+
+    def __init__(self, root=DEFAULT_BACKUP_DIR, retention=DEFAULT_RETENTION, max_chain=MAX_CHAIN):
+        self.root = root
+        self.retention = retention
+        self.max_chain = max_chain
+        self.index_path = os.path.join(root, "index.json")
+        self.objects_path = os.path.join(root, "objects")
+
+    def history(self):
+        """Snapshot index entries, oldest first, read from the index alone."""
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, "r") as f:
+            return json.load(f)["snapshots"]
+
+    def _save_index(self, snapshots):
+        _write_json(self.index_path, {"version": 1, "snapshots": snapshots})
+
+    def _put_object(self, data):
+        encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(encoded).hexdigest()
+        path = os.path.join(self.objects_path, f"{digest}.json")
+        if not os.path.exists(path):  # Same content is already stored
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(encoded)
+            os.replace(temp_path, path)
+        return digest
+
+    def _get_object(self, digest):
+        with open(os.path.join(self.objects_path, f"{digest}.json"), "r") as f:
+            return json.load(f)
+
+    def _materialize(self, snapshots, position):
+        """Item dicts keyed by item_key for the snapshot at position, replaying deltas from the last full one."""
+        start = position
+        while not snapshots[start]["full"]:
+            start -= 1
+        items = dict(self._get_object(snapshots[start]["object"])["items"])
+        for entry in snapshots[start + 1:position + 1]:
+            delta = self._get_object(entry["object"])
+            for key in delta["removed"]:
+                items.pop(key, None)
+            items.update(delta["added"])
+        return items
+
+    def _chain_length(self, snapshots):
+        length = 0
+        for entry in reversed(snapshots):
+            if entry["full"]:
+                break
+            length += 1
+        return length
+
+    def save(self, items):
+        """Store items as a new snapshot and return its index entry."""
+        os.makedirs(self.objects_path, exist_ok=True)
+        snapshots = self.history()
+        current = {}
+        for item in items:
+            item = normalize_item(item)
+            current[item_key(item)] = item
+
+        entry = {"id": snapshots[-1]["id"] + 1 if snapshots else 1, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "count": len(current), "parent": snapshots[-1]["id"] if snapshots else None}
+        if not snapshots or self._chain_length(snapshots) >= self.max_chain:
+            entry.update(full=True, added=len(current), removed=0,
+                         object=self._put_object({"items": current}))
+        else:
+            previous = self._materialize(snapshots, len(snapshots) - 1)
+            added = {key: item for key, item in current.items() if key not in previous}
+            removed = sorted(key for key in previous if key not in current)
+            entry.update(full=False, added=len(added), removed=len(removed),
+                         object=self._put_object({"added": added, "removed": removed}))
+
+        snapshots.append(entry)
+        snapshots = self._apply_retention(snapshots)
+        self._save_index(snapshots)
+        self._collect_garbage(snapshots)
+        return entry
+
+    def load(self, snapshot_id=None):
+        """Items of a snapshot (the latest by default) as a list of dicts, or [] if there is none."""
+        snapshots = self.history()
+        if not snapshots:
+            return []
+        position = len(snapshots) - 1
+        if snapshot_id is not None:
+            positions = [i for i, entry in enumerate(snapshots) if entry["id"] == snapshot_id]
+            if not positions:
+                raise KeyError(f"No backup with id {snapshot_id}")
+            position = positions[0]
+        return list(self._materialize(snapshots, position).values())
+
+    def _apply_retention(self, snapshots):
+        """Drop snapshots beyond the retention limit, turning the new oldest one into a full snapshot."""
+        excess = len(snapshots) - self.retention
+        if excess <= 0:
+            return snapshots
+        oldest = snapshots[excess]
+        if not oldest["full"]:
+            items = self._materialize(snapshots, excess)
+            oldest.update(full=True, object=self._put_object({"items": items}))
+        oldest["parent"] = None
+        return snapshots[excess:]
+
+    def compact(self):
+        """Rewrite the latest snapshot as a full one so restores stop replaying old deltas."""
+        snapshots = self.history()
+        if snapshots and not snapshots[-1]["full"]:
+            items = self._materialize(snapshots, len(snapshots) - 1)
+            snapshots[-1].update(full=True, object=self._put_object({"items": items}))
+            self._save_index(snapshots)
+            self._collect_garbage(snapshots)
+
+    def _collect_garbage(self, snapshots):
+        referenced = {entry["object"] for entry in snapshots}
+        for file_name in os.listdir(self.objects_path):
+            digest, extension = os.path.splitext(file_name)
+            if extension == ".json" and digest not in referenced:
+                os.remove(os.path.join(self.objects_path, file_name))
+
+@timed
+def backup_startup_items(items, backup_dir=DEFAULT_BACKUP_DIR):
+    """Backup the list of startup items with their state as a new versioned snapshot."""
     try:
-        # Each item is a tuple (name, path, state)
-        with open(backup_file, "w") as f:
-            json.dump(items, f)
+        BackupStore(backup_dir).save(items)
         return True
     except Exception as e:
         print(f"Error backing up items: {e}")
         return False
 
-def restore_startup_items(backup_file="backups/backup.json"):
-    """Restore startup items from a JSON backup file, including their state."""
-    if not os.path.exists(backup_file):
+def list_backups(backup_dir=DEFAULT_BACKUP_DIR):
+    """Index entries of the stored snapshots, oldest first."""
+    try:
+        return BackupStore(backup_dir).history()
+    except Exception as e:
+        print(f"Error reading backup history: {e}")
+        return []
+
+@timed
+def restore_startup_items(backup_dir=DEFAULT_BACKUP_DIR, snapshot_id=None):
+    """Restore startup items from a backup snapshot (the latest by default), including their state.
+
+    A path to a single JSON file written by older versions is read as-is.
+    """
+    if os.path.isfile(backup_dir):
+        try:
+            with open(backup_dir, "r") as f:
+                return [normalize_item(item) for item in json.load(f)]
+        except Exception as e:
+            print(f"Error restoring items: {e}")
+            return []
+    if not os.path.exists(os.path.join(backup_dir, "index.json")):
         print("Backup file does not exist.")
         return []
     try:
-        with open(backup_file, "r") as f:
-            return json.load(f)
+        return BackupStore(backup_dir).load(snapshot_id)
     except Exception as e:
         print(f"Error restoring items: {e}")
-        return []
\ No newline at end of file
+        return []
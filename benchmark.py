@@ -0,0 +1,403 @@
+# benchmark.py
+"""Time the enumerate/toggle/refresh paths against the in-memory registry.
+
+Run with: python benchmark.py [--sizes 10 1000 50000] [--latency 0.0001] [--fleet 10000] [--json]
+Startup time: python benchmark.py --startup [--tolerance 0.5] [--save-baseline], which exits with 1
+if it is slower, relative to a bare Tk window started in the same run, than assets/startup_baseline.json
+allows, or if first paint can't be measured, so CI can catch regressions on any machine.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import registry_backend
+from registry_backend import MemoryBackend
+import registry_utils
+import fleet_utils
+from registry_utils import REGISTRY_PATHS, RUN_PATH, DISABLED_PATH
+import snapshot_utils
+import snapshot_cache
+from search_index import SearchIndex
+from startup_item import Status
+from tree_view import VirtualTreeView
+from startup_folder_utils import get_startup_folder_path
+
+DEFAULT_SIZES = [10, 1000, 50000]
+# Cold start times as multiples of REFERENCE_SCRIPT's, measured in the same run so the baseline
+# holds across machines. --startup fails when a ratio is more than STARTUP_TOLERANCE above the
+# baseline; with no ratio recorded, the MAX_ limit in seconds applies instead.
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "startup_baseline.json")
+STARTUP_TOLERANCE = 0.5
+MAX_IMPORT_SECONDS = 0.15
+MAX_PAINT_SECONDS = 0.5
+
+# Runs in a fresh interpreter so nothing is imported yet. The first idle callback
+# main_window queues runs once the window is drawn, so it marks the first paint;
+# it is replaced to keep the registry, logging and watcher out of the measurement.
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import gui
+result = {"import_seconds": time.perf_counter() - start, "first_paint_seconds": None}
+def painted():
+    result["first_paint_seconds"] = time.perf_counter() - start
+gui.start_background = painted
+try:
+    root = gui.main_window()
+except gui.tk.TclError:
+    root = None  # No display
+if root is not None:
+    while result["first_paint_seconds"] is None:
+        root.update()
+    root.destroy()
+print(json.dumps(result))
+"""
+
+# The floor under STARTUP_SCRIPT: importing the same Tk modules and drawing a bare window with a tree
+REFERENCE_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, scrolledtext
+result = {"import_seconds": time.perf_counter() - start, "first_paint_seconds": None}
+def painted():
+    result["first_paint_seconds"] = time.perf_counter() - start
+try:
+    root = tk.Tk()
+except tk.TclError:
+    root = None  # No display
+if root is not None:
+    ttk.Treeview(root).pack(fill="both", expand=True)
+    root.after_idle(painted)
+    while result["first_paint_seconds"] is None:
+        root.update()
+    root.destroy()
+print(json.dumps(result))
+"""
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def make_environment(count, latency=0.0):
+    """Install a seeded in-memory backend and an empty Startup folder under a temp APPDATA."""
+    backend = MemoryBackend(latency=latency)
+    backend.seed(REGISTRY_PATHS, count)
+    registry_backend.set_backend(backend)
+
+    os.environ["APPDATA"] = tempfile.mkdtemp(prefix="startup_bench_")
+    os.makedirs(get_startup_folder_path(), exist_ok=True)
+    # Keep the enumeration cache out of the working directory
+    snapshot_cache.CACHE_FILE = os.path.join(os.environ["APPDATA"], "snapshot_cache.json")
+    return backend
+
+def bench_enumeration(count):
+    seconds, items = _timed(registry_utils.get_full_startup_items)
+    # A snapshot that fills the cache, then one where no source changed
+    snapshot_cache.get_cache().invalidate()
+    cold_seconds, _ = _timed(snapshot_utils.take_snapshot)
+    warm_seconds, _ = _timed(snapshot_utils.take_snapshot)
+    return {"seconds": seconds, "items": len(items), "hives": registry_utils.last_hive_report,
+            "snapshot_cold_seconds": cold_seconds, "snapshot_warm_seconds": warm_seconds}
+
+def bench_bulk_toggle(count):
+    """Disable every HKCU Run value, then enable them all again."""
+    names = [item.name for item in registry_utils.get_full_startup_items() if item.status == Status.ENABLED_USER]
+
+    def toggle_all():
+        for name in names:
+            registry_utils.move_registry_value(name, RUN_PATH, DISABLED_PATH)
+        for name in names:
+            registry_utils.move_registry_value(name, DISABLED_PATH, RUN_PATH)
+
+    seconds, _ = _timed(toggle_all)
+    return {"seconds": seconds, "toggles": len(names) * 2, "key_cache": registry_backend.get_key_cache().stats()}
+
+class CountingTree:
+    """Treeview stand-in holding items in a dict, so Tk calls can be counted without a display."""
+
+    def __init__(self):
+        self.items = {}
+        self._selection = ()
+
+    def configure(self, **options):
+        pass
+
+    def heading(self, column, **options):
+        pass
+
+    def bind(self, sequence, func, add=None):
+        pass
+
+    def insert(self, parent, index, iid, **options):
+        self.items[iid] = options
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+
+    def item(self, iid, **options):
+        self.items[iid].update(options)
+
+    def selection(self):
+        return self._selection
+
+    def selection_set(self, items):
+        self._selection = tuple(items)
+
+    def selection_remove(self, items):
+        self._selection = tuple(iid for iid in self._selection if iid not in items)
+
+    def focus(self, iid=None):
+        return "" if iid is None else None
+
+    def identify_row(self, y):
+        return ""
+
+def _snapshot_rows(snapshot):
+    # Same rows gui.show_snapshot renders
+    return [(item.key, (item.name, item.command, item.source.label, item.status.label), "enabled" if item.enabled else "disabled")
+            for item in snapshot.items]
+
+def bench_refresh(count, root=None):
+    """A first render, an incremental refresh after 1% of the items were toggled, then sort, filter and scroll."""
+    if root is not None:
+        from tkinter import ttk
+        tree = ttk.Treeview(root)
+    else:
+        tree = CountingTree()
+    view = VirtualTreeView(tree, height=30)
+
+    def render(snapshot):
+        view.set_rows(_snapshot_rows(snapshot))
+        return view.last_tk_calls
+
+    seconds, initial_calls = _timed(lambda: render(snapshot_utils.take_snapshot()))
+
+    snapshot = snapshot_utils.take_snapshot()
+    enabled = [item.name for item in snapshot.items if item.status == Status.ENABLED_USER]
+    toggled = enabled[:max(1, len(enabled) // 100)] if enabled else []
+    for name in toggled:
+        registry_utils.move_registry_value(name, RUN_PATH, DISABLED_PATH)
+    incremental_seconds, incremental_calls = _timed(lambda: render(snapshot_utils.take_snapshot()))
+
+    sort_seconds, _ = _timed(view.sort_by, "name", True)
+    filter_seconds, _ = _timed(view.set_filter, "item00")
+    view.set_filter("")
+    scroll_seconds, scroll_calls = _timed(lambda: (view.scroll_to(len(view) // 2), view.last_tk_calls)[1])
+
+    return {"seconds": seconds, "rows": len(view.rows), "rendered": root is not None,
+            "tk_calls": initial_calls, "incremental_seconds": incremental_seconds,
+            "incremental_changes": len(toggled), "incremental_tk_calls": incremental_calls,
+            "sort_seconds": sort_seconds, "filter_seconds": filter_seconds,
+            "scroll_seconds": scroll_seconds, "scroll_tk_calls": scroll_calls}
+
+def bench_search(count, query="item00042"):
+    """Index the snapshot, update it after 1% of the items were toggled, then search as if query was typed."""
+    index = SearchIndex()
+    build_seconds, _ = _timed(index.update, snapshot_utils.take_snapshot().items)
+
+    enabled = [item.name for item in snapshot_utils.take_snapshot().items if item.status == Status.ENABLED_USER]
+    toggled = enabled[:max(1, len(enabled) // 100)] if enabled else []
+    for name in toggled:
+        registry_utils.move_registry_value(name, RUN_PATH, DISABLED_PATH)
+    items = snapshot_utils.take_snapshot().items
+    indexed = index.indexed
+    update_seconds, changes = _timed(index.update, items)
+
+    # One lookup per keystroke, like the search box
+    keystrokes = [_timed(index.search_ids, query[:length]) for length in range(1, len(query) + 1)]
+    facet_seconds, _ = _timed(index.facet_counts)
+    return {"items": len(index), "build_seconds": build_seconds, "update_seconds": update_seconds,
+            "update_changes": sum(changes), "update_reindexed": index.indexed - indexed,
+            "keystroke_seconds": [seconds for seconds, _ in keystrokes],
+            "keystroke_matches": [len(ids) for _, ids in keystrokes],
+            "max_keystroke_seconds": max(seconds for seconds, _ in keystrokes),
+            "final_matches": len(keystrokes[-1][1]), "facet_seconds": facet_seconds}
+
+def bench_fleet(hosts, items_per_host=40):
+    """Write two weekly exports per host, load them all and time the cross-host queries."""
+    folder = tempfile.mkdtemp(prefix="startup_fleet_")
+    now = time.time()
+    common = [(f"Common{i:03d}", f"C:\\Program Files\\Vendor{i}\\app{i}.exe") for i in range(items_per_host)]
+    for week, collected in (("old", now - 8 * fleet_utils.DAY), ("new", now)):
+        os.makedirs(os.path.join(folder, week))
+        for host in range(hosts):
+            rows = common[host % 7:] + [(f"Only{host:05d}", f"C:\\Tools\\only{host}.exe")]
+            if week == "new" and host % 10 == 0:
+                rows.append((f"Drift{host:05d}", "C:\\Temp\\drift.exe"))
+            path = os.path.join(folder, week, f"HOST{host:05d}.jsonl")
+            with open(path, "w") as f:
+                for name, command in rows:
+                    f.write(json.dumps({"name": name, "command": command, "source": "Registry", "status": "Enabled (User)"}) + "\n")
+            os.utime(path, (collected, collected))
+
+    cache_file = os.path.join(tempfile.mkdtemp(prefix="startup_fleet_cache_"), "fleet_cache.json")
+    load_seconds, fleet = _timed(fleet_utils.load_fleet, [folder], None, True, cache_file)
+    # Later queries over the same files read the saved index instead of parsing them again
+    cached_load_seconds, fleet = _timed(fleet_utils.load_fleet, [folder], None, True, cache_file)
+    running_seconds, running = _timed(fleet.hosts_running, "app3.exe")
+    unique_seconds, unique = _timed(fleet.unique_entries, "HOST00001")
+    drift_seconds, drift = _timed(fleet.drift, now - 7 * fleet_utils.DAY)
+    return {"hosts": len(fleet), "entries": len(fleet.entries), "load_seconds": load_seconds,
+            "cached_load_seconds": cached_load_seconds,
+            "running_seconds": running_seconds, "running_hosts": len(running),
+            "unique_seconds": unique_seconds, "unique_entries": len(unique),
+            "drift_seconds": drift_seconds, "drifted_hosts": len(drift)}
+
+def _best_start(script, runs, folder):
+    command = [sys.executable, "-c", script]
+    if os.name != "nt" and not os.getenv("DISPLAY") and shutil.which("xvfb-run"):
+        command = ["xvfb-run", "-a"] + command
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(command, cwd=folder, capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    paints = [result["first_paint_seconds"] for result in results if result["first_paint_seconds"] is not None]
+    return {"import_seconds": min(result["import_seconds"] for result in results),
+            "first_paint_seconds": min(paints) if paints else None}
+
+def bench_startup(runs=5):
+    """Best of several cold starts: time to import gui and time until the main window is first drawn.
+
+    The same is measured for REFERENCE_SCRIPT under "reference", and each
+    time as a multiple of it under "ratios". Without a display the runs go
+    through xvfb-run when it is installed.
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    result = dict(_best_start(STARTUP_SCRIPT, runs, folder), runs=runs)
+    result["reference"] = reference = _best_start(REFERENCE_SCRIPT, runs, folder)
+    result["ratios"] = {key: result[key] / reference[key] if result[key] and reference[key] else None
+                        for key in ("import_seconds", "first_paint_seconds")}
+    return result
+
+def load_baseline(baseline_file=BASELINE_FILE):
+    """Recorded startup ratios ({"import_seconds": ..., "first_paint_seconds": ...}), or {} if there are none."""
+    try:
+        with open(baseline_file, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(result, baseline_file=BASELINE_FILE):
+    """Record a startup result's ratios as the new baseline, keeping the old first paint ratio if this run couldn't measure one."""
+    baseline = load_baseline(baseline_file)
+    for key, ratio in result["ratios"].items():
+        if ratio is not None:
+            baseline[key] = round(ratio, 3)
+    with open(baseline_file, "w") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+    return baseline
+
+def startup_limits(result, baseline, tolerance=STARTUP_TOLERANCE):
+    """(max import, max first paint) in seconds for this run: the reference times scaled by the baseline ratios
+    plus tolerance, or the MAX_ limits where a ratio or reference time is missing."""
+    limits = []
+    for key, default in (("import_seconds", MAX_IMPORT_SECONDS), ("first_paint_seconds", MAX_PAINT_SECONDS)):
+        reference = result["reference"][key]
+        limits.append(reference * baseline[key] * (1 + tolerance) if baseline.get(key) and reference else default)
+    return tuple(limits)
+
+def check_startup(result, max_import=MAX_IMPORT_SECONDS, max_paint=MAX_PAINT_SECONDS):
+    """Messages for each limit the startup benchmark exceeded, and for a first paint it couldn't measure."""
+    failures = []
+    if result["import_seconds"] > max_import:
+        failures.append(f"import took {result['import_seconds']:.3f}s, limit {max_import:.3f}s")
+    if result["first_paint_seconds"] is None:
+        failures.append("first paint could not be measured: no display (set DISPLAY or install xvfb-run)")
+    elif result["first_paint_seconds"] > max_paint:
+        failures.append(f"first paint took {result['first_paint_seconds']:.3f}s, limit {max_paint:.3f}s")
+    return failures
+
+def _make_root():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root
+    except Exception:
+        # No display (CI runners): rows go to a CountingTree instead
+        return None
+
+def run(sizes, latency=0.0):
+    root = _make_root()
+    results = []
+    for count in sizes:
+        make_environment(count, latency)
+        results.append({
+            "entries": count,
+            "enumeration": bench_enumeration(count),
+            "bulk_toggle": bench_bulk_toggle(count),
+            "refresh": bench_refresh(count, root),
+            "search": bench_search(count),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Startup Cleaner against an in-memory registry.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds slept per registry call")
+    parser.add_argument("--fleet", type=int, metavar="HOSTS", help="Benchmark fleet queries over this many hosts instead")
+    parser.add_argument("--startup", action="store_true", help="Benchmark cold start of the GUI instead")
+    parser.add_argument("--max-import", type=float, help="Import time limit for --startup, instead of the baseline's")
+    parser.add_argument("--max-paint", type=float, help="First paint limit for --startup, instead of the baseline's")
+    parser.add_argument("--tolerance", type=float, default=STARTUP_TOLERANCE,
+                        help="How much slower than the baseline --startup may be, as a fraction")
+    parser.add_argument("--save-baseline", action="store_true", help="Record this --startup result as the baseline")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.startup:
+        result = bench_startup()
+        if args.save_baseline:
+            baseline = save_baseline(result)
+            print(f"Saved baseline to {BASELINE_FILE}: {baseline}")
+            sys.exit(0)
+        max_import, max_paint = startup_limits(result, load_baseline(), args.tolerance)
+        failures = check_startup(result, args.max_import or max_import, args.max_paint or max_paint)
+        if args.json:
+            print(json.dumps(dict(result, failures=failures), indent=2))
+        else:
+            ratios = result["ratios"]
+            paint = "n/a (no display)"
+            if result["first_paint_seconds"] is not None:
+                paint = f"{result['first_paint_seconds']:.4f}s ({ratios['first_paint_seconds']:.2f}x bare Tk)"
+            print(f"import: {result['import_seconds']:.4f}s ({ratios['import_seconds']:.2f}x bare Tk)  "
+                  f"first paint: {paint}  (best of {result['runs']})")
+            for failure in failures:
+                print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+
+    if args.fleet:
+        result = bench_fleet(args.fleet)
+        print(json.dumps(result, indent=2) if args.json else
+              "\n".join(f"{name:>16}: {value:.4f}" if isinstance(value, float) else f"{name:>16}: {value}"
+                        for name, value in result.items()))
+        return
+
+    results = run(args.sizes, args.latency)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'entries':>8} {'enumerate (s)':>14} {'toggles':>8} {'toggle (s)':>11} {'refresh (s)':>12} "
+          f"{'tk calls':>9} {'changed':>8} {'incr. (s)':>10} {'incr. tk calls':>15} {'sort (s)':>9} {'filter (s)':>11} "
+          f"{'index (s)':>10} {'reindex (s)':>12} {'keystroke (s)':>14}")
+    for r in results:
+        refresh = r['refresh']
+        print(f"{r['entries']:>8} {r['enumeration']['seconds']:>14.4f} {r['bulk_toggle']['toggles']:>8} "
+              f"{r['bulk_toggle']['seconds']:>11.4f} {refresh['seconds']:>12.4f} {refresh['tk_calls']:>9} "
+              f"{refresh['incremental_changes']:>8} {refresh['incremental_seconds']:>10.4f} {refresh['incremental_tk_calls']:>15} "
+              f"{refresh['sort_seconds']:>9.4f} {refresh['filter_seconds']:>11.4f} "
+              f"{r['search']['build_seconds']:>10.4f} {r['search']['update_seconds']:>12.4f} "
+              f"{r['search']['max_keystroke_seconds']:>14.6f}")
+
+if __name__ == "__main__":
+    main()
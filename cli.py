@@ -0,0 +1,281 @@
+# cli.py
+"""Headless Startup Cleaner. Never imports tkinter, so it is quick to start.
+
+    python main.py list [--status S] [--hive H] [--source S] [--prefix P] [--limit N] [--impact] [--json]
+    python main.py disable NAME [NAME ...] [--force]
+    python main.py enable NAME [NAME ...]
+    python main.py export [--output FILE|-] [--format csv|jsonl] [--gzip]
+    python main.py backup [--store DIR]
+    python main.py history [--store DIR]
+    python main.py restore [--store DIR] [--id N] [--dry-run] [--keep-new]
+    python main.py profile [--sort cumulative|tottime] [--limit N]
+    python main.py fleet PATH [PATH ...] [--running X] [--unique HOST] [--drift DAYS] [--host HOST]
+
+Any subcommand takes --timings to print call counts and latencies as JSON on stderr.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from registry_utils import apply_registry_batch, format_hive_report, hive_problems
+from restore_utils import plan_restore, apply_restore
+from startup_item import Classification
+from rules_utils import get_rule_set
+from snapshot_utils import take_snapshot, iter_startup_items, find_startup_item, REGISTRY_SOURCE, FOLDER_SOURCE
+from startup_folder_utils import disable_startup_file, restore_disabled_startup_file
+from backup_utils import backup_startup_items, restore_startup_items, list_backups, DEFAULT_BACKUP_DIR
+from export_utils import export_items, EXPORT_FORMATS
+import timing_utils
+# impact_utils (psutil) and fleet_utils (multiprocessing) are imported by the subcommands that use them
+
+DEFAULT_EXPORT = os.path.join("exports", "startup_items.csv")
+
+def item_to_dict(item):
+    data = item.to_dict()
+    data["enabled"] = item.enabled
+    data["classification"] = item.classification.name.lower()
+    if item.file_info is not None:
+        data.update(item.file_info)
+    return data
+
+def emit(args, data, text):
+    """Print data as JSON in --json mode, otherwise the plain text version."""
+    if args.json:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    elif text:
+        print(text)
+
+def cmd_list(args):
+    source = {"registry": REGISTRY_SOURCE, "folder": FOLDER_SOURCE}.get(args.source)
+    # Filters are pushed down so keys and folders they rule out are never read
+    records = list(iter_startup_items(args.hive, args.status, args.prefix, source, args.limit))
+    items = [item_to_dict(item) for item in records]
+    if args.impact:
+        from impact_utils import analyze_items
+        impacts = analyze_items(records)
+        rules = get_rule_set()
+        for record, item in zip(records, items):
+            impact = impacts.get(record.key)
+            if impact and impact["publisher"]:
+                # Publisher rules can only match once the publisher is known
+                item["classification"] = rules.classify_item(record, impact["publisher"]).name.lower()
+            item["impact"] = impact["score"] if impact else None
+            item["impact_level"] = impact["level"] if impact else None
+            item["publisher"] = impact["publisher"] if impact else None
+    emit(args, items, "\n".join(f"{item['name']} | {item['status']} | {item['command']}"
+                                 f"{' -> ' + item['target'] if item.get('target') else ''}"
+                                 f"{' | ' + item['classification'] if item['classification'] != 'unknown' else ''}"
+                                 f"{' | impact ' + str(item['impact']) if item.get('impact') is not None else ''}"
+                                 for item in items))
+    return 0
+
+def set_enabled(args, enable):
+    # One direct lookup per name instead of enumerating everything
+    found = {name: find_startup_item(name) for name in args.names}
+    missing = [name for name, item in found.items() if item is None]
+    protected = []
+    if not enable and not args.force:
+        rules = get_rule_set()
+        if rules.uses_publishers:
+            from impact_utils import publisher_of
+            for item in found.values():
+                if item is not None and item.classification != Classification.PROTECTED:
+                    rules.classify_item(item, publisher_of(item))
+        protected = [name for name, item in found.items() if item and item.classification == Classification.PROTECTED]
+        found = {name: item for name, item in found.items() if name not in protected}
+    registry_names = [name for name, item in found.items() if item and item.source == REGISTRY_SOURCE]
+    folder_names = [name for name, item in found.items() if item and item.source == FOLDER_SOURCE]
+
+    report = apply_registry_batch([(name, enable) for name in registry_names])
+    failed = []
+    for name in folder_names:
+        ok = restore_disabled_startup_file(name) if enable else disable_startup_file(name)
+        if ok:
+            (report.enabled if enable else report.disabled).append(name)
+        else:
+            failed.append(name)
+
+    result = {"enabled": report.enabled, "disabled": report.disabled, "skipped": [name for name, _ in report.skipped],
+              "missing": missing, "protected": protected, "failed": failed + ([report.failed[0]] if report.failed else []),
+              "rolled_back": report.rolled_back, "rollback_errors": [name for name, _ in report.rollback_errors]}
+    text = report.summary()
+    if missing:
+        text += "\nNot found: " + ", ".join(missing)
+    if protected:
+        text += "\nProtected by the rules, left enabled (use --force): " + ", ".join(protected)
+    if failed:
+        text += "\nCould not move startup folder files: " + ", ".join(failed)
+    emit(args, result, text)
+    return 0 if report.ok and not missing and not failed and not protected else 1
+
+def cmd_enable(args):
+    return set_enabled(args, True)
+
+def cmd_disable(args):
+    return set_enabled(args, False)
+
+def cmd_export(args):
+    count = export_items(args.output, args.format, True if args.gzip else None)
+    if args.output != "-":  # Don't mix a summary into piped output
+        emit(args, {"file": args.output, "count": count}, f"Exported {count} items to {args.output}")
+    return 0
+
+def cmd_backup(args):
+    items = take_snapshot().items
+    ok = backup_startup_items(items, args.store)
+    emit(args, {"store": args.store, "count": len(items), "ok": ok},
+         f"Backed up {len(items)} items to {args.store}" if ok else "Backup failed.")
+    return 0 if ok else 1
+
+def cmd_history(args):
+    history = list_backups(args.store)
+    emit(args, history, "\n".join(
+        f"{entry['id']:>5}  {entry['created']}  {entry['count']:>6} items  +{entry['added']} -{entry['removed']}"
+        f"{'  (full)' if entry['full'] else ''}" for entry in history) or "No backups.")
+    return 0
+
+def cmd_restore(args):
+    """Make the startup items match a backup with the smallest set of changes."""
+    backup = restore_startup_items(args.store, args.id)
+    if not backup:
+        emit(args, {"error": "No backup items to restore."}, "No backup items to restore.")
+        return 1
+    plan = plan_restore(backup, remove_new=not args.keep_new)
+
+    if args.dry_run:
+        emit(args, {"actions": plan.to_dicts(), "skipped": [{"name": name, "reason": reason} for name, reason in plan.skipped]},
+             "\n".join(plan.preview()) or "Nothing to restore.")
+        return 0
+
+    report, failed = apply_restore(plan)
+    text = report.summary()
+    if failed:
+        text += "\nCould not move startup folder files: " + ", ".join(failed)
+    emit(args, {"enabled": report.enabled, "disabled": report.disabled, "changed": report.changed,
+                "skipped": [name for name, _ in plan.skipped + report.skipped], "failed": failed,
+                "rolled_back": report.rolled_back, "rollback_errors": [name for name, _ in report.rollback_errors]}, text)
+    return 0 if report.ok and not failed else 1
+
+def cmd_profile(args):
+    """Time and profile one full refresh (registry and startup folder)."""
+    timing_utils.enable_timing()
+    snapshot, report = timing_utils.profile_call(take_snapshot, sort=args.sort, limit=args.limit)
+    problems = hive_problems(snapshot.hive_report)
+    emit(args, {"items": len(snapshot), "hives": snapshot.hive_report, "incomplete": problems,
+                "timings": timing_utils.get_stats(), "profile": report},
+         f"{len(snapshot)} items\n\n{format_hive_report(snapshot.hive_report)}\n"
+         + "".join(f"Could not read in full: {problem}\n" for problem in problems)
+         + f"\n{timing_utils.format_stats()}\n\n{report}")
+    return 0
+
+def _entry_line(entry):
+    return f"{entry['name']} | {'enabled' if entry['enabled'] else 'disabled'} | {entry['command']}"
+
+def cmd_fleet(args):
+    """Query startup items exported from many hosts."""
+    from fleet_utils import load_fleet, DAY
+    fleet = load_fleet(args.paths, args.workers, use_cache=not args.no_cache)
+    try:
+        if args.running:
+            hosts = fleet.hosts_running(args.running, args.include_disabled)
+            emit(args, hosts, "\n".join(hosts) or f"No host runs {args.running}.")
+        elif args.unique:
+            entries = fleet.unique_entries(args.unique)
+            emit(args, entries, "\n".join(_entry_line(entry) for entry in entries) or "Nothing unique to this host.")
+        elif args.drift is not None:
+            drift = fleet.drift(time.time() - args.drift * DAY, args.host)
+            lines = []
+            for host, changes in sorted(drift.items()):
+                lines.append(host)
+                lines.extend(f"  + {_entry_line(entry)}" for entry in changes["added"])
+                lines.extend(f"  - {_entry_line(entry)}" for entry in changes["removed"])
+                lines.extend(f"  ~ {_entry_line(change['after'])}" for change in changes["changed"])
+            emit(args, drift, "\n".join(lines) or "No drift.")
+        else:
+            summary = fleet.summary()
+            emit(args, summary, f"{summary['hosts']} hosts, {summary['snapshots']} snapshots, "
+                                f"{summary['entries']} distinct entries\n" +
+                 "\n".join(f"{entry['hosts']:>7}  {_entry_line(entry)}" for entry in summary["most_common"]))
+    except KeyError as e:
+        emit(args, {"error": e.args[0]}, e.args[0])
+        return 1
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Manage startup items without the GUI.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    common.add_argument("--timings", action="store_true", help="Print call timings as JSON on stderr when done")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", parents=[common], help="List startup items")
+    list_parser.add_argument("--status", choices=["enabled", "disabled"])
+    list_parser.add_argument("--hive", choices=["HKCU", "HKLM"])
+    list_parser.add_argument("--source", choices=["registry", "folder"])
+    list_parser.add_argument("--prefix", help="Only names starting with this (case-insensitive)")
+    list_parser.add_argument("--limit", type=int, help="Stop after this many items")
+    list_parser.add_argument("--impact", action="store_true", help="Score each item's startup impact")
+    list_parser.set_defaults(func=cmd_list)
+
+    for name, func in (("enable", cmd_enable), ("disable", cmd_disable)):
+        toggle_parser = commands.add_parser(name, parents=[common], help=f"{name.capitalize()} startup items by name")
+        toggle_parser.add_argument("names", nargs="+")
+        if name == "disable":
+            toggle_parser.add_argument("--force", action="store_true", help="Disable items the rules protect too")
+        toggle_parser.set_defaults(func=func)
+
+    export_parser = commands.add_parser("export", parents=[common], help="Stream startup items to CSV or JSONL")
+    export_parser.add_argument("--output", default=DEFAULT_EXPORT, help="File to write, or - for stdout")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, help="Defaults to the output file's extension")
+    export_parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    export_parser.set_defaults(func=cmd_export)
+
+    backup_parser = commands.add_parser("backup", parents=[common], help="Store a new backup snapshot")
+    backup_parser.add_argument("--store", default=DEFAULT_BACKUP_DIR, help="Backup store folder")
+    backup_parser.set_defaults(func=cmd_backup)
+
+    history_parser = commands.add_parser("history", parents=[common], help="List stored backup snapshots")
+    history_parser.add_argument("--store", default=DEFAULT_BACKUP_DIR, help="Backup store folder")
+    history_parser.set_defaults(func=cmd_history)
+
+    restore_parser = commands.add_parser("restore", parents=[common], help="Make startup items match a backup")
+    restore_parser.add_argument("--store", default=DEFAULT_BACKUP_DIR, help="Backup store folder, or an old backup .json file")
+    restore_parser.add_argument("--id", type=int, help="Snapshot to restore (default: latest)")
+    restore_parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+    restore_parser.add_argument("--keep-new", action="store_true", help="Keep items added since the backup")
+    restore_parser.set_defaults(func=cmd_restore)
+
+    profile_parser = commands.add_parser("profile", parents=[common], help="Time and profile one refresh")
+    profile_parser.add_argument("--sort", choices=["cumulative", "tottime", "calls"], default="cumulative")
+    profile_parser.add_argument("--limit", type=int, default=30, help="Functions to show")
+    profile_parser.set_defaults(func=cmd_profile)
+
+    fleet_parser = commands.add_parser("fleet", parents=[common], help="Query exports collected from many hosts")
+    fleet_parser.add_argument("paths", nargs="+", help="Export files, or folders of them, named after their host")
+    queries = fleet_parser.add_mutually_exclusive_group()
+    queries.add_argument("--running", metavar="X", help="Hosts with an entry named X, running X or X.exe (* and ? allowed)")
+    queries.add_argument("--unique", metavar="HOST", help="Entries no other host has")
+    queries.add_argument("--drift", type=float, metavar="DAYS", help="Changes since the snapshots of DAYS days ago")
+    fleet_parser.add_argument("--host", help="Limit --drift to one host")
+    fleet_parser.add_argument("--include-disabled", action="store_true", help="Count disabled entries for --running")
+    fleet_parser.add_argument("--workers", type=int, help="Processes parsing the files (default: one per CPU)")
+    fleet_parser.add_argument("--no-cache", action="store_true", help="Parse every file instead of using the saved index")
+    fleet_parser.set_defaults(func=cmd_fleet)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.timings:
+        return args.func(args)
+    timing_utils.enable_timing()
+    try:
+        return args.func(args)
+    finally:
+        json.dump(timing_utils.get_stats(), sys.stderr, indent=2)
+        sys.stderr.write("\n")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+
+from registry_backend import HIVE_NAMES
+from registry_utils import iter_registry_items, STATUS_PATHS
+from startup_folder_utils import iter_startup_folder
+
+EXPORT_FIELDS = ["name", "command", "source", "status"]
+EXPORT_FORMATS = ("csv", "jsonl")
+
+def iter_export_rows():
+    """Yield one dict per startup item straight from the enumeration generators."""
+    for item in iter_registry_items():
+        row = item.to_dict()
+        # Name the key instead of just "Registry"
+        root, path = STATUS_PATHS[item.status]
+        row["source"] = f"{HIVE_NAMES.get(root, root)}\\{path}"
+        yield row
+    try:
+        for item in iter_startup_folder():
+            row = item.to_dict()
+            if item.file_info is not None:
+                # Only JSONL carries these; CSV keeps its four columns
+                row.update(size=item.file_info["size"], mtime=item.file_info["mtime"], target=item.file_info["target"])
+            yield row
+    except OSError as e:  # Folder missing
+        print(f"Error reading startup folder: {e}", file=sys.stderr)
+
+def guess_format(destination):
+    """Pick (format, compress) from a file name like items.jsonl.gz; CSV by default."""
+    name = destination.lower()
+    compress = name.endswith(".gz")
+    if compress:
+        name = name[:-3]
+    return ("jsonl" if name.endswith((".jsonl", ".json")) else "csv"), compress
+
+def write_rows(rows, stream, fmt="csv"):
+    """Write rows to a text stream as they arrive. Returns the number written."""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow([field.capitalize() for field in EXPORT_FIELDS])
+        for row in rows:
+            writer.writerow([row[field] for field in EXPORT_FIELDS])
+            count += 1
+    elif fmt == "jsonl":
+        for row in rows:
+            stream.write(json.dumps(row))
+            stream.write("\n")
+            count += 1
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return count
+
+def export_items(destination, fmt=None, compress=None, rows=None):
+    """Stream startup items to a file, or to stdout when destination is "-".
+
+    fmt and compress default to what the destination's extension suggests.
+    Returns the number of rows written.
+    """
+    guessed_fmt, guessed_compress = guess_format(destination)
+    fmt = fmt or guessed_fmt
+    compress = guessed_compress if compress is None else compress
+    rows = iter_export_rows() if rows is None else rows
+
+    if destination == "-":
+        binary = sys.stdout.buffer
+        if not compress:
+            sys.stdout.flush()
+            stream = io.TextIOWrapper(binary, encoding="utf-8", newline="", write_through=True)
+            try:
+                return write_rows(rows, stream, fmt)
+            finally:
+                stream.detach()  # Leave sys.stdout usable
+        with gzip.GzipFile(fileobj=binary, mode="wb") as gz:
+            stream = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+            try:
+                return write_rows(rows, stream, fmt)
+            finally:
+                stream.flush()
+                stream.detach()
+
+    folder = os.path.dirname(destination)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    opener = gzip.open if compress else open
+    with opener(destination, "wt", encoding="utf-8", newline="") as stream:
+        return write_rows(rows, stream, fmt)
@@ -0,0 +1,314 @@
+import csv
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from startup_item import command_executable
+from timing_utils import timed
+from snapshot_cache import cache_path
+
+SNAPSHOT_EXTENSIONS = (".csv", ".jsonl", ".json", ".csv.gz", ".jsonl.gz", ".json.gz")
+INGEST_WORKERS = None  # One per CPU
+DAY = 24 * 60 * 60
+# Version of the saved index; load_fleet rebuilds it from the files when this changes
+FLEET_CACHE_VERSION = 1
+
+def _executable_name(command):
+    """Lower-cased file name of the program a command runs, like "onedrive.exe"."""
+    return command_executable(command).replace("/", "\\").rsplit("\\", 1)[-1].casefold()
+
+def host_from_file(file_path):
+    """Host name of a snapshot file: its name without the extensions, e.g. PC-042 for PC-042.csv.gz."""
+    name = os.path.basename(file_path)
+    for extension in sorted(SNAPSHOT_EXTENSIONS, key=len, reverse=True):
+        if name.lower().endswith(extension):
+            return name[:-len(extension)]
+    return os.path.splitext(name)[0]
+
+def find_snapshot_files(paths):
+    """Snapshot files among paths, looking inside folders recursively."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                files.extend(os.path.join(folder, name) for name in sorted(names)
+                             if name.lower().endswith(SNAPSHOT_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+def file_signatures(files):
+    """{path: [mtime_ns, size]} of each file, None for one that can't be read."""
+    signatures = {}
+    for file_path in files:
+        try:
+            info = os.stat(file_path)
+            signatures[file_path] = [info.st_mtime_ns, info.st_size]
+        except OSError:
+            signatures[file_path] = None
+    return signatures
+
+def parse_snapshot_file(file_path):
+    """([(host, collected, rows)], error) from one export file; rows are (name, command, source, enabled) tuples.
+
+    Rows with a "host" field (JSONL) are grouped by it, others belong to the
+    host named by the file. collected is the file's modification time
+    unless rows carry a "collected" timestamp. Runs in worker processes.
+    """
+    opener = gzip.open if file_path.lower().endswith(".gz") else open
+    default_host = host_from_file(file_path)
+    hosts = {}
+    try:
+        # Inside the try: a file removed since it was listed is skipped like an unreadable one
+        collected = os.path.getmtime(file_path)
+        with opener(file_path, "rt", encoding="utf-8", newline="") as f:
+            if ".csv" in file_path.lower():
+                reader = csv.reader(f)
+                header = [column.strip().lower() for column in next(reader, [])]
+                records = (dict(zip(header, row)) for row in reader)
+            else:
+                records = (json.loads(line) for line in f if line.strip())
+            for record in records:
+                if not isinstance(record, dict):
+                    # e.g. a backup file, whose lines are JSON arrays
+                    return [], f"{file_path}: expected one JSON object per line, got {type(record).__name__}"
+                host = str(record.get("host") or default_host)
+                # Old exports had a Path column instead of Command; JSON fields may also be null
+                command = str(record.get("command") or record.get("path") or "")
+                status = str(record.get("status") or "")
+                entry = (str(record.get("name") or ""), command, str(record.get("source") or ""),
+                         status.lower().startswith("enabled"))
+                snapshot = hosts.setdefault(host, [float(record.get("collected") or collected), []])
+                snapshot[1].append(entry)
+    except (OSError, ValueError, TypeError, csv.Error) as e:
+        return [], f"{file_path}: {e}"
+    return [(host, snapshot[0], snapshot[1]) for host, snapshot in hosts.items()], None
+
+class Fleet:
+    """Startup items of many hosts, indexed for queries across them.
+
+    Each distinct (name, command, enabled) entry gets an integer id and each
+    host snapshot is a frozenset of ids, so comparing hosts or snapshots is
+    set arithmetic on small integers. The inverted index maps a lower-cased
+    name, command or program file name to entry ids, and every entry keeps
+    the set of hosts whose latest snapshot has it.
+    """
+
+    def __init__(self):
+        self.hosts = []  # Host names by id
+        self.host_ids = {}
+        self.entries = []  # (name, command, source, enabled) by id
+        self.entry_ids = {}
+        self.index = {}  # Lower-cased term -> set of entry ids
+        self.snapshots = {}  # Host id -> [(collected, frozenset of entry ids)], oldest first
+        self.entry_hosts = []  # Entry id -> set of host ids in their latest snapshot
+        self.errors = []
+        self.files = {}  # Absolute path -> [mtime_ns, size] of each file read into the fleet, see file_signatures
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def _entry_id(self, name, command, source, enabled):
+        key = (name.casefold(), command.casefold(), enabled)
+        entry_id = self.entry_ids.get(key)
+        if entry_id is None:
+            entry_id = self.entry_ids[key] = len(self.entries)
+            self.entries.append((name, command, source, enabled))
+            self.entry_hosts.append(set())
+            for term in (key[0], key[1], _executable_name(command)):
+                if term:
+                    self.index.setdefault(term, set()).add(entry_id)
+        return entry_id
+
+    def add_snapshot(self, host, collected, rows):
+        host_id = self.host_ids.get(host)
+        if host_id is None:
+            host_id = self.host_ids[host] = len(self.hosts)
+            self.hosts.append(host)
+        ids = frozenset(self._entry_id(*row) for row in rows)
+        snapshots = self.snapshots.setdefault(host_id, [])
+        latest = snapshots[-1][1] if snapshots else frozenset()
+        snapshots.append((collected, ids))
+        snapshots.sort(key=lambda snapshot: snapshot[0])
+        if snapshots[-1][1] is not latest:
+            for entry_id in latest:
+                self.entry_hosts[entry_id].discard(host_id)
+            for entry_id in snapshots[-1][1]:
+                self.entry_hosts[entry_id].add(host_id)
+
+    def _host_id(self, host):
+        host_id = self.host_ids.get(host)
+        if host_id is None:
+            raise KeyError(f"Unknown host: {host}")
+        return host_id
+
+    def _describe(self, entry_id):
+        name, command, source, enabled = self.entries[entry_id]
+        return {"name": name, "command": command, "source": source, "enabled": enabled,
+                "hosts": len(self.entry_hosts[entry_id])}
+
+    def matching_entries(self, term):
+        """Entry ids whose name, command or program file name is term (case-insensitive; * and ? allowed)."""
+        term = term.casefold()
+        if any(char in term for char in "*?["):
+            # Wildcards scan the distinct terms, not the hosts
+            return set().union(*(ids for key, ids in self.index.items() if fnmatch.fnmatchcase(key, term)))
+        return set(self.index.get(term, ()))
+
+    def hosts_running(self, term, include_disabled=False):
+        """Sorted names of hosts whose latest snapshot has a matching entry (enabled, unless include_disabled)."""
+        host_ids = set()
+        for entry_id in self.matching_entries(term):
+            if include_disabled or self.entries[entry_id][3]:
+                host_ids |= self.entry_hosts[entry_id]
+        return sorted(self.hosts[host_id] for host_id in host_ids)
+
+    def unique_entries(self, host):
+        """Entries in a host's latest snapshot that no other host has."""
+        latest = self.snapshots[self._host_id(host)][-1][1]
+        return sorted((self._describe(entry_id) for entry_id in latest if len(self.entry_hosts[entry_id]) == 1),
+                      key=lambda entry: entry["name"].casefold())
+
+    def drift(self, since, host=None):
+        """{host: {"added", "removed", "changed"}} between each host's latest snapshot and its last one taken at or
+        before since (a timestamp), or its oldest if all are newer. Hosts without changes are left out.
+
+        "changed" lists names whose command or enabled state differ; those entries aren't repeated under added/removed.
+        """
+        host_ids = [self._host_id(host)] if host is not None else range(len(self.hosts))
+        result = {}
+        for host_id in host_ids:
+            snapshots = self.snapshots.get(host_id, [])
+            if len(snapshots) < 2:
+                continue
+            before = snapshots[0][1]
+            for collected, ids in snapshots:
+                if collected > since:
+                    break
+                before = ids
+            after = snapshots[-1][1]
+            if before is after or before == after:
+                continue
+            added = {self.entries[entry_id][0].casefold(): entry_id for entry_id in after - before}
+            removed = {self.entries[entry_id][0].casefold(): entry_id for entry_id in before - after}
+            changed = added.keys() & removed.keys()
+            result[self.hosts[host_id]] = {
+                "added": [self._describe(entry_id) for name, entry_id in added.items() if name not in changed],
+                "removed": [self._describe(entry_id) for name, entry_id in removed.items() if name not in changed],
+                "changed": [{"name": self.entries[added[name]][0], "before": self._describe(removed[name]),
+                             "after": self._describe(added[name])} for name in sorted(changed)],
+            }
+        return result
+
+    def to_dict(self):
+        """The hosts, entries and snapshots as JSON-friendly data; from_dict rebuilds the indexes from them."""
+        return {"version": FLEET_CACHE_VERSION, "files": self.files, "errors": self.errors,
+                "hosts": self.hosts, "entries": self.entries,
+                "snapshots": [[host_id, [[collected, sorted(ids)] for collected, ids in snapshots]]
+                              for host_id, snapshots in self.snapshots.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        fleet = cls()
+        for host in data["hosts"]:
+            fleet.host_ids[host] = len(fleet.hosts)
+            fleet.hosts.append(host)
+        for entry in data["entries"]:
+            # Entries were saved in id order, so they get their old ids back
+            fleet._entry_id(*entry)
+        for host_id, snapshots in data["snapshots"]:
+            fleet.snapshots[host_id] = [(collected, frozenset(ids)) for collected, ids in snapshots]
+            for entry_id in fleet.snapshots[host_id][-1][1]:
+                fleet.entry_hosts[entry_id].add(host_id)
+        fleet.errors = data["errors"]
+        fleet.files = data["files"]
+        return fleet
+
+    def summary(self, top=10):
+        counts = Counter({entry_id: len(hosts) for entry_id, hosts in enumerate(self.entry_hosts) if hosts})
+        return {"hosts": len(self.hosts), "snapshots": sum(len(snapshots) for snapshots in self.snapshots.values()),
+                "entries": len(counts), "errors": len(self.errors),
+                "most_common": [self._describe(entry_id) for entry_id, _ in counts.most_common(top)]}
+
+def fleet_cache_file(paths):
+    """Where the index of the exports under paths is saved: one file per set of paths, in the user cache folder."""
+    key = hashlib.sha1("\n".join(sorted(os.path.abspath(path) for path in paths)).encode("utf-8")).hexdigest()
+    return cache_path(f"fleet_{key[:16]}.json")
+
+def load_cached_fleet(cache_file):
+    """The Fleet saved in cache_file, or None if there is none or it is from another version."""
+    try:
+        with open(cache_file, "r") as f:
+            data = json.load(f)
+        if data.get("version") == FLEET_CACHE_VERSION:
+            return Fleet.from_dict(data)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading fleet cache: {e}", file=sys.stderr)
+    return None
+
+def save_fleet(fleet, cache_file):
+    """Write fleet to cache_file via a temporary file, so a crash never leaves it half-written."""
+    try:
+        os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+        temp_file = f"{cache_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(fleet.to_dict(), f, separators=(",", ":"))
+        os.replace(temp_file, cache_file)
+        return True
+    except Exception as e:
+        print(f"Error saving fleet cache: {e}", file=sys.stderr)
+        return False
+
+@timed
+def load_fleet(paths, workers=INGEST_WORKERS, use_cache=True, cache_file=None):
+    """Build a Fleet from export files (or folders of them), parsing the files on a process pool.
+
+    The fleet is saved after each load and reused by the next load of the
+    same paths: while every file it was built from has the same mtime and
+    size, it is loaded as it is and only files added since are parsed into
+    it. A changed or removed file rebuilds it from scratch. cache_file
+    defaults to fleet_cache_file(paths).
+    """
+    files = [os.path.abspath(file_path) for file_path in find_snapshot_files(paths)]
+    signatures = file_signatures(files)
+    cache_file = (cache_file or fleet_cache_file(paths)) if use_cache else None
+    fleet = load_cached_fleet(cache_file) if cache_file else None
+    if fleet is not None and any(signatures.get(path, False) != signature for path, signature in fleet.files.items()):
+        fleet = None
+    if fleet is None:
+        fleet = Fleet()
+    new_files = [file_path for file_path in files if file_path not in fleet.files]
+    if not new_files:
+        return fleet
+    _parse_into(fleet, new_files, workers)
+    fleet.files.update((file_path, signatures[file_path]) for file_path in new_files)
+    if cache_file:
+        save_fleet(fleet, cache_file)
+    return fleet
+
+def _parse_into(fleet, files, workers):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(files) < 2:
+        # A pool would only add process start-up and pickling
+        _add_parsed(fleet, map(parse_snapshot_file, files))
+        return
+    # Hundreds of small files per task keeps the pickling overhead down
+    chunk_size = max(1, min(256, len(files) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        _add_parsed(fleet, executor.map(parse_snapshot_file, files, chunksize=chunk_size))
+
+def _add_parsed(fleet, results):
+    for snapshots, error in results:
+        if error:
+            # stderr, so the skipped files never end up in --json output
+            print(f"Skipping snapshot file {error}", file=sys.stderr)
+            fleet.errors.append(error)
+        for host, collected, rows in snapshots:
+            fleet.add_snapshot(host, collected, rows)
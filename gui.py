@@ -2,12 +2,16 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox, filedialog, scrolledtext
-import os
-from registry_utils import get_full_startup_items, enable_registry_item, disable_registry_item
-from startup_folder_utils import get_startup_folder, enable_startup_file, disable_startup_file
-from backup_utils import backup_startup_items, restore_startup_items
-from settings_manager import load_settings, save_settings
-from logger import log_action
+import time
+from startup_item import Classification, Source, Status, STATUS_LABELS
+from tree_view import VirtualTreeView, COLUMNS
+from search_index import SearchIndex
+from task_runner import TaskRunner, Cancelled
+from settings_manager import load_settings, save_settings, flush_settings
+import timing_utils
+from timing_utils import timed, format_stats, reset_stats
+# Registry, backup, logging and analysis modules are imported where they are
+# first used, mostly on worker threads, so the window appears without waiting for them
 
 # Load settings (dark mode, logs enabled)
 settings = load_settings()
@@ -27,88 +31,476 @@ def toggle_dark_mode():
 
 # Function to toggle logs
 def toggle_logs():
+    from logger import set_logging_enabled
     settings["logs_enabled"] = logs_var.get()
     save_settings(settings)
+    set_logging_enabled(settings["logs_enabled"])
 
-# Function to update startup list with status (Enabled/Disabled)
-def update_startup_list():
-    registry_items = get_full_startup_items()
-    folder_items = get_startup_folder()
+# Snapshot of the last refresh, used for lookups between refreshes
+current_snapshot = None
+
+# Startup impact of each item by key, from the last analysis
+current_impacts = {}
+
+# Search index over the listed items, updated from each refresh instead of rebuilt
+items_index = SearchIndex()
+
+# Label for the status filter that shows every item
+ALL_STATUSES = "All statuses"
 
-    all_items = registry_items + folder_items
+# Keys the last refresh couldn't read in full, shown in the status bar
+hive_warning = ""
 
-    startup_listbox.delete(0, tk.END)
-    
-    for item in all_items:
-        item_name = item[0] if isinstance(item, tuple) else item
-        
+# Watches the Run keys and Startup folder so the list refreshes only on change
+watcher = None
+
+# Function to update startup list with status (Enabled/Disabled)
+def update_startup_list():
+    # Enumerate on a worker thread; show_snapshot renders the result on the Tk thread
+    runner.submit(read_snapshot, label="Refreshing", on_done=show_snapshot, on_error=task_failed("Refresh", dialog=False))
+
+# Function to read a snapshot on a worker thread
+@timed
+def read_snapshot():
+    from snapshot_utils import take_snapshot
+    from startup_watcher import take_fingerprint
+    # Fingerprint first: anything that changes after it, even during the read, still refreshes again
+    fingerprint = take_fingerprint() if watcher is not None else None
+    snapshot = take_snapshot()
+    if watcher is not None:
+        watcher.resync(fingerprint)  # Don't refresh again for changes this snapshot already shows
+    return snapshot
+
+# Function to read the cached list from the last run on a worker thread
+def read_cached_snapshot():
+    from snapshot_utils import load_cached_snapshot
+    return load_cached_snapshot()
+
+# Function to show the cached list until the first real refresh arrives
+def show_cached_snapshot(snapshot):
+    if snapshot is not None and current_snapshot is None:
+        startup_view.set_rows(snapshot_rows(snapshot))
+        update_search(snapshot.items)
+
+# Function to render a snapshot into the list
+@timed
+def show_snapshot(snapshot):
+    global current_snapshot, hive_warning
+    from registry_utils import hive_problems
+    current_snapshot = snapshot
+    problems = hive_problems(snapshot.hive_report)
+    hive_warning = f" - list may be incomplete, could not read {', '.join(problems)}" if problems else ""
+    if problems and not runner.busy:
+        status_var.set("Ready" + hive_warning)
+    # Publishers from the last analysis apply until the new one arrives
+    classify_with_publishers(snapshot.items)
+    show_rows()
+    # The list is up already; impact scores fill in once the executables are inspected
+    runner.submit(score_impact, snapshot.items, label="Scoring impact", on_done=show_impact,
+                  on_error=task_failed("Impact scoring", dialog=False))
+
+# Function to score startup impact on a worker thread
+def score_impact(items):
+    from impact_utils import analyze_items
+    # The snapshot holds every item, so executables it no longer starts can leave the cache
+    return analyze_items(items, prune=True)
+
+# Function to put the current snapshot into the list, with any impact scores known so far
+def show_rows():
+    # Only the visible rows that changed touch the Treeview
+    startup_view.set_rows(snapshot_rows(current_snapshot))
+    update_search(current_snapshot.items)
+
+# Function to build the list rows for a snapshot
+def snapshot_rows(snapshot):
+    rows = []
+    for item in snapshot.items:
         # Check the status of the item
-        status = "Enabled" if is_item_enabled(item_name) else "Disabled"
-        
-        # Debugging: Log the items being added to the list
-        print(f"Adding item: {item_name} ({status})")
-        
-        # Insert into the Listbox
-        startup_listbox.insert(tk.END, f"{item_name} ({status})")
+        tag = "enabled" if item.enabled else "disabled"
+        impact = current_impacts.get(item.key)
+        # Padded so the column sorts by score
+        score = f"{impact['score']:>3} {impact['level']}" if impact else ""
+        # Shortcuts show what they point at
+        target = item.file_info["target"] if item.file_info else None
+        command = f"{item.command} -> {target}" if target else item.command
+        rows.append((item.key, (item.name, command, item.source.label, item.status.label,
+                                item.classification.label, score), tag))
+    return rows
+
+# Function to bring the search index up to date with the listed items and search again
+def update_search(items):
+    # Publishers come from the impact analysis; items without one keep what they had
+    publishers = {key: impact["publisher"] for key, impact in current_impacts.items()}
+    items_index.update(items, publishers)
+    apply_search()
+
+# Function to narrow the list to the items matching the search box and status filter
+def apply_search(*_):
+    query = search_var.get()
+    status = Status.from_label(status_filter_var.get())
+    if not query.strip() and status is None:
+        startup_view.set_matches(None)
+        counts = items_index.facet_counts()
+    else:
+        # Counts ignore the status filter so they show what picking another status would give
+        counts = items_index.facet_counts(items_index.search(query) if query.strip() else None)
+        startup_view.set_matches(item.key for item in items_index.search(query, status))
+    facets = [f"{value.label}: {count}" for value, count in sorted(counts["status"].items(), reverse=True)]
+    facets += [f"{value.label}: {count}" for value, count in sorted(counts["source"].items())]
+    facets_label.config(text="   ".join(facets))
+
+# Function to show impact scores from a worker
+def show_impact(impacts):
+    global current_impacts
+    current_impacts = impacts
+    if current_snapshot is not None:
+        classify_with_publishers(current_snapshot.items)
+        show_rows()
+
+# Function to classify items again with the publishers the impact analysis found, for publisher rules
+def classify_with_publishers(items):
+    from rules_utils import get_rule_set
+    rules = get_rule_set()
+    if not rules.uses_publishers:
+        return
+    for item in items:
+        impact = current_impacts.get(item.key)
+        if impact and impact["publisher"]:
+            rules.classify_item(item, impact["publisher"])
 
 # Function to check if a startup item is enabled
 def is_item_enabled(item_name):
-    # Check if it's in the registry or the startup folder
-    registry_items = get_full_startup_items()
-    folder_items = get_startup_folder()
-    
-    # Look for the item in both places and check its status
-    for item in registry_items:
-        if item[0] == item_name:
-            return True
-    for item in folder_items:
-        if item == item_name:
-            return True
-    return False
+    # Answer from the last refresh instead of enumerating everything again
+    if current_snapshot is None:
+        return False
+    return current_snapshot.is_enabled(item_name)
+
+# Function to enable or disable items on a worker thread, stopping early if cancelled
+@timed
+def set_items_enabled(job, items, enable):
+    from registry_utils import apply_registry_batch
+    from startup_folder_utils import restore_disabled_startup_file, disable_startup_file
+    from logger import log_action
+    registry_names = [name for name, source, _ in items if source == Source.REGISTRY]
+    folder_names = [name for name, source, _ in items if source != Source.REGISTRY]
+
+    # Registry items go through one all-or-nothing batch
+    started = time.perf_counter()
+    report = apply_registry_batch([(name, enable) for name in registry_names],
+                                  progress=job.report, cancelled=lambda: job.cancelled)
+    registry_seconds = time.perf_counter() - started
+
+    failed = []
+    registry_done = set(report.enabled if enable else report.disabled)
+    for name in registry_done:
+        # Logging only queues the record, so it costs the worker next to nothing
+        log_action(f"{'Enabled' if enable else 'Disabled'} {name}", action="enable" if enable else "disable",
+                   item=name, hive="HKCU", duration=registry_seconds)
+    for index, name in enumerate(folder_names):
+        if job.cancelled:
+            break
+        started = time.perf_counter()
+        if enable:
+            ok = restore_disabled_startup_file(name)
+        else:
+            # disable_startup_file moves the file to a "Disabled" folder instead of deleting it
+            ok = disable_startup_file(name)
+        if ok:
+            (report.enabled if enable else report.disabled).append(name)
+            log_action(f"{'Enabled' if enable else 'Disabled'} {name}", action="enable" if enable else "disable",
+                       item=name, duration=time.perf_counter() - started)
+        else:
+            failed.append(name)
+        job.report(len(registry_names) + index + 1, len(items))
+    return report, failed
+
+# Function to toggle the selected items in the background
+def toggle_selected(enable):
+    items = startup_view.selected_keys()
+    if not enable and current_snapshot is not None:
+        # Items the rules mark as protected are never disabled from here
+        protected = [name for name, _, _ in items
+                     if getattr(current_snapshot.lookup(name), "classification", None) == Classification.PROTECTED]
+        if protected:
+            messagebox.showwarning("Protected", "These protected system items were left enabled:\n" + "\n".join(protected))
+            items = [key for key in items if key[0] not in protected]
+    if not items:
+        return
+    runner.submit(set_items_enabled, items, enable, label="Enabling" if enable else "Disabling",
+                  with_job=True, on_done=finish_toggle, on_error=task_failed("Enabling" if enable else "Disabling"))
+
+# Function to report a finished toggle and refresh
+def finish_toggle(result):
+    show_batch_report(*result)
+    update_startup_list()  # Update the list to reflect changes
+
+# Function to show a batch's errors, or the items it skipped (not found, or in a key it doesn't change)
+def show_batch_report(report, failed):
+    if not report.ok or failed:
+        message = report.summary()
+        if failed:
+            message += "\nCould not move startup folder files: " + ", ".join(failed)
+        messagebox.showerror("Error", message)
+    elif report.skipped:
+        messagebox.showwarning("Some items were skipped", report.summary())
 
 # Function to enable a startup item
 def enable_startup():
-    selected_item = startup_listbox.curselection()
-    if selected_item:
-        item_name = startup_listbox.get(selected_item).split(" (")[0]  # Get item name without the status
-        if item_name in [x[0] for x in get_full_startup_items()]:
-            enable_registry_item(item_name, item_name)
-        else:
-            enable_startup_file(item_name, os.path.join(os.getenv("APPDATA"), "Microsoft\\Windows\\Start Menu\\Programs\\Startup", item_name))
-        log_action(f"Enabled {item_name}")
-        update_startup_list()
+    toggle_selected(True)
 
 # Function to disable a startup item (now marks it as disabled instead of deleting it)
 def disable_startup():
-    selected_item = startup_listbox.curselection()
-    if selected_item:
-        item_name = startup_listbox.get(selected_item).split(" (")[0]  # Get item name without the status
-        if item_name in [x[0] for x in get_full_startup_items()]:
-            disable_registry_item(item_name)  # This keeps the registry entry but disables the item
-        else:
-            # Now call disable_startup_file to move the file to a "Disabled" folder instead of deleting it
-            disable_startup_file(item_name)
-        log_action(f"Disabled {item_name}")
-        update_startup_list()  # Update the list to reflect changes
+    toggle_selected(False)
 
 # Function to backup startup items
 def backup_startup():
-    items = get_full_startup_items() + get_startup_folder()
-    backup_startup_items(items)
-    log_action("Backup created.")
+    def backup():
+        from snapshot_utils import take_snapshot
+        from backup_utils import backup_startup_items
+        from logger import log_action
+        # Snapshot entries carry the command (or file path) as well as the state
+        started = time.perf_counter()
+        ok = backup_startup_items(take_snapshot().items)
+        if ok:
+            log_action("Backup created.", action="backup", duration=time.perf_counter() - started)
+        return ok
+
+    runner.submit(backup, label="Backing up", on_done=finish_backup, on_error=task_failed("Backup"))
+
+# Function to report a finished backup
+def finish_backup(ok):
+    if ok:
+        status_var.set("Backup created")
+    else:
+        messagebox.showerror("Error", "The backup could not be written; see the log for details.")
 
 # Function to restore startup items
 def restore_startup():
-    items = restore_startup_items()
-    if items:
-        log_action("Restored from backup.")
-        update_startup_list()
+    def plan():
+        from backup_utils import restore_startup_items
+        from restore_utils import plan_restore
+        backup = restore_startup_items()
+        if not backup:
+            # An empty plan target would remove every live item
+            return None
+        # Diff the latest backup against what is live now, off the Tk thread
+        return plan_restore(backup)
+
+    runner.submit(plan, label="Comparing with backup", on_done=confirm_restore, on_error=task_failed("Comparing with backup"))
+
+# Function to preview a restore and apply it if the user agrees
+def confirm_restore(plan):
+    if plan is None:
+        messagebox.showerror("Error", "No backup items to restore.")
+        return
+    if not plan.actions:
+        messagebox.showinfo("Restore", "Startup items already match the backup.")
+        return
+    lines = plan.preview()
+    if len(lines) > 25:
+        lines = lines[:25] + [f"...and {len(lines) - 25} more"]
+    if not messagebox.askyesno("Restore", "Apply these changes?\n\n" + "\n".join(lines)):
+        return
+
+    def apply(job):
+        from restore_utils import apply_restore
+        from logger import log_action
+        started = time.perf_counter()
+        result = apply_restore(plan, progress=job.report, cancelled=lambda: job.cancelled)
+        if result[0].ok:
+            log_action("Restored from backup.", action="restore", duration=time.perf_counter() - started)
+        return result
+
+    runner.submit(apply, label="Restoring", with_job=True, on_done=finish_restore, on_error=task_failed("Restore"))
+
+# Function to report a finished restore and refresh
+def finish_restore(result):
+    show_batch_report(*result)
+    update_startup_list()
+
+# Function to report a background task that failed: in the status bar, and in a dialog for ones the user started
+def task_failed(label, dialog=True):
+    def show(error):
+        if isinstance(error, Cancelled):
+            status_var.set(f"{label} cancelled")
+            return
+        status_var.set(f"{label} failed: {error}")
+        if dialog:
+            messagebox.showerror("Error", f"{label} failed: {error}")
+    return show
+
+# Function to show what the background workers are doing
+def show_busy(label):
+    if label is None:
+        status_var.set("Ready" + hive_warning)
+        progress_bar.stop()
+        progress_bar.config(mode="indeterminate", value=0)
+        cancel_button.state(["disabled"])
+    else:
+        status_var.set(f"{label}...")
+        cancel_button.state(["!disabled"])
+        if str(progress_bar.cget("mode")) == "indeterminate":
+            progress_bar.start(10)
+
+# Function to show progress of a bulk operation
+def show_progress(label, done, total):
+    progress_bar.stop()
+    progress_bar.config(mode="determinate", maximum=total, value=done)
+    status_var.set(f"{label}... {done}/{total}")
+
+# Sequence number of the last log record shown in the Logs tab
+logs_seen = 0
+
+# Function to show new log records from the in-memory buffer
+def tail_logs():
+    from logger import get_log_buffer
+    global logs_seen
+    buffer = get_log_buffer()
+    if buffer is not None:
+        lines, logs_seen = buffer.tail(logs_seen)
+        if lines:
+            logs_text.config(state=tk.NORMAL)
+            logs_text.insert(tk.END, "\n".join(lines) + "\n")
+            # Keep the widget as bounded as the buffer behind it
+            excess = int(logs_text.index("end-1c").split(".")[0]) - 1 - buffer.records.maxlen
+            if excess > 0:
+                logs_text.delete(1.0, f"{excess + 1}.0")
+            logs_text.see(tk.END)
+            logs_text.config(state=tk.DISABLED)
+    root.after(500, tail_logs)
 
 # Function to clear logs
 def clear_logs():
+    logs_text.config(state=tk.NORMAL)
     logs_text.delete(1.0, tk.END)
+    logs_text.config(state=tk.DISABLED)
+
+# Function to show the recorded timings in the Diagnostics tab
+def show_diagnostics(text=None):
+    diagnostics_text.config(state=tk.NORMAL)
+    diagnostics_text.delete(1.0, tk.END)
+    if text is None:
+        from registry_utils import format_hive_report
+        text = format_stats()
+        if current_snapshot is not None and current_snapshot.hive_report:
+            text += "\n\nRegistry keys read by the last refresh:\n" + format_hive_report(current_snapshot.hive_report)
+    diagnostics_text.insert(tk.END, text)
+    diagnostics_text.config(state=tk.DISABLED)
+
+# Function to turn timing on or off
+def toggle_timing():
+    timing_utils.enable_timing(timing_var.get())
+    show_diagnostics()
+
+# Function to forget the recorded timings
+def reset_diagnostics():
+    reset_stats()
+    show_diagnostics()
+
+# Function to profile one refresh: the read on a worker, then the render here
+def profile_refresh():
+    from timing_utils import profile_call
+
+    def rendered(result):
+        snapshot, read_report = result
+        _, render_report = profile_call(show_snapshot, snapshot)
+        show_diagnostics(f"Reading ({len(snapshot)} items)\n{read_report}\nRendering\n{render_report}")
+
+    runner.submit(profile_call, read_snapshot, label="Profiling refresh", on_done=rendered,
+                  on_error=task_failed("Profiling"))
+
+# Function to stop watching for changes when the window closes
+def on_close():
+    if watcher is not None:
+        watcher.stop()
+    runner.shutdown()
+    flush_settings()
+    root.destroy()
+
+# Tabs built the first time they are opened, by frame name
+deferred_tabs = {}
+
+# Function to build a tab's widgets when it is first opened
+def build_tab(event=None):
+    frame = notebook.select()
+    builder = deferred_tabs.pop(frame, None)
+    if builder is not None:
+        builder(root.nametowidget(frame))
+
+def build_backup_tab(backup_frame):
+    # Buttons for backup and restore
+    backup_button = ttk.Button(backup_frame, text="Backup", command=backup_startup)
+    backup_button.pack(padx=10, pady=5)
+
+    restore_button = ttk.Button(backup_frame, text="Restore", command=restore_startup)
+    restore_button.pack(padx=10, pady=5)
+
+def build_settings_tab(settings_frame):
+    global dark_mode_var, logs_var
+
+    # Dark mode toggle
+    dark_mode_var = tk.BooleanVar(value=settings["dark_mode"])
+    dark_mode_checkbox = ttk.Checkbutton(settings_frame, text="Dark Mode", variable=dark_mode_var, command=toggle_dark_mode)
+    dark_mode_checkbox.pack(padx=10, pady=5)
+
+    # Log toggle
+    logs_var = tk.BooleanVar(value=settings["logs_enabled"])
+    logs_checkbox = ttk.Checkbutton(settings_frame, text="Enable Logs", variable=logs_var, command=toggle_logs)
+    logs_checkbox.pack(padx=10, pady=5)
+
+def build_logs_tab(logs_frame):
+    global logs_text
+
+    # Scrollable logs text area
+    logs_text = scrolledtext.ScrolledText(logs_frame, width=60, height=20, wrap=tk.WORD, state=tk.DISABLED)
+    logs_text.pack(padx=10, pady=10)
+
+    # Clear logs button
+    clear_logs_button = ttk.Button(logs_frame, text="Clear Logs", command=clear_logs)
+    clear_logs_button.pack(padx=10, pady=5)
+    # The buffer keeps the latest records, so nothing logged before the tab was opened is missed
+    tail_logs()
+
+def build_diagnostics_tab(diagnostics_frame):
+    global timing_var, diagnostics_text
+
+    timing_var = tk.BooleanVar(value=timing_utils.enabled)
+    timing_checkbox = ttk.Checkbutton(diagnostics_frame, text="Record timings", variable=timing_var, command=toggle_timing)
+    timing_checkbox.pack(padx=10, pady=5)
+
+    diagnostics_text = scrolledtext.ScrolledText(diagnostics_frame, width=90, height=20, wrap=tk.NONE, state=tk.DISABLED)
+    diagnostics_text.pack(padx=10, pady=10)
+
+    diagnostics_buttons = ttk.Frame(diagnostics_frame)
+    diagnostics_buttons.pack(padx=10, pady=5)
+    ttk.Button(diagnostics_buttons, text="Refresh", command=show_diagnostics).grid(row=0, column=0, padx=5)
+    ttk.Button(diagnostics_buttons, text="Reset", command=reset_diagnostics).grid(row=0, column=1, padx=5)
+    ttk.Button(diagnostics_buttons, text="Profile a Refresh", command=profile_refresh).grid(row=0, column=2, padx=5)
+    show_diagnostics()
+
+# Function to start logging, the first refresh and the watcher once the window is on screen
+def start_background():
+    global watcher
+    from logger import setup_logger
+    from startup_watcher import StartupWatcher
+
+    # Records go to a queue; a background thread writes app.log and the Logs tab buffer
+    setup_logger(enabled=settings["logs_enabled"])
+
+    # Show last run's list at once, then fill in the real one (re-reading only changed sources) from a worker
+    runner.submit(read_cached_snapshot, label="Loading", on_done=show_cached_snapshot,
+                  on_error=task_failed("Loading the last list", dialog=False))
+    update_startup_list()
+
+    # Refresh whenever a startup source changes instead of on a timer
+    watcher = StartupWatcher(lambda: runner.post(update_startup_list))
+    runner.submit(watcher.start, label="Watching for changes", on_error=task_failed("Watching for changes", dialog=False))
 
 def main_window():
+    global root, startup_tree, startup_view, notebook
+    global runner, status_var, progress_bar, cancel_button
+    global search_var, status_filter_var, facets_label
+
     # Set up window
     root = tk.Tk()
     root.title("Startup Cleaner - oxy edition")
@@ -116,6 +508,24 @@ def main_window():
     # Set initial theme
     set_theme()
 
+    # Status bar showing background work, with a way to cancel bulk operations
+    status_frame = ttk.Frame(root)
+    status_frame.pack(side=tk.BOTTOM, fill='x', padx=10, pady=(0, 10))
+
+    status_var = tk.StringVar(value="Ready")
+    ttk.Label(status_frame, textvariable=status_var).pack(side=tk.LEFT)
+
+    cancel_button = ttk.Button(status_frame, text="Cancel", command=lambda: runner.cancel_all())
+    cancel_button.pack(side=tk.RIGHT)
+    cancel_button.state(["disabled"])
+
+    progress_bar = ttk.Progressbar(status_frame, mode="indeterminate", length=150)
+    progress_bar.pack(side=tk.RIGHT, padx=5)
+
+    # Registry and file I/O runs here so slow hives or folders don't freeze the window
+    # Polls a few times a second while idle so the watcher thread can post refreshes without touching Tk
+    runner = TaskRunner(root, on_busy=show_busy, on_progress=show_progress, idle_poll_ms=250)
+
     # Create the notebook (tabs)
     notebook = ttk.Notebook(root)
     notebook.pack(padx=10, pady=10, fill='both', expand=True)
@@ -124,9 +534,38 @@ def main_window():
     startup_frame = ttk.Frame(notebook)
     notebook.add(startup_frame, text="Startup Items")
 
-    # Listbox for startup items
-    startup_listbox = tk.Listbox(startup_frame, height=10, width=50)
-    startup_listbox.pack(padx=10, pady=10)
+    # Search box and status filter narrowing the list as you type
+    filter_frame = ttk.Frame(startup_frame)
+    filter_frame.pack(fill='x', padx=10, pady=(10, 0))
+    ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT)
+    search_var = tk.StringVar()
+    search_var.trace_add("write", apply_search)
+    ttk.Entry(filter_frame, textvariable=search_var).pack(side=tk.LEFT, fill='x', expand=True, padx=5)
+    status_filter_var = tk.StringVar(value=ALL_STATUSES)
+    status_filter_var.trace_add("write", apply_search)
+    ttk.Combobox(filter_frame, textvariable=status_filter_var, state="readonly", width=26,
+                 values=[ALL_STATUSES] + list(STATUS_LABELS.values())).pack(side=tk.LEFT)
+
+    # How many items match the search, by status and source
+    facets_label = ttk.Label(startup_frame, text="")
+    facets_label.pack(fill='x', padx=10)
+
+    # Treeview for startup items; only the visible rows exist as Treeview items
+    tree_frame = ttk.Frame(startup_frame)
+    tree_frame.pack(padx=10, pady=10, fill='both', expand=True)
+    startup_tree = ttk.Treeview(tree_frame)
+    tree_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
+    startup_view = VirtualTreeView(startup_tree, tree_scrollbar, COLUMNS + ("classification", "impact"), height=15)
+    startup_tree.column("name", width=180)
+    startup_tree.column("command", width=280)
+    startup_tree.column("source", width=110)
+    startup_tree.column("status", width=160)
+    startup_tree.column("classification", width=130)
+    startup_tree.column("impact", width=90)
+    startup_tree.tag_configure("enabled", foreground="green")
+    startup_tree.tag_configure("disabled", foreground="red")
+    startup_tree.pack(side=tk.LEFT, fill='both', expand=True)
+    tree_scrollbar.pack(side=tk.RIGHT, fill='y')
 
     # Buttons for enabling/disabling/deleting startup items
     button_frame = ttk.Frame(startup_frame)
@@ -138,44 +577,16 @@ def main_window():
     disable_button = ttk.Button(button_frame, text="Disable", command=disable_startup)
     disable_button.grid(row=0, column=1, padx=5)
 
-    # Create the 'Backup/Restore' tab
-    backup_frame = ttk.Frame(notebook)
-    notebook.add(backup_frame, text="Backup/Restore")
-
-    # Buttons for backup and restore
-    backup_button = ttk.Button(backup_frame, text="Backup", command=backup_startup)
-    backup_button.pack(padx=10, pady=5)
-
-    restore_button = ttk.Button(backup_frame, text="Restore", command=restore_startup)
-    restore_button.pack(padx=10, pady=5)
-
-    # Create the 'Settings' tab
-    settings_frame = ttk.Frame(notebook)
-    notebook.add(settings_frame, text="Settings")
-
-    # Dark mode toggle
-    dark_mode_var = tk.BooleanVar(value=settings["dark_mode"])
-    dark_mode_checkbox = ttk.Checkbutton(settings_frame, text="Dark Mode", variable=dark_mode_var, command=toggle_dark_mode)
-    dark_mode_checkbox.pack(padx=10, pady=5)
-
-    # Log toggle
-    logs_var = tk.BooleanVar(value=settings["logs_enabled"])
-    logs_checkbox = ttk.Checkbutton(settings_frame, text="Enable Logs", variable=logs_var, command=toggle_logs)
-    logs_checkbox.pack(padx=10, pady=5)
-
-    # Create the 'Logs' tab
-    logs_frame = ttk.Frame(notebook)
-    notebook.add(logs_frame, text="Logs")
-
-    # Scrollable logs text area
-    logs_text = scrolledtext.ScrolledText(logs_frame, width=60, height=20, wrap=tk.WORD, state=tk.DISABLED)
-    logs_text.pack(padx=10, pady=10)
-
-    # Clear logs button
-    clear_logs_button = ttk.Button(logs_frame, text="Clear Logs", command=clear_logs)
-    clear_logs_button.pack(padx=10, pady=5)
-
-    # Call the update_startup_list function after window initialization
-    update_startup_list()
+    # The other tabs start empty and are filled in the first time they are opened
+    for text, builder in (("Backup/Restore", build_backup_tab), ("Settings", build_settings_tab),
+                          ("Logs", build_logs_tab), ("Diagnostics", build_diagnostics_tab)):
+        frame = ttk.Frame(notebook)
+        notebook.add(frame, text=text)
+        deferred_tabs[str(frame)] = builder
+    notebook.bind("<<NotebookTabChanged>>", build_tab)
+
+    # Idle callbacks run in order, so this waits until the window has been drawn
+    root.after_idle(start_background)
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     return root  # Return the root window so it can be accessed from main.py
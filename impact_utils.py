@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import psutil
+except ImportError:  # Scores then come from the file alone
+    psutil = None
+
+from startup_item import command_executable
+from timing_utils import timed
+from snapshot_cache import cache_path
+
+CACHE_FILE = cache_path("impact_cache.json")
+CACHE_VERSION = 1
+IMPACT_WORKERS = 4
+# Processes started this many seconds after boot count as started at boot, and their
+# usage is only sampled while the machine hasn't been up longer than this
+BOOT_WINDOW = 300
+# Boots whose CPU and disk use are remembered per executable
+MAX_BOOTS = 5
+LEVELS = ((40, "High"), (15, "Medium"), (0, "Low"))
+
+class ImpactCache:
+    """Executable metadata on disk, keyed by path and valid while the file's mtime and size are unchanged.
+
+    Entries hold the file's size, SHA-256, publisher and the CPU seconds and
+    bytes read/written by its process on recent boots, so a refresh only
+    stats each file instead of hashing and inspecting it again.
+    """
+
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(cache_file, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data["entries"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading impact cache: {e}")
+
+    def lookup(self, path, mtime, size):
+        """The cached entry for path if the file hasn't changed since, else None."""
+        with self._lock:
+            entry = self.entries.get(path.casefold())
+            if entry is not None and entry["mtime"] == mtime and entry["size"] == size:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def store(self, path, entry):
+        with self._lock:
+            old = self.entries.get(path.casefold())
+            # Boot history belongs to the program, so it survives an update of the file
+            entry.setdefault("boots", old.get("boots", {}) if old else {})
+            self.entries[path.casefold()] = entry
+            self._dirty = True
+
+    def observe(self, path, boot_time, cpu_seconds, io_bytes):
+        """Remember what the program used during one boot, keeping the latest MAX_BOOTS."""
+        with self._lock:
+            entry = self.entries.get(path.casefold())
+            if entry is None:
+                return
+            boots = entry.setdefault("boots", {})
+            key = str(int(boot_time))
+            if boots.get(key) == [cpu_seconds, io_bytes]:
+                return
+            boots[key] = [cpu_seconds, io_bytes]
+            for old in sorted(boots, key=int)[:-MAX_BOOTS]:
+                del boots[old]
+            self._dirty = True
+
+    def prune(self, paths):
+        """Drop the entries of executables not in paths, so programs that are no longer started don't pile up."""
+        keep = {path.casefold() for path in paths}
+        with self._lock:
+            stale = [path for path in self.entries if path not in keep]
+            for path in stale:
+                del self.entries[path]
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def save(self):
+        """Write the cache if it changed, via a temporary file so a crash never leaves it half-written."""
+        with self._lock:
+            if not self._dirty:
+                return True
+            text = json.dumps({"version": CACHE_VERSION, "entries": self.entries})
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, "w") as f:
+                f.write(text)
+            os.replace(temp_file, self.cache_file)
+            return True
+        except Exception as e:
+            print(f"Error saving impact cache: {e}")
+            return False
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache(cache_file=CACHE_FILE):
+    """The shared ImpactCache, loaded on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.cache_file != cache_file:
+            _cache = ImpactCache(cache_file)
+        return _cache
+
+def resolve_executable(command):
+    """Full path of the file a command line runs, or None if it can't be found."""
+    if not command:
+        return None
+    path = command_executable(command)
+    if path and not os.path.isabs(path):
+        path = shutil.which(path)
+    return path if path and os.path.isfile(path) else None
+
+def item_executable(item):
+    """Full path of the file a StartupItem runs: a shortcut's target rather than the .lnk itself."""
+    target = item.file_info.get("target") if item.file_info else None
+    if not target:
+        return resolve_executable(item.command)
+    if not os.path.isabs(target):
+        # Shortcuts without a local path store one relative to the .lnk
+        target = os.path.normpath(os.path.join(os.path.dirname(item.command), target))
+    return resolve_executable(f'"{target}"')
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_publisher(path):
+    """CompanyName from a Windows executable's version resource, or None."""
+    if sys.platform != "win32":
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+        version = ctypes.windll.version
+        size = version.GetFileVersionInfoSizeW(path, None)
+        if not size:
+            return None
+        buffer = ctypes.create_string_buffer(size)
+        if not version.GetFileVersionInfoW(path, 0, size, buffer):
+            return None
+        pointer, length = ctypes.c_void_p(), wintypes.UINT()
+        # Strings are stored per language and code page; use the first pair listed
+        if not version.VerQueryValueW(buffer, "\\VarFileInfo\\Translation", ctypes.byref(pointer), ctypes.byref(length)) \
+                or not length.value:
+            return None
+        language, codepage = ctypes.cast(pointer, ctypes.POINTER(wintypes.WORD * 2)).contents
+        name = f"\\StringFileInfo\\{language:04x}{codepage:04x}\\CompanyName"
+        if not version.VerQueryValueW(buffer, name, ctypes.byref(pointer), ctypes.byref(length)) or not length.value:
+            return None
+        return ctypes.wstring_at(pointer.value).strip() or None
+    except (OSError, AttributeError, ValueError) as e:
+        print(f"Error reading version info of {path}: {e}")
+        return None
+
+def inspect_file(path, cache):
+    """The cache entry for an executable, hashing and inspecting it only if it changed."""
+    try:
+        info = os.stat(path)
+        entry = cache.lookup(path, info.st_mtime_ns, info.st_size)
+        if entry is None:
+            entry = {"mtime": info.st_mtime_ns, "size": info.st_size, "sha256": _hash_file(path),
+                     "publisher": file_publisher(path)}
+            cache.store(path, entry)
+        return entry
+    except OSError as e:
+        print(f"Error inspecting {path}: {e}")
+        return None
+
+def publisher_of(item, cache=None):
+    """Publisher of the executable a StartupItem runs, from the cache or by inspecting the file; None if unknown."""
+    path = item_executable(item)
+    if path is None:
+        return None
+    cache = cache or get_cache()
+    entry = inspect_file(path, cache)
+    cache.save()
+    return entry.get("publisher") if entry else None
+
+def boot_observations():
+    """(boot time, {executable path (casefolded): (cpu seconds, io bytes)}) for processes started at boot.
+
+    psutil only gives totals since a process started, which are usage at
+    boot only while the machine has been up less than BOOT_WINDOW, so
+    later calls return nothing and the cached history of earlier boots is
+    used instead. Empty when psutil isn't installed.
+    """
+    if psutil is None:
+        return None, {}
+    boot_time = psutil.boot_time()
+    if time.time() - boot_time > BOOT_WINDOW:
+        return boot_time, {}
+    observed = {}
+    for process in psutil.process_iter(["exe", "create_time", "cpu_times", "io_counters"]):
+        info = process.info
+        # Processes we may not inspect come back with None values
+        if not info.get("exe") or info.get("create_time") is None or info["create_time"] - boot_time > BOOT_WINDOW:
+            continue
+        cpu = info["cpu_times"].user + info["cpu_times"].system if info.get("cpu_times") else 0.0
+        io = info["io_counters"].read_bytes + info["io_counters"].write_bytes if info.get("io_counters") else 0
+        key = info["exe"].casefold()
+        old_cpu, old_io = observed.get(key, (0.0, 0))
+        observed[key] = (old_cpu + cpu, old_io + io)
+    return boot_time, observed
+
+def impact_score(size, cpu_seconds=None, io_bytes=None, publisher=None):
+    """0-100: up to 20 for file size, 50 for CPU time at boot, 25 for disk I/O at boot, 5 for no publisher."""
+    megabytes = 1024 * 1024
+    score = min(20.0, size / megabytes * 0.5)
+    if cpu_seconds is not None:
+        score += min(50.0, cpu_seconds * 10)
+    if io_bytes is not None:
+        score += min(25.0, io_bytes / megabytes * 0.5)
+    if not publisher:
+        score += 5
+    return min(100, round(score))
+
+def impact_level(score):
+    for threshold, level in LEVELS:
+        if score >= threshold:
+            return level
+    return LEVELS[-1][1]
+
+def _impact(path, entry):
+    boots = list(entry.get("boots", {}).values())
+    cpu = sum(boot[0] for boot in boots) / len(boots) if boots else None
+    io = sum(boot[1] for boot in boots) / len(boots) if boots else None
+    score = impact_score(entry["size"], cpu, io, entry.get("publisher"))
+    return {"path": path, "size": entry["size"], "sha256": entry["sha256"], "publisher": entry.get("publisher"),
+            "cpu_seconds": cpu, "io_bytes": io, "boots": len(boots), "score": score, "level": impact_level(score)}
+
+@timed
+def analyze_items(items, cache=None, workers=IMPACT_WORKERS, cancelled=None, prune=False):
+    """{item.key: impact dict} for the items whose executable can be found.
+
+    Files are inspected on a pool of worker threads, each unique executable
+    once, and the cache is saved at the end. cancelled() is checked between
+    files. With prune set, items must be every startup item, and cache
+    entries for executables none of them start are dropped.
+    """
+    cache = cache or get_cache()
+    paths = {}
+    for item in items:
+        path = item_executable(item)
+        if path is not None:
+            paths.setdefault(path, []).append(item.key)
+
+    def inspect(path):
+        if cancelled is not None and cancelled():
+            return None
+        return inspect_file(path, cache)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="impact") as executor:
+        entries = dict(zip(paths, executor.map(inspect, paths)))
+
+    boot_time, observed = boot_observations()
+    impacts = {}
+    for path, entry in entries.items():
+        if entry is None:
+            continue
+        if path.casefold() in observed:
+            cache.observe(path, boot_time, *observed[path.casefold()])
+        impact = _impact(path, entry)
+        for key in paths[path]:
+            impacts[key] = impact
+    if prune and not (cancelled is not None and cancelled()):
+        cache.prune(paths)
+    cache.save()
+    return impacts
@@ -1,25 +1,153 @@
+import atexit
+import collections
+import json
 import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+LOGGER_NAME = "startup_cleaner"
+# app.log rolls over at midnight or once it passes MAX_BYTES, keeping BACKUP_COUNT old files
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 5
+# Records the Logs tab can show
+RING_SIZE = 500
+# Structured fields log_action accepts
+FIELDS = ("action", "item", "hive", "duration")
+
+_listener = None
+_ring = None
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """Rotates on a schedule like TimedRotatingFileHandler, and also when the file gets too big."""
+
+    def __init__(self, filename, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, when="midnight"):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+
+    def doRollover(self):
+        # Size rollovers can happen several times a second, so number the old files
+        # instead of naming them after the time like TimedRotatingFileHandler does
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        for i in range(self.backupCount - 1, 0, -1):
+            source = f"{self.baseFilename}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.baseFilename}.{i + 1}")
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, f"{self.baseFilename}.1")
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the time, level, message and any structured fields."""
+
+    def format(self, record):
+        data = {"time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"), "level": record.levelname,
+                "message": record.getMessage()}
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data["error"] = self.formatException(record.exc_info)
+        return json.dumps(data)
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last capacity formatted records in memory for the Logs tab to tail."""
+
+    def __init__(self, capacity=RING_SIZE):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+        self.sequence = 0  # Number of records ever added
+
+    def emit(self, record):
+        line = self.format(record)
+        with self.lock:
+            self.records.append(line)
+            self.sequence += 1
+
+    def tail(self, since=0):
+        """(lines added after sequence number since, current sequence number).
+
+        If more than capacity records arrived in between, only the last capacity are returned.
+        """
+        with self.lock:
+            new = min(self.sequence - since, len(self.records))
+            lines = list(self.records)[len(self.records) - new:] if new > 0 else []
+            return lines, self.sequence
+
+def setup_logger(log_file="app.log", max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT, when="midnight",
+                 console=False, enabled=True):
+    """Setup logger to record app actions.
+
+    Callers only put records on a queue; a background listener formats them
+    and writes app.log as JSON lines, rotating it by size and time, and fills
+    the in-memory ring buffer. Calling it again returns the running listener.
+    """
+    global _listener, _ring
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.disabled = not enabled
+    if _listener is not None:
+        return _listener
 
-def setup_logger(log_file="app.log"):
-    """Setup logger to record app actions."""
-    logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
-    
-    # Log to file
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
-    
-    # Log to console
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-def log_action(message):
-    """Log a custom action."""
-    logging.info(message)
+    logger.propagate = False
+
+    file_handler = SizedTimedRotatingFileHandler(log_file, max_bytes, backup_count, when)
+    file_handler.setFormatter(JsonFormatter())
+
+    _ring = RingBufferHandler()
+    _ring.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    handlers = [file_handler, _ring]
+
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logger)
+    return _listener
+
+def shutdown_logger():
+    """Write out queued records and stop the background writer."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+
+def set_logging_enabled(enabled):
+    """Turn recording on or off without stopping the writer."""
+    logging.getLogger(LOGGER_NAME).disabled = not enabled
+
+def get_log_buffer():
+    """The RingBufferHandler the Logs tab tails, or None before setup_logger."""
+    return _ring
+
+def log_action(message, action=None, item=None, hive=None, duration=None):
+    """Log a custom action, with optional structured fields for the JSON log."""
+    extra = {"action": action, "item": item, "hive": hive,
+             "duration": round(duration, 6) if duration is not None else None}
+    logging.getLogger(LOGGER_NAME).info(message, extra=extra)
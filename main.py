@@ -1,6 +1,12 @@
 # main.py
 
-import gui
+import sys
 
 if __name__ == "__main__":
-    gui.main_window()
+    if len(sys.argv) > 1:
+        # Subcommands run headless, without importing tkinter
+        import cli
+        sys.exit(cli.main(sys.argv[1:]))
+
+    import gui
+    gui.main_window().mainloop()
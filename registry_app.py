@@ -0,0 +1,334 @@
+# registry_app.py
+# Standalone Tk manager for the registry Run keys: python registry_app.py
+import tkinter as tk
+from tkinter import ttk, messagebox
+import os
+from export_utils import export_items
+from tree_view import VirtualTreeView
+from registry_backend import get_backend, get_key_cache, HKEY_CURRENT_USER, KEY_READ, KEY_ALL_ACCESS, REG_SZ
+from registry_utils import get_full_startup_items, move_registry_value, apply_registry_batch, RUN_PATH, DISABLED_PATH
+from timing_utils import timed
+from rules_utils import get_rule_set
+from startup_item import Classification
+from search_index import SearchIndex
+from task_runner import TaskRunner
+import snapshot_cache
+
+# Registry reads and writes run on the runner's worker threads; messages and the list stay on the Tk thread
+runner = None
+
+def enable_registry_item(name):
+    # Move from disabled to enabled
+    runner.submit(move_registry_value, name, DISABLED_PATH, RUN_PATH, label="Enabling",
+                  on_done=lambda _: finish_move(f"'{name}' has been enabled."),
+                  on_error=lambda e: move_failed(e, f"'{name}' not found in disabled startup items.",
+                                                 "Error enabling startup item"))
+
+def disable_registry_item(name):
+    # Move from enabled to disabled
+    runner.submit(move_registry_value, name, RUN_PATH, DISABLED_PATH, label="Disabling",
+                  on_done=lambda _: finish_move(f"'{name}' has been disabled."),
+                  on_error=lambda e: move_failed(e, f"'{name}' not found in enabled startup items.",
+                                                 "Error disabling startup item"))
+
+def finish_move(message):
+    messagebox.showinfo("Success", message)
+    update_startup_list()
+
+def move_failed(error, missing_message, error_prefix):
+    if isinstance(error, FileNotFoundError):
+        messagebox.showerror("Error", missing_message)
+    else:
+        messagebox.showerror("Error", f"{error_prefix}: {error}")
+    update_startup_list()
+
+# (name, status) -> StartupItem from the last refresh
+current_items = {}
+
+@timed
+def read_startup_items():
+    """The registry items, sorted and classified; runs on a worker thread."""
+    registry_items = get_full_startup_items()
+
+    # Sort: Enabled first, then Disabled
+    registry_items.sort(key=lambda item: (not item.enabled, item.name.lower()))
+
+    rules = get_rule_set()
+    for item in registry_items:
+        rules.classify_item(item)
+    return registry_items
+
+def update_startup_list():
+    runner.submit(read_startup_items, label="Refreshing", on_done=show_startup_items, on_error=task_failed("Refresh", dialog=False))
+
+def show_startup_items(registry_items):
+    current_items.clear()
+    rows = []
+    for item in registry_items:
+        current_items[(item.name, item.status)] = item
+        # Coloring
+        tag = 'enabled' if item.enabled else 'disabled'
+        rows.append(((item.name, item.status), (item.name, item.command, item.source.label, item.status.label), tag))
+
+    # Only the visible rows that changed touch the Treeview
+    startup_view.set_rows(rows)
+    items_index.update(registry_items)
+    apply_search()
+
+def apply_search(*_):
+    query = search_var.get()
+    if query.strip():
+        matches = items_index.search(query)
+        startup_view.set_matches((item.name, item.status) for item in matches)
+        counts = items_index.facet_counts(matches)
+    else:
+        startup_view.set_matches(None)
+        counts = items_index.facet_counts()
+    facets_label.config(text="   ".join(f"{status.label}: {count}"
+                                         for status, count in sorted(counts["status"].items(), reverse=True)))
+
+def on_item_click(event):
+    selection = startup_view.selected_keys()
+    if not selection:
+        return
+    # Rows are keyed by (name, status), so nothing has to be parsed back out of the display
+    name, status = selection[0]
+
+    if status.enabled:
+        if is_protected(selection[0]):
+            messagebox.showwarning("Warning", f"'{name}' is a protected system item and can't be disabled here.")
+            return
+        if messagebox.askyesno("Disable", f"Do you want to disable '{name}'?"):
+            disable_registry_item(name)
+    elif messagebox.askyesno("Enable", f"Do you want to enable '{name}'?"):
+        enable_registry_item(name)
+
+def on_right_click(event):
+    try:
+        key = startup_view.key_at_y(event.y)
+        if key is None:
+            return
+        startup_view.select([key])
+        context_menu.tk_popup(event.x_root, event.y_root)
+    finally:
+        context_menu.grab_release()
+
+def explain_item(item):
+    """The rule matching item, or None; reads the publisher from the file when a rule needs it."""
+    publisher = None
+    if get_rule_set().uses_publishers:
+        from impact_utils import publisher_of
+        publisher = publisher_of(item)
+    return get_rule_set().explain(item.name, item.command, publisher)
+
+def show_details(name, status):
+    item = current_items.get((name, status))
+    if item is None:
+        show_rule(name, status, None, None)
+        return
+    runner.submit(explain_item, item, label="Looking up rule",
+                  on_done=lambda rule: show_rule(name, status, item, rule), on_error=task_failed("Looking up the rule"))
+
+def show_rule(name, status, item, rule):
+    detail_text = f"Name: {name}\nStatus: {status}\n\n(Registry path varies by status)"
+    if rule is not None:
+        detail_text += f"\n\n{item.classification}: matches {rule['kind']} rule '{rule['pattern']}'"
+    messagebox.showinfo("Details", detail_text)
+
+def on_item_select(event):
+    # When the user selects multiple items by holding 'Ctrl' or 'Shift'
+    selected_items = startup_view.selected_keys()
+
+    if not selected_items:
+        return
+
+    action = "Disable" if selected_items[0][1].enabled else "Enable"
+
+    if messagebox.askyesno(action, f"Do you want to {action.lower()} {len(selected_items)} items?"):
+        changes = []
+        for name, status in selected_items:
+            if action == "Enable" and not status.enabled:
+                changes.append((name, True))
+            elif action == "Disable" and status.enabled and not is_protected((name, status)):
+                changes.append((name, False))
+
+        # One pass over the keys, one summary and one refresh for the whole selection
+        runner.submit(apply_registry_batch, changes, label="Enabling" if action == "Enable" else "Disabling",
+                      on_done=finish_batch, on_error=task_failed(action))
+
+def finish_batch(report):
+    if report.ok:
+        messagebox.showinfo("Success", report.summary())
+    else:
+        messagebox.showerror("Error", report.summary())
+
+    update_startup_list()
+
+def add_startup_item():
+    def save_item():
+        name = name_entry.get()
+        path = path_entry.get()
+        if name and path:
+            try:
+                with get_key_cache().key(HKEY_CURRENT_USER, RUN_PATH, KEY_ALL_ACCESS, create=True) as enabled_key:
+                    get_backend().set_value(enabled_key, name, REG_SZ, path)
+                snapshot_cache.invalidate(snapshot_cache.registry_source_id(HKEY_CURRENT_USER, RUN_PATH))
+                messagebox.showinfo("Success", f"'{name}' added to startup.")
+                update_startup_list()
+                add_window.destroy()
+            except Exception as e:
+                messagebox.showerror("Error", f"Error adding startup item: {e}")
+
+    add_window = tk.Toplevel(root)
+    add_window.title("Add Startup Item")
+
+    tk.Label(add_window, text="Name:").pack(padx=10, pady=5)
+    name_entry = tk.Entry(add_window)
+    name_entry.pack(padx=10, pady=5)
+
+    tk.Label(add_window, text="Path:").pack(padx=10, pady=5)
+    path_entry = tk.Entry(add_window)
+    path_entry.pack(padx=10, pady=5)
+
+    tk.Button(add_window, text="Save", command=save_item).pack(pady=10)
+    tk.Button(add_window, text="Cancel", command=add_window.destroy).pack(pady=5)
+
+def export_startup_list():
+    try:
+        # Path to the CSV file inside the 'exports' folder
+        file_path = os.path.join("exports", "startup_items.csv")
+
+        # Rows come straight from the registry and startup folder, not from the listbox
+        count = export_items(file_path, "csv", False)
+
+        # Notify user on success
+        messagebox.showinfo("Success", f"{count} startup items exported to {file_path}")
+
+    except Exception as e:
+        messagebox.showerror("Error", f"Error exporting to CSV: {e}")
+
+def is_protected(key):
+    # Classified by the rules during the last refresh, without publishers
+    item = current_items.get(key)
+    if item is None:
+        return False
+    rules = get_rule_set()
+    if item.classification != Classification.PROTECTED and rules.uses_publishers:
+        from impact_utils import publisher_of
+        rules.classify_item(item, publisher_of(item))
+    return item.classification == Classification.PROTECTED
+
+def context_action(action):
+    selection = startup_view.selected_keys()
+    if not selection:
+        return
+    name, status = selection[0]
+
+    if action != "details" and is_protected(selection[0]):
+        messagebox.showwarning("Warning", f"'{name}' is a protected system item. Action may be restricted.")
+        return
+
+    if action == "enable" and not status.enabled:
+        enable_registry_item(name)
+    elif action == "disable" and status.enabled:
+        disable_registry_item(name)
+    elif action == "details":
+        show_details(name, status)
+    else:
+        messagebox.showinfo("Info", f"'{name}' is already {status}.")
+
+watcher = None
+
+def auto_refresh():
+    # Refresh only when a Run key or the Startup folder actually changes
+    global watcher
+    from startup_watcher import StartupWatcher
+    update_startup_list()
+    if watcher is None:
+        # The watcher thread hands the refresh to the runner, which runs it on the Tk thread
+        watcher = StartupWatcher(lambda: runner.post(update_startup_list))
+        runner.submit(watcher.start, label="Watching for changes", on_error=task_failed("Auto-refresh"))
+
+def task_failed(label, dialog=True):
+    # Refreshes only go to the status label, since one may fail again on every change
+    def show(error):
+        status_label.config(text=f"{label} failed: {error}")
+        if dialog:
+            messagebox.showerror("Error", f"{label} failed: {error}")
+    return show
+
+def show_busy(label):
+    status_label.config(text="Ready" if label is None else f"{label}...")
+
+def on_close():
+    if watcher is not None:
+        watcher.stop()
+    runner.shutdown()
+    root.destroy()
+
+def show_command_line(name):
+    try:
+        with get_key_cache().key(HKEY_CURRENT_USER, RUN_PATH, KEY_READ) as reg_key:
+            value, _ = get_backend().query_value(reg_key, name)
+        command_line = value.strip()
+
+        messagebox.showinfo("Command Line", f"Command line for '{name}': {command_line}")
+    except Exception as e:
+        messagebox.showerror("Error", f"Error retrieving command line: {e}")
+
+# GUI
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Startup Item Manager")
+
+    root.resizable(True, True)  # resizing
+    root.geometry("400x500")  # fixed size
+
+    root.columnconfigure(0, weight=1)
+    root.rowconfigure(2, weight=1)
+    # Search over names, commands and publishers, narrowing the list as you type
+    items_index = SearchIndex()
+    search_var = tk.StringVar()
+    search_var.trace_add("write", apply_search)
+    search_entry = ttk.Entry(root, textvariable=search_var)
+    search_entry.grid(row=0, column=0, columnspan=5, padx=10, pady=(10, 0), sticky="ew")
+    facets_label = ttk.Label(root, text="")
+    facets_label.grid(row=1, column=0, columnspan=5, padx=10, sticky="w")
+    startup_tree = ttk.Treeview(root)
+    startup_tree.grid(row=2, column=0, columnspan=4, padx=(10, 0), pady=10, sticky="nsew")
+    tree_scrollbar = ttk.Scrollbar(root, orient=tk.VERTICAL)
+    tree_scrollbar.grid(row=2, column=4, padx=(0, 10), pady=10, sticky="ns")
+    startup_view = VirtualTreeView(startup_tree, tree_scrollbar, height=20)
+    startup_tree.tag_configure("enabled", foreground="green")
+    startup_tree.tag_configure("disabled", foreground="red")
+    startup_tree.bind("<Double-Button-1>", on_item_click)
+    startup_tree.bind("<Button-3>", on_right_click)
+    startup_tree.bind("<Control-Button-1>", on_item_select, add="+")  # Ctrl + Click
+    startup_tree.bind("<Shift-Button-1>", on_item_select, add="+")  # Shift + Click
+
+    context_menu = tk.Menu(root, tearoff=0)
+    context_menu.add_command(label="Enable", command=lambda: context_action("enable"))
+    context_menu.add_command(label="Disable", command=lambda: context_action("disable"))
+    context_menu.add_separator()
+    context_menu.add_command(label="Details", command=lambda: context_action("details"))
+
+    # Add buttons with grid layout
+    update_button = tk.Button(root, text="Refresh", command=update_startup_list)
+    update_button.grid(row=3, column=0, padx=10, pady=5)
+
+    add_button = tk.Button(root, text="Add Startup Item", command=add_startup_item)
+    add_button.grid(row=4, column=0, padx=10, pady=5)
+
+    export_button = tk.Button(root, text="Export to CSV", command=export_startup_list)
+    export_button.grid(row=5, column=0, padx=10, pady=5)
+
+    auto_refresh_button = tk.Button(root, text="Auto-Refresh", command=auto_refresh)
+    auto_refresh_button.grid(row=6, column=0, padx=10, pady=5)
+
+    status_label = ttk.Label(root, text="Ready")
+    status_label.grid(row=7, column=0, columnspan=5, padx=10, pady=(0, 5), sticky="w")
+
+    runner = TaskRunner(root, on_busy=show_busy, idle_poll_ms=250)
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    update_startup_list()
+    root.mainloop()
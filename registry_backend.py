@@ -0,0 +1,361 @@
+import atexit
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import winreg
+except ImportError:  # Not on Windows
+    winreg = None
+
+# Mirror the winreg constants so callers never need winreg themselves
+if winreg is not None:
+    HKEY_CURRENT_USER = winreg.HKEY_CURRENT_USER
+    HKEY_LOCAL_MACHINE = winreg.HKEY_LOCAL_MACHINE
+    KEY_READ = winreg.KEY_READ
+    KEY_ALL_ACCESS = winreg.KEY_ALL_ACCESS
+    REG_SZ = winreg.REG_SZ
+else:
+    HKEY_CURRENT_USER = 0x80000001
+    HKEY_LOCAL_MACHINE = 0x80000002
+    KEY_READ = 0x20019
+    KEY_ALL_ACCESS = 0xF003F
+    REG_SZ = 1
+
+HIVE_NAMES = {
+    HKEY_CURRENT_USER: "HKCU",
+    HKEY_LOCAL_MACHINE: "HKLM",
+}
+
+class RegistryBackend:
+    """Operations the startup helpers need from the registry."""
+
+    def open_key(self, root, path, access=KEY_READ):
+        """Open an existing key, raising FileNotFoundError if it is missing."""
+        raise NotImplementedError
+
+    def create_key(self, root, path):
+        """Open a key for writing, creating it if needed."""
+        raise NotImplementedError
+
+    def close_key(self, key):
+        raise NotImplementedError
+
+    def enum_value(self, key, index):
+        """Return (name, value, type) for the value at index, or raise OSError past the end."""
+        raise NotImplementedError
+
+    def query_value(self, key, name):
+        """Return (value, type) for a named value, or raise FileNotFoundError."""
+        raise NotImplementedError
+
+    def set_value(self, key, name, value_type, value):
+        raise NotImplementedError
+
+    def delete_value(self, key, name):
+        """Delete a named value, or raise FileNotFoundError."""
+        raise NotImplementedError
+
+    def query_info_key(self, key):
+        """Return (subkey count, value count, last write time) like winreg.QueryInfoKey."""
+        raise NotImplementedError
+
+class WinregBackend(RegistryBackend):
+    """The real Windows registry."""
+
+    def open_key(self, root, path, access=KEY_READ):
+        return winreg.OpenKey(root, path, 0, access)
+
+    def create_key(self, root, path):
+        return winreg.CreateKey(root, path)
+
+    def close_key(self, key):
+        winreg.CloseKey(key)
+
+    def enum_value(self, key, index):
+        return winreg.EnumValue(key, index)
+
+    def query_value(self, key, name):
+        return winreg.QueryValueEx(key, name)
+
+    def set_value(self, key, name, value_type, value):
+        winreg.SetValueEx(key, name, 0, value_type, value)
+
+    def delete_value(self, key, name):
+        winreg.DeleteValue(key, name)
+
+    def query_info_key(self, key):
+        return winreg.QueryInfoKey(key)
+
+class MemoryKeyData:
+    """Values stored under one in-memory key, in insertion order."""
+
+    def __init__(self):
+        self.values = {}
+        self.last_write = time.time_ns()
+        self._names = None
+
+    def names(self):
+        # Cached so enumerating by index stays O(1) per value between writes
+        if self._names is None:
+            self._names = list(self.values)
+        return self._names
+
+    def changed(self):
+        self._names = None
+
+    def written(self):
+        self.last_write = max(time.time_ns(), self.last_write + 1)
+
+class MemoryKey:
+    """Handle returned by MemoryBackend, pointing at one key's data."""
+
+    def __init__(self, data, access):
+        self.data = data
+        self.access = access
+        self.closed = False
+
+    # winreg handles work as context managers, so these do too
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+class MemoryBackend(RegistryBackend):
+    """In-memory registry stand-in for profiling and load tests off Windows.
+
+    latency is slept on every call to imitate slow hives; it can be a number
+    of seconds or a dict mapping (root, path) to seconds.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.keys = {}
+        self.calls = 0
+        self._lock = threading.RLock()
+
+    def _wait(self, root=None, path=None):
+        with self._lock:
+            self.calls += 1
+        delay = self.latency
+        if isinstance(delay, dict):
+            delay = delay.get((root, path.lower() if path else path), 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def _data(self, root, path, create=False):
+        key = (root, path.lower())
+        if key not in self.keys:
+            if not create:
+                raise FileNotFoundError(f"Registry key not found: {path}")
+            self.keys[key] = MemoryKeyData()
+        return self.keys[key]
+
+    def open_key(self, root, path, access=KEY_READ):
+        self._wait(root, path)
+        with self._lock:
+            return MemoryKey(self._data(root, path), access)
+
+    def create_key(self, root, path):
+        self._wait(root, path)
+        with self._lock:
+            return MemoryKey(self._data(root, path, create=True), KEY_ALL_ACCESS)
+
+    def close_key(self, key):
+        key.closed = True
+
+    def enum_value(self, key, index):
+        self._wait()
+        with self._lock:
+            names = key.data.names()
+            if index >= len(names):
+                raise OSError("No more data is available")
+            name = names[index]
+            value, value_type = key.data.values[name]
+        return name, value, value_type
+
+    def query_value(self, key, name):
+        self._wait()
+        with self._lock:
+            if name not in key.data.values:
+                raise FileNotFoundError(f"Registry value not found: {name}")
+            return key.data.values[name]
+
+    def set_value(self, key, name, value_type, value):
+        self._wait()
+        if key.access != KEY_ALL_ACCESS:
+            raise PermissionError("Access is denied")
+        with self._lock:
+            if name not in key.data.values:
+                key.data.changed()
+            key.data.values[name] = (value, value_type)
+            key.data.written()
+
+    def delete_value(self, key, name):
+        self._wait()
+        if key.access != KEY_ALL_ACCESS:
+            raise PermissionError("Access is denied")
+        with self._lock:
+            if name not in key.data.values:
+                raise FileNotFoundError(f"Registry value not found: {name}")
+            del key.data.values[name]
+            key.data.changed()
+            key.data.written()
+
+    def query_info_key(self, key):
+        self._wait()
+        with self._lock:
+            return 0, len(key.data.values), key.data.last_write
+
+    def seed(self, paths, count, seed=0):
+        """Spread count REG_SZ values across the given (root, path, ...) entries."""
+        rng = random.Random(seed)
+        with self._lock:
+            for i in range(count):
+                root, path = paths[i % len(paths)][:2]
+                name = f"Item{i:06d}"
+                command = f"\"C:\\Program Files\\Vendor{rng.randrange(1000)}\\{name}.exe\" /background"
+                data = self._data(root, path, create=True)
+                data.values[name] = (command, REG_SZ)
+                data.changed()
+                data.written()
+
+class KeyCache:
+    """Pool of open key handles keyed by (hive, path, access mask).
+
+    Handles are shared and reference counted; ones nobody is using are closed
+    after max_idle seconds, and close_all() closes everything deterministically.
+    """
+
+    def __init__(self, backend, max_idle=30.0, max_size=16):
+        self.backend = backend
+        self.max_idle = max_idle
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = {}  # cache key -> [handle, users, last_used]
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "open": len(self._entries)}
+
+    def acquire(self, root, path, access=KEY_READ, create=False):
+        """Return an open handle, opening (or creating) the key on a miss. Pair with release()."""
+        cache_key = (root, path.lower(), access)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self.hits += 1
+                entry[1] += 1
+                entry[2] = time.monotonic()
+                return entry[0]
+            self.misses += 1
+        handle = self.backend.create_key(root, path) if create else self.backend.open_key(root, path, access)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                # Another thread opened it meanwhile; keep theirs
+                self.backend.close_key(handle)
+                entry[1] += 1
+                return entry[0]
+            self._entries[cache_key] = [handle, 1, time.monotonic()]
+            self._evict(force_size=True)
+        return handle
+
+    def release(self, root, path, access=KEY_READ, discard=False):
+        """Give a handle back; discard closes it now, e.g. after it stopped working."""
+        cache_key = (root, path.lower(), access)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            entry[2] = time.monotonic()
+            if discard and entry[1] <= 0:
+                del self._entries[cache_key]
+                self.evictions += 1
+                self.backend.close_key(entry[0])
+            self._schedule_sweep()
+
+    @contextmanager
+    def key(self, root, path, access=KEY_READ, create=False):
+        handle = self.acquire(root, path, access, create)
+        discard = False
+        try:
+            yield handle
+        except FileNotFoundError:
+            raise
+        except OSError:
+            discard = True
+            raise
+        finally:
+            self.release(root, path, access, discard)
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict()
+            self._timer = None
+            self._schedule_sweep()
+
+    def close_all(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            for handle, _, _ in self._entries.values():
+                self.backend.close_key(handle)
+            self._entries.clear()
+
+    def _evict(self, force_size=False):
+        now = time.monotonic()
+        idle = [k for k, (_, users, last_used) in self._entries.items() if users <= 0 and now - last_used >= self.max_idle]
+        if force_size and len(self._entries) - len(idle) > self.max_size:
+            # Over the size limit: also drop the least recently used unused handles
+            unused = sorted((e[2], k) for k, e in self._entries.items() if e[1] <= 0 and k not in idle)
+            idle += [k for _, k in unused[:len(self._entries) - len(idle) - self.max_size]]
+        for cache_key in idle:
+            handle = self._entries.pop(cache_key)[0]
+            self.evictions += 1
+            self.backend.close_key(handle)
+
+    def _schedule_sweep(self):
+        if self._timer is None and self._entries:
+            self._timer = threading.Timer(self.max_idle, self.evict_idle)
+            self._timer.daemon = True
+            self._timer.start()
+
+_backend = None
+_key_cache = None
+
+def get_backend():
+    """Return the active backend, defaulting to winreg when it is available."""
+    global _backend
+    if _backend is None:
+        _backend = WinregBackend() if winreg is not None else MemoryBackend()
+    return _backend
+
+def set_backend(backend):
+    """Swap the backend used by registry_utils and startup_folder_utils."""
+    global _backend
+    close_key_cache()
+    _backend = backend
+
+def get_key_cache():
+    """Return the key cache for the active backend."""
+    global _key_cache
+    if _key_cache is None or _key_cache.backend is not get_backend():
+        close_key_cache()
+        _key_cache = KeyCache(get_backend())
+    return _key_cache
+
+def close_key_cache():
+    global _key_cache
+    if _key_cache is not None:
+        _key_cache.close_all()
+        _key_cache = None
+
+atexit.register(close_key_cache)
@@ -1,321 +1,444 @@
-import tkinter as tk
-from tkinter import messagebox
-import winreg as reg
-import csv
-import os
-
-def get_full_startup_items():
-    """Get a comprehensive list of startup items like Task Manager (Enabled + Disabled, User + System, 64/32-bit)"""
-    startup_items = []
-
-    registry_paths = [
-        # Enabled
-        (reg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run", "Enabled (User)"),
-        (reg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Run", "Enabled (System - 64bit)"),
-        (reg.HKEY_LOCAL_MACHINE, r"Software\Wow6432Node\Microsoft\Windows\CurrentVersion\Run", "Enabled (System - 32bit)"),
-
-        # Disabled
-        (reg.HKEY_CURRENT_USER, r"Software\Microsoft\Shared Tools\MSConfig\startupfolder", "Disabled (Startup Folder)"),
-        (reg.HKEY_CURRENT_USER, r"Software\Microsoft\Shared Tools\MSConfig\startupreg", "Disabled (Registry - User)"),
-        (reg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Shared Tools\MSConfig\startupreg", "Disabled (Registry - System)"),
-    ]
+import queue
+import sys
+import threading
+import time
+from registry_backend import get_backend, get_key_cache, HIVE_NAMES, HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, KEY_ALL_ACCESS, REG_SZ
+from timing_utils import timed
+from startup_item import StartupItem, Status, Source
+import snapshot_cache
+
+RUN_PATH = r"Software\Microsoft\Windows\CurrentVersion\Run"
+DISABLED_PATH = r"Software\Microsoft\Shared Tools\MSConfig\startupfolder"
+
+# Every key get_full_startup_items reads, with the status its values get
+REGISTRY_PATHS = [
+    # Enabled
+    (HKEY_CURRENT_USER, RUN_PATH, Status.ENABLED_USER),
+    (HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Run", Status.ENABLED_SYSTEM_64),
+    (HKEY_LOCAL_MACHINE, r"Software\Wow6432Node\Microsoft\Windows\CurrentVersion\Run", Status.ENABLED_SYSTEM_32),
+
+    # Disabled
+    (HKEY_CURRENT_USER, DISABLED_PATH, Status.DISABLED_STARTUP_FOLDER),
+    (HKEY_CURRENT_USER, r"Software\Microsoft\Shared Tools\MSConfig\startupreg", Status.DISABLED_REGISTRY_USER),
+    (HKEY_LOCAL_MACHINE, r"Software\Microsoft\Shared Tools\MSConfig\startupreg", Status.DISABLED_REGISTRY_SYSTEM),
+]
+
+# status -> (root, path) of the key holding values with that status
+STATUS_PATHS = {status: (root, path) for root, path, status in REGISTRY_PATHS}
+
+# Each key is read on its own daemon thread; a key that takes longer than
+# HIVE_TIMEOUT seconds is reported as timed out with whatever it had read
+HIVE_TIMEOUT = 5.0
+# Values a key reader hands over at a time, and batches it may get ahead of the caller
+READ_BATCH = 256
+MAX_QUEUED_BATCHES = 64
+
+# Per-hive results of the most recent get_full_startup_items call
+last_hive_report = []
+
+def select_paths(hive=None, status=None):
+    """REGISTRY_PATHS entries for a hive ("HKCU"/"HKLM") and status ("enabled"/"disabled"), None meaning any."""
+    paths = []
+    for root, path, path_status in REGISTRY_PATHS:
+        if hive is not None and HIVE_NAMES.get(root) != hive.upper():
+            continue
+        if status is not None and path_status.enabled != (status.lower() == "enabled"):
+            continue
+        paths.append((root, path, path_status))
+    return paths
 
-    for root, path, status in registry_paths:
+def iter_key_values(backend, root, path):
+    """Yield (name, value) for each value under one key. Raises FileNotFoundError if it is missing."""
+    registry_key = backend.open_key(root, path)
+    try:
+        i = 0
+        while True:
+            try:
+                name, value, _ = backend.enum_value(registry_key, i)
+            except OSError:
+                break
+            yield name, value
+            i += 1
+    finally:
+        backend.close_key(registry_key)
+
+# (root, path) -> _KeyReader still reading that key
+STILL_READING = "still being read after an earlier timeout"
+_readers = {}
+_readers_lock = threading.Lock()
+
+class _KeyReader:
+    """Reads one key on a daemon thread and hands its StartupItems over in batches.
+
+    A reader stuck in a registry call can't keep the process from exiting,
+    and no second reader is started for its key until it finishes, so a
+    hung key costs one thread however many refreshes time out on it.
+    """
+
+    def __init__(self, backend, root, path, status, max_batches=0):
+        self.args = (backend, root, path, status)
+        self.batches = queue.Queue(max_batches)
+        self.cancel = threading.Event()
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.thread = threading.Thread(target=self._run, name=f"hive-{HIVE_NAMES.get(root, root)}", daemon=True)
+
+    @classmethod
+    def start(cls, backend, root, path, status, max_batches=0):
+        """A running reader for the key, or None while an earlier one is still reading it.
+
+        max_batches bounds how far it reads ahead of the caller; 0 means no limit.
+        """
+        with _readers_lock:
+            if (root, path) in _readers:
+                return None
+            reader = _readers[(root, path)] = cls(backend, root, path, status, max_batches)
+        reader.thread.start()
+        return reader
+
+    def _put(self, message):
+        while not self.cancel.is_set():
+            try:
+                self.batches.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        backend, root, path, status = self.args
+        batch, error = [], None
         try:
-            registry_key = reg.OpenKey(root, path)
-            i = 0
-            while True:
-                try:
-                    name, value, _ = reg.EnumValue(registry_key, i)
-                    startup_items.append((name, value, status))
-                    i += 1
-                except OSError:
-                    break
-            reg.CloseKey(registry_key)
+            values = iter_key_values(backend, root, path)
+            try:
+                for name, value in values:
+                    if self.cancel.is_set():
+                        break
+                    batch.append(StartupItem(name, value, Source.REGISTRY, status))
+                    if len(batch) >= READ_BATCH:
+                        self._put((batch, False, None))
+                        batch = []
+            finally:
+                values.close()
         except FileNotFoundError:
-            continue
+            error = "missing"
         except Exception as e:
-            print(f"Error reading {path}: {e}")
+            error = str(e)
+        finally:
+            self.seconds = time.perf_counter() - self.started
+            with _readers_lock:
+                _readers.pop((root, path), None)
+            self._put((batch, True, error))
+
+    def take(self, entry, deadline=None, idle_timeout=None):
+        """Yield the key's items as they arrive, filling in entry's count, seconds, timed_out and error.
+
+        Stops at deadline (a perf_counter time) or when no batch arrives for
+        idle_timeout seconds, keeping what was read so far, and tells the
+        thread to stop at its next value.
+        """
+        finished = False
+        try:
+            while not finished:
+                waits = [limit for limit in (idle_timeout, None if deadline is None else deadline - time.perf_counter())
+                         if limit is not None]
+                try:
+                    batch, finished, error = self.batches.get(timeout=max(0.0, min(waits)) if waits else None)
+                except queue.Empty:
+                    entry["timed_out"] = True
+                    break
+                entry["count"] += len(batch)
+                if finished:
+                    entry["error"] = error
+                yield from batch
+        finally:
+            self.cancel.set()
+            entry["seconds"] = self.seconds if finished else time.perf_counter() - self.started
+
+def _hive_entry(root, path, status):
+    return {"hive": HIVE_NAMES.get(root, str(root)), "path": path, "status": status.label,
+            "count": 0, "seconds": 0.0, "timed_out": False, "error": None}
+
+def _warn(entry):
+    # stderr, so a problem with one key never ends up in --json output
+    if entry["timed_out"] and entry["error"]:
+        print(f"Skipped {entry['path']}: {entry['error']}", file=sys.stderr)
+    elif entry["timed_out"]:
+        print(f"Timed out reading {entry['path']} after {entry['seconds']:.2f}s, showing {entry['count']} items",
+              file=sys.stderr)
+    elif entry["error"] not in (None, "missing"):
+        print(f"Error reading {entry['path']}: {entry['error']}", file=sys.stderr)
+
+def enumerate_hives(timeout=HIVE_TIMEOUT, paths=None):
+    """Read all REGISTRY_PATHS (or the given subset) concurrently and merge the results in that order.
+
+    Returns (items, report) where report has one dict per key with its hive,
+    path, status, item count, wall time in seconds, timed_out flag and error.
+    A key still being read by an earlier call that timed out counts as timed out.
+    """
+    backend = get_backend()
+    paths = REGISTRY_PATHS if paths is None else paths
+    deadline = time.perf_counter() + timeout if timeout is not None else None
+    readers = [(root, path, status, _KeyReader.start(backend, root, path, status)) for root, path, status in paths]
 
+    startup_items = []
+    report = []
+    for root, path, status, reader in readers:
+        entry = _hive_entry(root, path, status)
+        if reader is None:
+            entry["timed_out"], entry["error"] = True, STILL_READING
+        else:
+            startup_items.extend(reader.take(entry, deadline))
+        _warn(entry)
+        report.append(entry)
+    return startup_items, report
+
+@timed
+def get_full_startup_items(timeout=HIVE_TIMEOUT):
+    """Get a comprehensive list of startup items like Task Manager (Enabled + Disabled, User + System, 64/32-bit) as StartupItems"""
+    global last_hive_report
+    startup_items, last_hive_report = enumerate_hives(timeout)
     return startup_items
 
-def enable_registry_item(name):
-    try:
-        # Get the disabled value
-        disabled_key = reg.OpenKey(reg.HKEY_CURRENT_USER, r"Software\Microsoft\Shared Tools\MSConfig\startupfolder", 0, reg.KEY_ALL_ACCESS)
-        value, _, _ = reg.QueryValueEx(disabled_key, name)
-        # Write to enabled
-        enabled_key = reg.OpenKey(reg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run", 0, reg.KEY_ALL_ACCESS)
-        reg.SetValueEx(enabled_key, name, 0, reg.REG_SZ, value)
-        # Delete from disabled
-        reg.DeleteValue(disabled_key, name)
-        reg.CloseKey(enabled_key)
-        reg.CloseKey(disabled_key)
-        messagebox.showinfo("Success", f"'{name}' has been enabled.")
-    except FileNotFoundError:
-        messagebox.showerror("Error", f"'{name}' not found in disabled startup items.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Error enabling startup item: {e}")
-
-def disable_registry_item(name):
-    try:
-        # Get the enabled value
-        enabled_key = reg.OpenKey(reg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run", 0, reg.KEY_ALL_ACCESS)
-        value, _, _ = reg.QueryValueEx(enabled_key, name)
-        # Write to disabled
-        disabled_key = reg.CreateKey(reg.HKEY_CURRENT_USER, r"Software\Microsoft\Shared Tools\MSConfig\startupfolder")
-        reg.SetValueEx(disabled_key, name, 0, reg.REG_SZ, value)
-        # Delete from enabled
-        reg.DeleteValue(enabled_key, name)
-        reg.CloseKey(enabled_key)
-        reg.CloseKey(disabled_key)
-        messagebox.showinfo("Success", f"'{name}' has been disabled.")
-    except FileNotFoundError:
-        messagebox.showerror("Error", f"'{name}' not found in enabled startup items.")
-    except Exception as e:
-        messagebox.showerror("Error", f"Error disabling startup item: {e}")
-
-def update_startup_list():
-    startup_listbox.delete(0, tk.END)
-    registry_items = get_full_startup_items()
-
-    # Sort: Enabled first, then Disabled, then Unknown
-    registry_items.sort(key=lambda item: (0 if "Enabled" in item[2] else 1 if "Disabled" in item[2] else 2, item[0].lower()))
-
-    for name, value, status in registry_items:
-        startup_listbox.insert(tk.END, f"{name} | {status}")
-
-        # Coloring
-        if "Enabled" in status:
-            startup_listbox.itemconfig(tk.END, {'fg': 'green'})
-        elif "Disabled" in status:
-            startup_listbox.itemconfig(tk.END, {'fg': 'red'})
-        else:
-            startup_listbox.itemconfig(tk.END, {'fg': 'gray'})
-
-def on_item_click(event):
-    selection = startup_listbox.curselection()
-    if not selection:
-        return
-    index = selection[0]
-    item = startup_listbox.get(index)
-    
-    # Extract name and status
-    if " | " not in item:
-        messagebox.showerror("Error", "Invalid item format.")
-        return
-
-    name, status = item.split(" | ", 1)
-
-    if "Enabled" in status:
-        if messagebox.askyesno("Disable", f"Do you want to disable '{name}'?"):
-            disable_registry_item(name)
-    elif "Disabled" in status:
-        if messagebox.askyesno("Enable", f"Do you want to enable '{name}'?"):
-            enable_registry_item(name)
-    else:
-        messagebox.showwarning("Unknown Status", f"Unknown status for '{name}': {status}")
-
-    update_startup_list()
-
-def on_right_click(event):
+def iter_registry_items(hive=None, status=None, prefix=None, timeout=HIVE_TIMEOUT):
+    """Yield StartupItems as they are read, key by key.
+
+    Keys outside the hive/status filters are never opened, and values not
+    starting with prefix (case-insensitive) are skipped. Only a few batches
+    are read ahead, so memory stays flat and a caller can stop as soon as it
+    has enough. A key that yields nothing for timeout seconds is given up on
+    with a warning, keeping what it had read.
+    """
+    backend = get_backend()
+    prefix = prefix.lower() if prefix else None
+    for root, path, path_status in select_paths(hive, status):
+        entry = _hive_entry(root, path, path_status)
+        reader = _KeyReader.start(backend, root, path, path_status, MAX_QUEUED_BATCHES)
+        if reader is None:
+            entry["timed_out"], entry["error"] = True, STILL_READING
+            _warn(entry)
+            continue
+        items = reader.take(entry, idle_timeout=timeout)
+        try:
+            for item in items:
+                if prefix is None or item.name.lower().startswith(prefix):
+                    yield item
+        finally:
+            items.close()
+        _warn(entry)
+
+def find_registry_item(name, hive=None, status=None):
+    """Look one value up by name with a single QueryValueEx per key; no enumeration.
+
+    Returns a StartupItem from the first key holding it, or None.
+    """
+    backend = get_backend()
+    for root, path, path_status in select_paths(hive, status):
+        try:
+            registry_key = backend.open_key(root, path)
+        except FileNotFoundError:
+            continue
+        try:
+            value, _ = backend.query_value(registry_key, name)
+        except FileNotFoundError:
+            continue
+        finally:
+            backend.close_key(registry_key)
+        return StartupItem(name, value, Source.REGISTRY, path_status)
+    return None
+
+def hive_problems(report=None):
+    """Keys that couldn't be read in full, as "HIVE\\path (timed out)" or with the error. Missing keys are fine."""
+    return [f"{entry['hive']}\\{entry['path']} ({'timed out' if entry['timed_out'] else entry['error']})"
+            for entry in (last_hive_report if report is None else report)
+            if entry["timed_out"] or entry["error"] not in (None, "missing")]
+
+def format_hive_report(report=None):
+    """One line per key with its wall time, for spotting the slow hive."""
+    lines = []
+    for entry in last_hive_report if report is None else report:
+        state = "TIMED OUT" if entry["timed_out"] else entry["error"] or ("cached" if entry.get("cached") else "ok")
+        lines.append(f"{entry['seconds'] * 1000:8.1f} ms  {entry['count']:6d} items  {state:<9}  {entry['hive']}\\{entry['path']}")
+    return "\n".join(lines)
+
+@timed
+def move_registry_value(name, source_path, target_path, root=HKEY_CURRENT_USER):
+    """Move a value from one key to another, creating the target key if needed."""
+    backend = get_backend()
+    cache = get_key_cache()
+    with cache.key(root, source_path, KEY_ALL_ACCESS) as source_key:
+        value, _ = backend.query_value(source_key, name)
+        with cache.key(root, target_path, KEY_ALL_ACCESS, create=True) as target_key:
+            backend.set_value(target_key, name, REG_SZ, value)
+        backend.delete_value(source_key, name)
+    snapshot_cache.invalidate(snapshot_cache.registry_source_id(root, source_path),
+                              snapshot_cache.registry_source_id(root, target_path))
+
+class BatchReport:
+    """Outcome of apply_registry_batch."""
+
+    def __init__(self):
+        self.enabled = []
+        self.disabled = []
+        self.changed = []  # Names written or deleted by apply_registry_changes
+        self.skipped = []  # (name, reason) for items not found where expected
+        self.failed = None  # (name, error) that aborted the batch
+        self.cancelled = False
+        self.rolled_back = False  # True only if every change was undone
+        self.rollback_errors = []  # (name, error) for changes that couldn't be undone
+
+    @property
+    def ok(self):
+        return self.failed is None and not self.cancelled
+
+    def summary(self):
+        if self.rollback_errors:
+            cause = f"'{self.failed[0]}' failed ({self.failed[1]})" if self.failed is not None else "Cancelled"
+            return "\n".join([f"{cause}, and these changes could not be undone:"] +
+                             [f"  '{name}': {error}" for name, error in self.rollback_errors])
+        if self.failed is not None:
+            name, error = self.failed
+            return f"Nothing was changed: '{name}' failed ({error}) and the batch was rolled back."
+        if self.cancelled:
+            return "Cancelled; all changes were rolled back."
+        lines = [f"{len(self.enabled)} enabled, {len(self.disabled)} disabled."]
+        if self.changed:
+            lines.append(f"{len(self.changed)} registry values changed.")
+        lines += [f"Skipped '{name}': {reason}" for name, reason in self.skipped]
+        return "\n".join(lines)
+
+@timed
+def apply_registry_batch(changes, root=HKEY_CURRENT_USER, progress=None, cancelled=None):
+    """Enable or disable many items with each key opened once, all or nothing.
+
+    changes is a list of (name, enable) pairs. Items that aren't in the source
+    key are skipped. If any move fails, or cancelled() returns True, the moves
+    already made are undone in reverse order. progress(done, total) is called
+    after each item.
+    """
+    report = BatchReport()
+    if not changes:
+        # Nothing to move, so don't open (or create) the keys for writing
+        return report
+    backend = get_backend()
+    cache = get_key_cache()
+    keys = {}
+    applied = []  # (name, source, target, value, value_type) in the order they were moved
     try:
-        startup_listbox.selection_clear(0, tk.END)
-        startup_listbox.selection_set(startup_listbox.nearest(event.y))
-        context_menu.tk_popup(event.x_root, event.y_root)
-    finally:
-        context_menu.grab_release()
-
-def context_action(action):
-    selection = startup_listbox.curselection()
-    if not selection:
-        return
-    index = selection[0]
-    item = startup_listbox.get(index)
-    name, status = item.split(" | ", 1)
-    name = name.strip()
-
-    if action == "enable" and "Disabled" in status:
-        enable_registry_item(name)
-    elif action == "disable" and "Enabled" in status:
-        disable_registry_item(name)
-    elif action == "details":
-        # show registry info
-        show_details(name, status)
-    else:
-        messagebox.showinfo("Info", f"'{name}' is already {status}.")
-
-    update_startup_list()
-
-def show_details(name, status):
-    detail_text = f"Name: {name}\nStatus: {status}\n\n(Registry path varies by status)"
-    messagebox.showinfo("Details", detail_text)
-
-def on_item_select(event):
-    # When the user selects multiple items by holding 'Ctrl' or 'Shift'
-    selection = startup_listbox.curselection()
-    selected_items = [startup_listbox.get(i) for i in selection]
-
-    if not selected_items:
-        return
-
-    action = "Enable" if "(Disabled)" in selected_items[0] else "Disable"
-
-    if messagebox.askyesno(action, f"Do you want to {action.lower()} {len(selected_items)} items?"):
-        for item in selected_items:
-            name, status = item.split(" | ", 1)
-            name = name.strip()
-
-            if action == "Enable" and "Disabled" in status:
-                enable_registry_item(name)
-            elif action == "Disable" and "Enabled" in status:
-                disable_registry_item(name)
-
-        update_startup_list()
-
-def add_startup_item():
-    def save_item():
-        name = name_entry.get()
-        path = path_entry.get()
-        if name and path:
+        for path in (RUN_PATH, DISABLED_PATH):
+            keys[path] = cache.acquire(root, path, KEY_ALL_ACCESS, create=True)
+        for index, (name, enable) in enumerate(changes):
+            if cancelled is not None and cancelled():
+                report.cancelled = True
+                break
+            source, target = (DISABLED_PATH, RUN_PATH) if enable else (RUN_PATH, DISABLED_PATH)
             try:
-                enabled_key = reg.OpenKey(reg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run", 0, reg.KEY_ALL_ACCESS)
-                reg.SetValueEx(enabled_key, name, 0, reg.REG_SZ, path)
-                reg.CloseKey(enabled_key)
-                messagebox.showinfo("Success", f"'{name}' added to startup.")
-                update_startup_list()
-                add_window.destroy()
+                value, value_type = backend.query_value(keys[source], name)
+            except FileNotFoundError:
+                report.skipped.append((name, "not found in disabled startup items" if enable else "not found in enabled startup items"))
+                continue
+            try:
+                backend.set_value(keys[target], name, value_type, value)
+                applied.append((name, source, target, value, value_type))
+                backend.delete_value(keys[source], name)
             except Exception as e:
-                messagebox.showerror("Error", f"Error adding startup item: {e}")
-
-    add_window = tk.Toplevel(root)
-    add_window.title("Add Startup Item")
-
-    tk.Label(add_window, text="Name:").pack(padx=10, pady=5)
-    name_entry = tk.Entry(add_window)
-    name_entry.pack(padx=10, pady=5)
-
-    tk.Label(add_window, text="Path:").pack(padx=10, pady=5)
-    path_entry = tk.Entry(add_window)
-    path_entry.pack(padx=10, pady=5)
-
-    tk.Button(add_window, text="Save", command=save_item).pack(pady=10)
-    tk.Button(add_window, text="Cancel", command=add_window.destroy).pack(pady=5)
-
-def export_startup_list():
+                report.failed = (name, e)
+                break
+            (report.enabled if enable else report.disabled).append(name)
+            if progress is not None:
+                progress(index + 1, len(changes))
+
+        if not report.ok:
+            report.rollback_errors = _roll_back(backend, keys, applied)
+            report.rolled_back = not report.rollback_errors
+            report.enabled, report.disabled = [], []
+    finally:
+        for path in keys:
+            cache.release(root, path, KEY_ALL_ACCESS)
+        if applied:
+            snapshot_cache.invalidate(*(snapshot_cache.registry_source_id(root, path) for path in keys))
+    return report
+
+def _roll_back(backend, keys, applied):
+    """Undo applied moves, newest first. Returns (name, error) for each that couldn't be undone."""
+    errors = []
+    for name, source, target, value, value_type in reversed(applied):
+        try:
+            backend.set_value(keys[source], name, value_type, value)
+            backend.delete_value(keys[target], name)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            errors.append((name, str(e)))
+    return errors
+
+@timed
+def apply_registry_changes(operations, progress=None, cancelled=None):
+    """Write and delete values across any keys, all or nothing.
+
+    operations is a list of ("set", root, path, name, value) and
+    ("delete", root, path, name, None) tuples, applied in order with each key
+    opened once. Deleting a value that is already gone is skipped. The prior
+    value of everything touched is recorded first, so a failure or
+    cancelled() returning True puts every key back as it was.
+    """
+    backend = get_backend()
+    cache = get_key_cache()
+    report = BatchReport()
+    keys = {}
+    undo = []  # (key, name, previous value and type or None) in the order they were changed
+    touched = set()
     try:
-        # Ensure the 'exports' folder exists
-        exports_folder = "exports"
-        if not os.path.exists(exports_folder):
-            os.makedirs(exports_folder)  # Create the folder if it doesn't exist
-
-        # Path to the CSV file inside the 'exports' folder
-        file_path = os.path.join(exports_folder, "startup_items.csv")
-
-        # Open the file for writing
-        with open(file_path, "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Name", "Path", "Status"])
-
-            for item in startup_listbox.get(0, tk.END):
-                parts = item.split(" | ")
-                
-                # Ensure the item has at least name and status
-                if len(parts) >= 2:
-                    name = parts[0].strip()
-                    status = parts[1].strip()
-
-                    # If path is missing, leave it as an empty string
-                    path = ""  # Modify as needed if you want to gather path information
-
-                    # Write the row to the CSV file
-                    writer.writerow([name, path, status])
+        for index, (kind, root, path, name, value) in enumerate(operations):
+            if cancelled is not None and cancelled():
+                report.cancelled = True
+                break
+            try:
+                if (root, path) not in keys:
+                    keys[(root, path)] = cache.acquire(root, path, KEY_ALL_ACCESS, create=True)
+                key = keys[(root, path)]
+                try:
+                    previous = backend.query_value(key, name)
+                except FileNotFoundError:
+                    previous = None
+                if kind == "delete" and previous is None:
+                    report.skipped.append((name, f"already removed from {HIVE_NAMES.get(root, root)}\\{path}"))
+                    continue
+                undo.append((key, name, previous))
+                if kind == "set":
+                    backend.set_value(key, name, previous[1] if previous else REG_SZ, value)
                 else:
-                    print(f"Skipping invalid item: {item}")
-
-        # Notify user on success
-        messagebox.showinfo("Success", f"Startup items exported to {file_path}")
-
-    except Exception as e:
-        messagebox.showerror("Error", f"Error exporting to CSV: {e}")
-
-def is_critical_system_item(name):
-    critical_items = [
-        "Defender", "Windows Defender", "nvtray", "spoolsv", "explorer", "svchost"
-    ]
-    return any(critical_item in name for critical_item in critical_items)
-
-def context_action(action):
-    selection = startup_listbox.curselection()
-    if not selection:
-        return
-    index = selection[0]
-    item = startup_listbox.get(index)
-    name, status = item.split(" | ", 1)
-    name = name.strip()
-
-    if is_critical_system_item(name):
-        messagebox.showwarning("Warning", f"'{name}' is a critical system item. Action may be restricted.")
-        return
-
-    if action == "enable" and "Disabled" in status:
-        enable_registry_item(name)
-    elif action == "disable" and "Enabled" in status:
-        disable_registry_item(name)
-    elif action == "details":
-        show_details(name, status)
-    else:
-        messagebox.showinfo("Info", f"'{name}' is already {status}.")
-
-    update_startup_list()
-
-def auto_refresh():
-    update_startup_list()
-    root.after(60000, auto_refresh)  # Refresh every 60 seconds
-
-def show_command_line(name):
-    try:
-        reg_key = reg.OpenKey(reg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run", 0, reg.KEY_READ)
-        value, _, _ = reg.QueryValueEx(reg_key, name)
-        command_line = value.strip()
-        reg.CloseKey(reg_key)
-
-        messagebox.showinfo("Command Line", f"Command line for '{name}': {command_line}")
-    except Exception as e:
-        messagebox.showerror("Error", f"Error retrieving command line: {e}")
-
-# GUI
-root = tk.Tk()
-root.title("Startup Item Manager")
-
-root.resizable(True, True)  # resizing
-root.geometry("400x500")  # fixed size
-
-startup_listbox = tk.Listbox(root, width=60, height=20)
-startup_listbox.grid(row=0, column=0, columnspan=4, padx=10, pady=10)
-startup_listbox.bind("<Double-Button-1>", on_item_click)
-startup_listbox.bind("<Button-3>", on_right_click)
-startup_listbox.bind("<Control-Button-1>", on_item_select)  # Ctrl + Click
-startup_listbox.bind("<Shift-Button-1>", on_item_select)  # Shift + Click
-
-context_menu = tk.Menu(root, tearoff=0)
-context_menu.add_command(label="Enable", command=lambda: context_action("enable"))
-context_menu.add_command(label="Disable", command=lambda: context_action("disable"))
-context_menu.add_separator()
-context_menu.add_command(label="Details", command=lambda: context_action("details"))
-
-# Add buttons with grid layout
-update_button = tk.Button(root, text="Refresh", command=update_startup_list)
-update_button.grid(row=1, column=0, padx=10, pady=5)
-
-add_button = tk.Button(root, text="Add Startup Item", command=add_startup_item)
-add_button.grid(row=2, column=0, padx=10, pady=5)
-
-export_button = tk.Button(root, text="Export to CSV", command=export_startup_list)
-export_button.grid(row=3, column=0, padx=10, pady=5)
-
-auto_refresh_button = tk.Button(root, text="Auto-Refresh (1 min)", command=auto_refresh)
-auto_refresh_button.grid(row=4, column=0, padx=10, pady=5)
-
-update_startup_list()
-root.mainloop()
+                    backend.delete_value(key, name)
+            except Exception as e:
+                report.failed = (name, e)
+                break
+            if name not in touched:
+                touched.add(name)
+                report.changed.append(name)
+            if progress is not None:
+                progress(index + 1, len(operations))
+
+        if not report.ok:
+            report.rollback_errors = _undo_changes(backend, undo)
+            report.rolled_back = not report.rollback_errors
+            report.changed = []
+    finally:
+        for root, path in keys:
+            cache.release(root, path, KEY_ALL_ACCESS)
+        if undo:
+            snapshot_cache.invalidate(*(snapshot_cache.registry_source_id(root, path) for root, path in keys))
+    return report
+
+def _undo_changes(backend, undo):
+    """Put back the previous values, newest first. Returns (name, error) for each that couldn't be put back."""
+    errors = []
+    for key, name, previous in reversed(undo):
+        try:
+            if previous is None:
+                backend.delete_value(key, name)
+            else:
+                backend.set_value(key, name, previous[1], previous[0])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            errors.append((name, str(e)))
+    return errors
@@ -0,0 +1,207 @@
+from registry_utils import STATUS_PATHS, apply_registry_changes
+from snapshot_utils import take_snapshot, REGISTRY_SOURCE, FOLDER_SOURCE
+from startup_folder_utils import disable_startup_file, restore_disabled_startup_file
+from backup_utils import normalize_item
+from startup_item import StartupItem, Status
+from timing_utils import timed
+
+class RestorePlan:
+    """The smallest set of changes that turns the live startup items into a backup.
+
+    Each action is (kind, item, current): kind is "add", "remove", "enable",
+    "disable", "move" or "change", item the StartupItem as it should end up
+    (None for a removal) and current the live StartupItem (None for an add).
+    Changes that can't be made are listed in skipped as (name, reason).
+    """
+
+    def __init__(self):
+        self.actions = []
+        self.skipped = []
+
+    def __len__(self):
+        return len(self.actions)
+
+    def add(self, kind, item, current=None):
+        self.actions.append((kind, item, current))
+
+    def registry_operations(self):
+        """("set"/"delete", root, path, name, value) tuples for apply_registry_changes."""
+        operations = []
+        for kind, item, current in self.actions:
+            if (item or current).source != REGISTRY_SOURCE:
+                continue
+            if kind == "remove":
+                operations.append(("delete", *STATUS_PATHS[current.status], current.name, None))
+                continue
+            # Write the target first so a failure never leaves the item missing from both keys
+            operations.append(("set", *STATUS_PATHS[item.status], item.name, item.command))
+            if kind in ("enable", "disable", "move"):
+                operations.append(("delete", *STATUS_PATHS[current.status], current.name, None))
+        return operations
+
+    def folder_moves(self):
+        """(name, enable) for startup folder files that change state."""
+        return [(item.name, kind == "enable") for kind, item, current in self.actions
+                if item is not None and item.source == FOLDER_SOURCE]
+
+    def to_dicts(self):
+        """Actions as plain dicts, for JSON output."""
+        return [{"action": kind, "name": (item or current).name, "source": str((item or current).source),
+                 "status": str(item.status) if item else None, "command": item.command if item else None,
+                 "previous_status": str(current.status) if current else None,
+                 "previous_command": current.command if current else None}
+                for kind, item, current in self.actions]
+
+    def preview(self):
+        """One readable line per change, for dry runs and confirmation dialogs."""
+        lines = []
+        for kind, item, current in self.actions:
+            if kind == "add":
+                lines.append(f"add {item.name} ({item.status}): {item.command}")
+            elif kind == "remove":
+                lines.append(f"remove {current.name} ({current.status})")
+            elif kind == "change":
+                lines.append(f"change {item.name}: {current.command} -> {item.command}")
+            else:
+                lines.append(f"{kind} {item.name} ({current.status} -> {item.status})")
+        lines += [f"skip {name}: {reason}" for name, reason in self.skipped]
+        return lines
+
+def _as_item(item):
+    if isinstance(item, StartupItem):
+        return item
+    return StartupItem.from_dict(normalize_item(item))
+
+def _hive(status):
+    return STATUS_PATHS[status][0] if status in STATUS_PATHS else None
+
+def _match_live(backup, live_items):
+    """Pair each backup item with the live item it describes, or None.
+
+    A name can be in several Run keys at once, so an item first takes the
+    live item in the same place (name, source and status). What is left is
+    paired by name and source, preferring the same hive, so an item that was
+    only enabled, disabled or moved since the backup is still found. Each
+    live item is used at most once. Returns (pairs, live items left over).
+    """
+    live = {}
+    for item in live_items:
+        live.setdefault((item.name, item.source, item.status), item)
+    used = set()
+    pairs = []
+    for item in backup:
+        place = (item.name, item.source, item.status)
+        if place in live and place not in used:
+            used.add(place)
+            pairs.append([item, live[place]])
+        else:
+            pairs.append([item, None])
+    leftovers = {}
+    for place, current in live.items():
+        if place not in used:
+            leftovers.setdefault((current.name, current.source), []).append(current)
+    for pair in pairs:
+        item = pair[0]
+        candidates = leftovers.get((item.name, item.source)) if pair[1] is None else None
+        if candidates:
+            same_hive = [current for current in candidates if _hive(current.status) == _hive(item.status)]
+            pair[1] = (same_hive or candidates)[0]
+            candidates.remove(pair[1])
+    left = [current for candidates in leftovers.values() for current in candidates]
+    return pairs, left
+
+@timed
+def plan_restore(backup_items, live_items=None, remove_new=True):
+    """Diff backup items against the live items (a fresh snapshot by default).
+
+    Items are matched by name, source and status, then by name and source
+    (see _match_live); the first of several backup items in the same place
+    wins. Backups written before sources were recorded take the source of
+    the live item with that name. Live items the backup doesn't have are
+    removed from the registry, and startup folder files among them are
+    disabled rather than deleted, unless remove_new is False.
+    """
+    if live_items is None:
+        live_items = take_snapshot().items
+    live_items = [_as_item(item) for item in live_items]
+    live_sources = {}
+    for item in live_items:
+        live_sources.setdefault(item.name, item.source)
+
+    backup = []
+    places = set()
+    for item in backup_items:
+        item = _as_item(item)
+        if item.source is None:
+            item.source = live_sources.get(item.name, REGISTRY_SOURCE)
+            if item.source == FOLDER_SOURCE and item.status is not None:
+                item = StartupItem.from_dict(item.to_dict())  # Map a registry status onto the folder ones
+        place = (item.name, item.source, item.status)
+        if place in places:
+            continue
+        places.add(place)
+        backup.append(item)
+    pairs, left = _match_live(backup, live_items)
+
+    plan = RestorePlan()
+    for item, current in pairs:
+        if item.source == FOLDER_SOURCE:
+            if current is None:
+                plan.skipped.append((item.name, "startup folder files can't be recreated from a backup"))
+            elif item.status is not None and item.enabled != current.enabled:
+                plan.add("enable" if item.enabled else "disable", StartupItem(item.name, current.command, item.source, item.status), current)
+            continue
+
+        if item.status not in STATUS_PATHS:
+            plan.skipped.append((item.name, "unknown registry status"))
+        elif current is None:
+            if item.command:
+                plan.add("add", item)
+            else:
+                plan.skipped.append((item.name, "the backup has no command to restore"))
+        elif current.status != item.status:
+            if current.status not in STATUS_PATHS:
+                plan.skipped.append((item.name, f"unknown registry status '{current.status}'"))
+                continue
+            kind = "move" if item.enabled == current.enabled else ("enable" if item.enabled else "disable")
+            if not item.command:
+                item = StartupItem(item.name, current.command, item.source, item.status)
+            plan.add(kind, item, current)
+        elif item.command and current.command != item.command:
+            plan.add("change", item, current)
+
+    if remove_new:
+        for current in left:
+            if current.source == FOLDER_SOURCE:
+                if current.enabled:
+                    plan.add("disable", StartupItem(current.name, current.command, current.source, Status.DISABLED_FOLDER), current)
+            elif current.status in STATUS_PATHS:
+                plan.add("remove", None, current)
+    return plan
+
+@timed
+def apply_restore(plan, progress=None, cancelled=None):
+    """Apply a plan: registry changes as one all-or-nothing batch, then folder moves.
+
+    Folder files are only touched once the registry batch has succeeded.
+    Returns (report, failed) where failed lists folder files that couldn't be moved.
+    """
+    operations = plan.registry_operations()
+    moves = plan.folder_moves()
+    total = len(operations) + len(moves)
+    registry_progress = None if progress is None else lambda done, _: progress(done, total)
+    report = apply_registry_changes(operations, progress=registry_progress, cancelled=cancelled)
+    failed = []
+    if not report.ok:
+        return report, failed
+    for index, (name, enable) in enumerate(moves):
+        if cancelled is not None and cancelled():
+            break
+        ok = restore_disabled_startup_file(name) if enable else disable_startup_file(name)
+        if ok:
+            (report.enabled if enable else report.disabled).append(name)
+        else:
+            failed.append(name)
+        if progress is not None:
+            progress(len(operations) + index + 1, total)
+    return report, failed
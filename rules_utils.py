@@ -0,0 +1,258 @@
+import json
+import os
+import re
+import threading
+
+from startup_item import Classification, command_executable
+
+RULES_FILE = "assets/rules.json"
+RULE_KINDS = ("exact", "glob", "regex", "path", "publisher")
+# Classifications remembered per RuleSet before the memo starts over
+MEMO_SIZE = 100000
+CLASSES = {"protected": Classification.PROTECTED, "recommended_disable": Classification.RECOMMENDED_DISABLE}
+
+# Used when there is no rules file; the protected globs are the names the app has always refused to touch
+DEFAULT_RULES = [
+    {"kind": "glob", "pattern": "*Defender*", "class": "protected"},
+    {"kind": "glob", "pattern": "*nvtray*", "class": "protected"},
+    {"kind": "glob", "pattern": "*spoolsv*", "class": "protected"},
+    {"kind": "glob", "pattern": "*explorer*", "class": "protected"},
+    {"kind": "glob", "pattern": "*svchost*", "class": "protected"},
+    {"kind": "exact", "pattern": "SecurityHealth", "class": "protected"},
+    {"kind": "path", "pattern": "%SystemRoot%\\System32\\*", "class": "protected"},
+    {"kind": "glob", "pattern": "*Updater*", "class": "recommended_disable"},
+    {"kind": "exact", "pattern": "AdobeARM", "class": "recommended_disable"},
+    {"kind": "exact", "pattern": "iTunesHelper", "class": "recommended_disable"},
+    {"kind": "glob", "pattern": "Spotify*", "class": "recommended_disable"},
+    {"kind": "glob", "pattern": "Steam*", "class": "recommended_disable"},
+]
+
+_END = ""  # Trie key marking the end of a pattern
+_REGEX_META = set(".^$*+?{}[]\\|()")
+_GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+
+def _scope_flags(pattern):
+    """pattern with leading inline flags like (?i) scoped to it as (?i:...), so it can be combined with others."""
+    flags = ""
+    match = _GLOBAL_FLAGS.match(pattern)
+    while match:
+        flags += match.group(1)
+        pattern = pattern[match.end():]
+        match = _GLOBAL_FLAGS.match(pattern)
+    return f"(?{flags}:{pattern})" if flags else pattern
+
+def _combine(patterns):
+    """One compiled alternation of regex patterns, or None if there are none."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE | re.DOTALL)
+
+def _glob_tokens(pattern):
+    """A glob split into regex tokens: one per character, "?", "*" or [set]."""
+    tokens = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "*":
+            if not tokens or tokens[-1] != ".*":
+                tokens.append(".*")
+        elif char == "?":
+            tokens.append(".")
+        elif char == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end].replace("\\", "\\\\")
+            tokens.append(f"[^{body[1:]}]" if body.startswith("!") else f"[{body}]")
+            i = end
+        else:
+            tokens.append(re.escape(char.casefold()))
+        i += 1
+    return tokens
+
+def _emit(node):
+    branches = [token + _emit(child) for token, child in node.items() if token != _END]
+    if _END in node:
+        branches.append(r"\Z")
+    return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+def compile_globs(patterns):
+    """One regex matching any of the globs, built from a trie of their tokens so shared prefixes are matched once."""
+    if not patterns:
+        return None
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for token in _glob_tokens(pattern):
+            node = node.setdefault(token, {})
+        node[_END] = True
+    return re.compile(_emit(trie), re.IGNORECASE | re.DOTALL)
+
+def _literal_prefix(pattern):
+    """Text every match of a regex rule starts with (rules match from the start of the name)."""
+    if "|" in pattern:
+        return ""  # Alternatives may start differently
+    pattern = pattern[1:] if pattern.startswith("^") else pattern
+    prefix = []
+    for char in pattern:
+        if char in _REGEX_META:
+            # A quantifier makes the character before it optional
+            if char in "*?{" and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+    return "".join(prefix).casefold()
+
+class RuleMatcher:
+    """All rules of one class, compiled once.
+
+    Exact names go in a set. Globs become one regex per field, built from a
+    trie of their tokens so rules sharing a prefix are matched together.
+    Regex rules are filed in a character trie under the literal text they
+    start with, so a name only runs the regexes whose prefix it shares.
+    Matching an item costs a set lookup, a short trie walk and a handful of
+    regex matches however many rules there are.
+    """
+
+    def __init__(self, rules):
+        self.exact = set()
+        self.regex_trie = {}
+        name_globs, path_globs, publisher_globs, loose_regexes = [], [], [], []
+        regexes_by_prefix = {}
+        for rule in rules:
+            kind, pattern = rule["kind"], rule["pattern"]
+            if kind == "exact":
+                self.exact.add(pattern.casefold())
+            elif kind == "glob":
+                name_globs.append(pattern)
+            elif kind == "regex":
+                pattern = _scope_flags(pattern)
+                prefix = _literal_prefix(pattern)
+                if prefix:
+                    regexes_by_prefix.setdefault(prefix, []).append(pattern)
+                else:
+                    loose_regexes.append(pattern)
+            elif kind == "path":
+                path_globs.append(os.path.expandvars(pattern))
+            elif kind == "publisher":
+                publisher_globs.append(pattern)
+        for prefix, patterns in regexes_by_prefix.items():
+            node = self.regex_trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node[_END] = _combine(patterns)
+        self.name_regex = compile_globs(name_globs)
+        self.loose_regex = _combine(loose_regexes)
+        self.path_regex = compile_globs(path_globs)
+        self.publisher_regex = compile_globs(publisher_globs)
+
+    def _match_regexes(self, name, folded):
+        node = self.regex_trie
+        for char in folded:
+            node = node.get(char)
+            if node is None:
+                return False
+            regex = node.get(_END)
+            if regex is not None and regex.match(name):
+                return True
+        return False
+
+    def matches(self, name, command="", publisher=None):
+        folded = name.casefold()
+        if folded in self.exact:
+            return True
+        if self.name_regex is not None and self.name_regex.match(folded):
+            return True
+        if self.regex_trie and self._match_regexes(name, folded):
+            return True
+        if self.loose_regex is not None and self.loose_regex.match(name):
+            return True
+        if self.path_regex is not None and command and self.path_regex.match(command_executable(command).casefold()):
+            return True
+        return bool(self.publisher_regex is not None and publisher and self.publisher_regex.match(publisher.casefold()))
+
+class RuleSet:
+    """Rules compiled per class, checked in priority order: protected wins over recommended-to-disable."""
+
+    def __init__(self, rules):
+        self.rules = [rule for rule in rules if _valid(rule)]
+        # Publishers cost a file inspection, so callers only look them up when a rule needs one
+        self.uses_publishers = any(rule["kind"] == "publisher" for rule in self.rules)
+        self.matchers = []
+        # (name, command, publisher) -> Classification; refreshes mostly see the same items again
+        self._memo = {}
+        for class_name, classification in CLASSES.items():
+            class_rules = [rule for rule in self.rules if rule["class"] == class_name]
+            if class_rules:
+                self.matchers.append((classification, RuleMatcher(class_rules)))
+
+    def __len__(self):
+        return len(self.rules)
+
+    def classify(self, name, command="", publisher=None):
+        key = (name, command, publisher)
+        classification = self._memo.get(key)
+        if classification is not None:
+            return classification
+        classification = Classification.UNKNOWN
+        for matcher_class, matcher in self.matchers:
+            if matcher.matches(name, command, publisher):
+                classification = matcher_class
+                break
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = classification
+        return classification
+
+    def classify_item(self, item, publisher=None):
+        """Set and return item.classification."""
+        item.classification = self.classify(item.name, item.command, publisher)
+        return item.classification
+
+    def explain(self, name, command="", publisher=None):
+        """The first rule matching an item, or None. Checks rules one by one, so keep it off hot paths."""
+        for class_name in CLASSES:
+            for rule in self.rules:
+                if rule["class"] == class_name and RuleMatcher([rule]).matches(name, command, publisher):
+                    return rule
+        return None
+
+def _valid(rule):
+    if rule.get("kind") not in RULE_KINDS or rule.get("class") not in CLASSES or not rule.get("pattern"):
+        print(f"Ignoring invalid rule: {rule}")
+        return False
+    if rule["kind"] == "regex":
+        try:
+            # Checked the way _combine uses it, wrapped in a group next to the other rules
+            re.compile(f"(?:{_scope_flags(rule['pattern'])})")
+        except re.error as e:
+            print(f"Ignoring rule with bad regex {rule['pattern']!r}: {e}")
+            return False
+    return True
+
+def load_rules(rules_file=RULES_FILE):
+    """Rules from a JSON file ({"rules": [...]}), or DEFAULT_RULES if it doesn't exist."""
+    if not os.path.exists(rules_file):
+        return list(DEFAULT_RULES)
+    try:
+        with open(rules_file, "r") as f:
+            return json.load(f)["rules"]
+    except Exception as e:
+        print(f"Error loading rules: {e}")
+        return list(DEFAULT_RULES)
+
+_lock = threading.Lock()
+_rule_set = None
+_rule_set_signature = None
+
+def get_rule_set(rules_file=RULES_FILE):
+    """The compiled rules, recompiled only when the rules file changes."""
+    global _rule_set, _rule_set_signature
+    try:
+        info = os.stat(rules_file)
+        signature = (rules_file, info.st_mtime_ns, info.st_size)
+    except OSError:
+        signature = (rules_file, None, None)
+    with _lock:
+        if _rule_set is None or signature != _rule_set_signature:
+            _rule_set = RuleSet(load_rules(rules_file))
+            _rule_set_signature = signature
+        return _rule_set
@@ -0,0 +1,199 @@
+import bisect
+import re
+from collections import OrderedDict
+from itertools import chain
+
+# Prefix results kept between searches; typing a word looks up each of its prefixes in turn
+MAX_CACHED_PREFIXES = 512
+# Checking an item's tokens costs about a third of merging in one token's set
+CHECK_COST = 3
+# Whole words, plus their camel-case and letter/digit parts so "drive" finds OneDrive and "0042" finds Item0042
+_WORD = re.compile(r"[^\W_]+")
+_PART = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+def tokenize(text):
+    """Lower-cased words and word parts of text."""
+    return set(_WORD.findall(text.lower())) | set(" ".join(_PART.findall(text)).lower().split())
+
+class SearchIndex:
+    """In-memory search over startup items' names, commands and publishers.
+
+    Every token of an item maps to the set of items having it, and a sorted
+    vocabulary of the tokens turns a query word into the range of tokens it
+    starts. Results for a prefix are cached and kept up to date as items
+    change, and a longer word is looked for among the matches of a shorter
+    prefix when those are fewer, so each keystroke only checks what the
+    previous one matched. Items also sit in one set per status and per
+    source, which give the facet counts and filters without scanning.
+
+    update() compares a refresh with what is indexed and only touches items
+    that were added, removed or changed.
+    """
+
+    def __init__(self):
+        self.ids = {}  # item.key -> item id
+        self.items = {}  # item id -> (StartupItem, publisher, " "-joined tokens)
+        self.tokens = {}  # token -> set of item ids
+        self.statuses = {}  # Status -> set of item ids
+        self.sources = {}  # Source -> set of item ids
+        self.indexed = 0  # Items (re)indexed so far, to check refreshes stay incremental
+        self._vocabulary = []  # Sorted tokens; may still hold tokens no item has any more
+        self._new_tokens = []  # Tokens not yet in _vocabulary
+        self._prefixes = OrderedDict()  # Cached prefix -> set of item ids, least recently used first
+        self._range_sizes = {}  # Cached prefix -> number of _vocabulary tokens starting with it
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def _cached_prefixes(self, token):
+        prefixes = self._prefixes
+        if not prefixes:
+            return ()
+        return [token[:length] for length in range(1, len(token) + 1) if token[:length] in prefixes]
+
+    def _add(self, item, publisher):
+        item_id = self._next_id
+        self._next_id += 1
+        tokens = tokenize(f"{item.name} {item.command or ''} {publisher or ''}")
+        self.ids[item.key] = item_id
+        self.items[item_id] = (item, publisher, " " + " ".join(tokens))
+        for token in tokens:
+            ids = self.tokens.get(token)
+            if ids is None:
+                ids = self.tokens[token] = set()
+                self._new_tokens.append(token)
+            ids.add(item_id)
+            for prefix in self._cached_prefixes(token):
+                self._prefixes[prefix].add(item_id)
+        self.statuses.setdefault(item.status, set()).add(item_id)
+        self.sources.setdefault(item.source, set()).add(item_id)
+        self.indexed += 1
+
+    def _remove(self, doc_key):
+        item_id = self.ids.pop(doc_key)
+        item, _, text = self.items.pop(item_id)
+        for token in text.split():
+            ids = self.tokens[token]
+            ids.discard(item_id)
+            if not ids:
+                del self.tokens[token]
+            for prefix in self._cached_prefixes(token):
+                self._prefixes[prefix].discard(item_id)
+        self.statuses[item.status].discard(item_id)
+        self.sources[item.source].discard(item_id)
+
+    def update(self, items, publishers=None):
+        """Make the index hold exactly items. Returns (added, removed, changed) counts.
+
+        publishers maps item.key to a publisher; items it doesn't cover keep
+        the publisher they were indexed with.
+        """
+        added = changed = 0
+        seen = set()
+        for item in items:
+            doc_key = item.key
+            if doc_key in seen:
+                continue
+            seen.add(doc_key)
+            item_id = self.ids.get(doc_key)
+            old = self.items[item_id] if item_id is not None else None
+            if old is not None and old[0] is item and not publishers:
+                # Unchanged sources hand back the same objects (see snapshot_cache)
+                continue
+            publisher = publishers[item.key] if publishers and item.key in publishers else (old[1] if old else None)
+            if old is not None:
+                if old[0].command == item.command and old[1] == publisher:
+                    continue
+                self._remove(doc_key)
+                changed += 1
+            else:
+                added += 1
+            self._add(item, publisher)
+        removed = [doc_key for doc_key in self.ids if doc_key not in seen]
+        for doc_key in removed:
+            self._remove(doc_key)
+        if self._new_tokens:
+            self._range_sizes = {}
+            # A few new tokens are inserted; after a large refresh sorting again is cheaper
+            if len(self._new_tokens) > len(self._vocabulary) // 100:
+                self._vocabulary = sorted(self.tokens)
+                # The first keystroke of a search would otherwise merge most of the vocabulary
+                for initial in {token[0] for token in self._vocabulary}:
+                    self._matching_ids(initial)
+            else:
+                for token in self._new_tokens:
+                    bisect.insort(self._vocabulary, token)
+            self._new_tokens = []
+        return added, len(removed), changed
+
+    def _token_range(self, word):
+        """Tokens starting with word, from the sorted vocabulary."""
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, word)
+        end = bisect.bisect_left(vocabulary, word + "\uffff", start)
+        return vocabulary[start:end]
+
+    def _matching_ids(self, word):
+        """Ids of the items with a token starting with word."""
+        ids = self._prefixes.get(word)
+        if ids is not None:
+            self._prefixes.move_to_end(word)
+            return ids
+        tokens = self._token_range(word)
+        prefix = next((word[:length] for length in range(len(word) - 1, 0, -1) if word[:length] in self._prefixes), None)
+        shorter = self._prefixes[prefix] if prefix is not None else None
+        if shorter is not None and self._range_sizes.get(prefix) == len(tokens):
+            # word starts the same tokens as its prefix, so it matches the same items
+            ids = set(shorter)
+        elif shorter is not None and len(shorter) <= CHECK_COST * len(tokens):
+            # Every match of word is among the matches of its prefix
+            needle = " " + word
+            ids = {item_id for item_id in shorter if needle in self.items[item_id][2]}
+        else:
+            postings = self.tokens
+            ids = set(chain.from_iterable(postings[token] for token in tokens if token in postings))
+        self._prefixes[word] = ids
+        self._range_sizes[word] = len(tokens)
+        if len(self._prefixes) > MAX_CACHED_PREFIXES:
+            self._range_sizes.pop(self._prefixes.popitem(last=False)[0], None)
+        return ids
+
+    def search_ids(self, query="", status=None, source=None):
+        """Ids of the items matching every word of query and the status and source filters (None meaning any).
+
+        The set may be one the index keeps, so callers must not change it.
+        """
+        # Whole words only: the parts of an item's words are indexed, so "item0" already finds "Item0042"
+        sets = [self._matching_ids(word) for word in set(_WORD.findall(query.lower()))]
+        if status is not None:
+            sets.append(self.statuses.get(status, set()))
+        if source is not None:
+            sets.append(self.sources.get(source, set()))
+        if not sets:
+            return set(self.items)
+        if len(sets) == 1:
+            return sets[0]
+        # Intersect smallest first so the work stays proportional to the rarest term
+        sets.sort(key=len)
+        result = set(sets[0])
+        for ids in sets[1:]:
+            if not result:
+                break
+            result &= ids
+        return result
+
+    def search(self, query="", status=None, source=None):
+        """StartupItems with a word starting with each word of query, in their name, command or publisher."""
+        return [self.items[item_id][0] for item_id in self.search_ids(query, status, source)]
+
+    def facet_counts(self, items=None):
+        """{"status": {Status: count}, "source": {Source: count}} over every indexed item, or over items."""
+        if items is None:
+            return {"status": {status: len(members) for status, members in self.statuses.items() if members},
+                    "source": {source: len(members) for source, members in self.sources.items() if members}}
+        counts = {"status": {}, "source": {}}
+        for item in items:
+            counts["status"][item.status] = counts["status"].get(item.status, 0) + 1
+            counts["source"][item.source] = counts["source"].get(item.source, 0) + 1
+        return counts
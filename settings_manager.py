@@ -1,30 +1,175 @@
+import atexit
 import json
 import os
+import threading
+
+from timing_utils import timed
 
 SETTINGS_FILE = "assets/config.json"
+DEFAULTS_FILE = "assets/default_config.json"
+# Changes within this many seconds of each other are written together
+SAVE_DELAY = 0.5
 DEFAULT_SETTINGS = {
     "dark_mode": True,
     "logs_enabled": True,
     "backup_location": "backup.json"
 }
 
-def load_settings():
-    """Load settings from file or return defaults."""
-    if not os.path.exists(SETTINGS_FILE):
-        save_settings(DEFAULT_SETTINGS)
+def load_schema(defaults_file=DEFAULTS_FILE):
+    """{name: default value} from DEFAULT_SETTINGS merged with default_config.json. Values must keep the default's type."""
+    schema = dict(DEFAULT_SETTINGS)
     try:
-        with open(SETTINGS_FILE, "r") as f:
-            return json.load(f)
+        with open(defaults_file, "r") as f:
+            defaults = json.load(f)
+        if isinstance(defaults, dict):
+            schema.update(defaults)
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        print(f"Error loading settings: {e}")
-        return DEFAULT_SETTINGS
+        print(f"Error loading default settings: {e}")
+    return schema
 
-def save_settings(settings):
-    """Save settings to the settings file."""
-    try:
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(settings, f)
-        return True
-    except Exception as e:
-        print(f"Error saving settings: {e}")
+def _valid(schema, name, value):
+    if name not in schema:
+        print(f"Ignoring unknown setting {name!r}")
+        return False
+    default = schema[name]
+    # bool is a subclass of int, so compare exact types; ints are fine where floats are expected
+    if type(value) is not type(default) and not (type(default) is float and type(value) is int):
+        print(f"Ignoring setting {name!r}: expected {type(default).__name__}, got {value!r}")
         return False
+    return True
+
+class SettingsStore:
+    """Settings kept in memory and written to disk in the background.
+
+    Reads come from memory and return copies, so callers can't change the
+    defaults by accident. Changes are validated against the schema and
+    coalesced into one write delay seconds after the last of them; the
+    write goes to a temporary file that is renamed over the settings file,
+    so a crash leaves either the old or the new file, never half of one.
+    The file is read again only when its modification time changes.
+    """
+
+    def __init__(self, settings_file=SETTINGS_FILE, defaults_file=DEFAULTS_FILE, delay=SAVE_DELAY):
+        self.settings_file = settings_file
+        self.delay = delay
+        self.schema = load_schema(defaults_file)
+        self.writes = 0  # Files actually written, for checking the debouncing
+        self._values = dict(self.schema)
+        self._mtime = None
+        self._timer = None
+        self._lock = threading.RLock()
+        self._reload()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.settings_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _reload(self):
+        """Read the file again if it changed on disk and no change of ours is waiting to be written."""
+        mtime = self._file_mtime()
+        if mtime == self._mtime or self._timer is not None:
+            return
+        self._mtime = mtime
+        values = dict(self.schema)
+        if mtime is not None:
+            try:
+                with open(self.settings_file, "r") as f:
+                    loaded = json.load(f)
+                for name, value in loaded.items():
+                    if _valid(self.schema, name, value):
+                        values[name] = value
+            except Exception as e:
+                print(f"Error loading settings: {e}")
+        self._values = values
+
+    def get(self, name, default=None):
+        with self._lock:
+            self._reload()
+            return self._values.get(name, default)
+
+    def all(self):
+        """A copy of every setting."""
+        with self._lock:
+            self._reload()
+            return dict(self._values)
+
+    def update(self, changes):
+        """Apply valid changes and schedule a write. Returns False if any change was rejected."""
+        with self._lock:
+            self._reload()
+            ok = True
+            changed = False
+            for name, value in changes.items():
+                if not _valid(self.schema, name, value):
+                    ok = False
+                elif self._values.get(name) != value:
+                    self._values[name] = value
+                    changed = True
+            if changed:
+                self._schedule()
+            return ok
+
+    def set(self, name, value):
+        return self.update({name: value})
+
+    def _schedule(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Write pending changes now. Returns False if the write failed."""
+        with self._lock:
+            if self._timer is None:
+                return True
+            self._timer.cancel()
+            self._timer = None
+            return self._write(dict(self._values))
+
+    @timed
+    def _write(self, values):
+        temp_file = f"{self.settings_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.settings_file) or ".", exist_ok=True)
+            with open(temp_file, "w") as f:
+                json.dump(values, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.settings_file)
+            # Our own write shouldn't look like an outside change
+            self._mtime = self._file_mtime()
+            self.writes += 1
+            return True
+        except Exception as e:
+            print(f"Error saving settings: {e}")
+            return False
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The shared SettingsStore, created on first use and flushed when the program exits."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SettingsStore()
+            atexit.register(_store.flush)
+        return _store
+
+def load_settings():
+    """Load settings from memory (reading the file only if it changed). Returns a copy."""
+    return get_store().all()
+
+def save_settings(settings):
+    """Save settings; the file is written shortly after, together with any other changes."""
+    return get_store().update(settings)
+
+def flush_settings():
+    """Write any pending settings now."""
+    return get_store().flush()
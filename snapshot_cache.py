@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+
+from registry_backend import HIVE_NAMES
+from startup_item import StartupItem, Source, Status
+
+def cache_path(file_name):
+    """file_name in the per-user cache folder, outside the install: %LOCALAPPDATA%\\StartupCleaner, else ~/.cache/startup-cleaner."""
+    local_app_data = os.getenv("LOCALAPPDATA")
+    if local_app_data:
+        return os.path.join(local_app_data, "StartupCleaner", file_name)
+    return os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "startup-cleaner", file_name)
+
+CACHE_FILE = cache_path("snapshot_cache.json")
+CACHE_VERSION = 2
+# Items kept on disk; a source that would push the cache past this is read every time instead
+MAX_ITEMS = 20000
+
+def registry_source_id(root, path):
+    return f"{HIVE_NAMES.get(root, root)}\\{path}".lower()
+
+def folder_source_id(folder):
+    return os.path.normcase(os.path.abspath(folder))
+
+def key_fingerprint(backend, root, path):
+    """[value count, last write time] of a registry key from QueryInfoKey, or None if it doesn't exist."""
+    try:
+        key = backend.open_key(root, path)
+    except OSError:
+        return None
+    try:
+        _, value_count, last_write = backend.query_info_key(key)
+        return [value_count, last_write]
+    finally:
+        backend.close_key(key)
+
+def folder_fingerprint(folder):
+    """[mtime, size] of a folder, or None if it doesn't exist. Adding, removing or renaming a file changes it."""
+    try:
+        info = os.stat(folder)
+    except (OSError, TypeError):
+        return None
+    return [info.st_mtime_ns, info.st_size]
+
+class SnapshotCache:
+    """The items last read from each startup source, with the fingerprint the source had before the read.
+
+    A source (a registry key or a Startup folder) is only read again when
+    its fingerprint changes. Our own writes call invalidate(), which drops
+    the sources they touched and bumps generation, so a read that was
+    already under way can't store what it saw before the write.
+    """
+
+    def __init__(self, cache_file=CACHE_FILE, max_items=MAX_ITEMS):
+        self.cache_file = cache_file
+        self.max_items = max_items
+        self.sources = {}  # source id -> {"fingerprint": [...], "items": [[name, command, source, status, file_info], ...]}
+        self._records = {}  # source id -> StartupItems built from sources, so they are only built once
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(cache_file, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.sources = data["sources"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading snapshot cache: {e}")
+
+    def _items(self, source_id):
+        records = self._records.get(source_id)
+        if records is None:
+            records = self._records[source_id] = [StartupItem(name, command, Source(source), Status(status), file_info=file_info)
+                                                  for name, command, source, status, file_info in self.sources[source_id]["items"]]
+        return list(records)
+
+    def get(self, source_id, fingerprint):
+        """The cached StartupItems of a source if its fingerprint still matches, else None."""
+        with self._lock:
+            entry = self.sources.get(source_id)
+            if entry is None or fingerprint is None or entry["fingerprint"] != fingerprint:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._items(source_id)
+
+    def put(self, source_id, fingerprint, items, generation):
+        """Remember what a source held when it had fingerprint. Ignored if invalidate() ran since generation."""
+        with self._lock:
+            if generation != self.generation or fingerprint is None:
+                return
+            self.sources.pop(source_id, None)
+            self._records.pop(source_id, None)
+            cached = sum(len(entry["items"]) for entry in self.sources.values())
+            if cached + len(items) <= self.max_items:
+                self.sources[source_id] = {"fingerprint": fingerprint,
+                                           "items": [[item.name, item.command, int(item.source), int(item.status),
+                                                      item.file_info] for item in items]}
+                self._records[source_id] = list(items)
+            self._dirty = True
+
+    def cached_items(self, source_ids):
+        """Every cached item of the given sources, in that order, without checking fingerprints."""
+        with self._lock:
+            items = []
+            for source_id in source_ids:
+                if source_id in self.sources:
+                    items.extend(self._items(source_id))
+            return items
+
+    def invalidate(self, *source_ids):
+        """Forget the given sources (all of them if none are given) and write the cache if that changed it."""
+        with self._lock:
+            self.generation += 1
+            dropped = [source_id for source_id in (source_ids or list(self.sources)) if source_id in self.sources]
+            for source_id in dropped:
+                del self.sources[source_id]
+                self._records.pop(source_id, None)
+            if dropped:
+                self._dirty = True
+        if dropped:
+            # Written now so another process, or this one after a crash, never trusts the old items
+            self.save()
+
+    def save(self):
+        """Write the cache if it changed, via a temporary file renamed over the old one."""
+        with self._lock:
+            if not self._dirty:
+                return True
+            text = json.dumps({"version": CACHE_VERSION, "sources": self.sources})
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            temp_file = f"{self.cache_file}.tmp"
+            with open(temp_file, "w") as f:
+                f.write(text)
+            os.replace(temp_file, self.cache_file)
+            return True
+        except Exception as e:
+            print(f"Error saving snapshot cache: {e}")
+            return False
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache(cache_file=None):
+    """The shared SnapshotCache for cache_file (default CACHE_FILE), loaded on first use."""
+    global _cache
+    cache_file = cache_file or CACHE_FILE
+    with _cache_lock:
+        if _cache is None or _cache.cache_file != cache_file:
+            _cache = SnapshotCache(cache_file)
+        return _cache
+
+def invalidate(*source_ids):
+    """Called after we write to a startup source, so the next snapshot reads it again."""
+    get_cache().invalidate(*source_ids)
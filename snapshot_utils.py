@@ -0,0 +1,179 @@
+from registry_backend import get_backend, HKEY_CURRENT_USER, HIVE_NAMES
+import registry_utils
+from registry_utils import get_full_startup_items, iter_registry_items, find_registry_item, enumerate_hives, REGISTRY_PATHS
+from startup_folder_utils import (iter_startup_folder, find_startup_file, get_startup_folders, iter_folder_items,
+                                  iter_autoruns_disabled, AUTORUNS_DISABLED_PATH)
+from timing_utils import timing
+from startup_item import Source
+from rules_utils import get_rule_set
+import snapshot_cache
+from snapshot_cache import registry_source_id, folder_source_id, key_fingerprint, folder_fingerprint
+
+REGISTRY_SOURCE = Source.REGISTRY
+FOLDER_SOURCE = Source.FOLDER
+
+# Number of full enumeration passes made so far (one per take_snapshot call)
+enumeration_count = 0
+
+class StartupSnapshot:
+    """Startup items read in a single enumeration pass, indexed by name and classified by the rules."""
+
+    def __init__(self, registry_items, folder_items, rules=None, hive_report=None):
+        # Each entry is a StartupItem, registry items first
+        self.items = list(registry_items)
+        # One entry per registry key read for this snapshot, see registry_utils.enumerate_hives
+        self.hive_report = hive_report or []
+        self.items.extend(folder_items)
+        self.index = {}
+        rules = get_rule_set() if rules is None else rules
+        for item in self.items:
+            # First occurrence wins, matching the order items are displayed in
+            self.index.setdefault(item.name, item)
+            rules.classify_item(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def lookup(self, name):
+        """Return the StartupItem for a name, or None."""
+        return self.index.get(name)
+
+    def source_of(self, name):
+        item = self.index.get(name)
+        return item.source if item else None
+
+    def status_of(self, name):
+        item = self.index.get(name)
+        return item.status if item else None
+
+    def is_enabled(self, name):
+        item = self.index.get(name)
+        return item is not None and item.enabled
+
+def take_snapshot(use_cache=True):
+    """Enumerate the registry and the startup folder once and index the result.
+
+    With use_cache, each registry key and folder is fingerprinted first and
+    only the ones that changed since the cached read are read again.
+    """
+    global enumeration_count
+    enumeration_count += 1
+    if not use_cache:
+        registry_items = get_full_startup_items()
+        with timing("startup_folder_utils.iter_startup_folder"):
+            folder_items = list(iter_startup_folder())
+        return StartupSnapshot(registry_items, folder_items, hive_report=registry_utils.last_hive_report)
+
+    cache = snapshot_cache.get_cache()
+    # Taken before anything is read, so a write during the reads can't be cached as seen
+    generation = cache.generation
+    backend = get_backend()
+
+    registry_items = {}
+    hive_report = {}
+    stale = []
+    for root, path, status in REGISTRY_PATHS:
+        source_id = registry_source_id(root, path)
+        fingerprint = key_fingerprint(backend, root, path)
+        registry_items[source_id] = cache.get(source_id, fingerprint)
+        if registry_items[source_id] is None:
+            stale.append((root, path, status, fingerprint))
+        else:
+            hive_report[source_id] = {"hive": HIVE_NAMES.get(root, str(root)), "path": path, "status": status.label,
+                                      "count": len(registry_items[source_id]), "seconds": 0.0, "timed_out": False,
+                                      "error": None, "cached": True}
+    if stale:
+        with timing("registry_utils.enumerate_hives"):
+            items, report = enumerate_hives(paths=[(root, path, status) for root, path, status, _ in stale])
+        start = 0
+        for (root, path, status, fingerprint), entry in zip(stale, report):
+            source_id = registry_source_id(root, path)
+            registry_items[source_id] = items[start:start + entry["count"]]
+            hive_report[source_id] = entry
+            start += entry["count"]
+            # A key that timed out or failed was only partly read
+            if not entry["timed_out"] and entry["error"] in (None, "missing"):
+                cache.put(source_id, fingerprint, registry_items[source_id], generation)
+
+    folder_items = []
+    with timing("startup_folder_utils.iter_startup_folder"):
+        sources = [(folder_source_id(folder), folder_fingerprint(folder), iter_folder_items, (folder, status, scope))
+                   for folder, status, scope in get_startup_folders()]
+        sources.append((registry_source_id(HKEY_CURRENT_USER, AUTORUNS_DISABLED_PATH),
+                        key_fingerprint(backend, HKEY_CURRENT_USER, AUTORUNS_DISABLED_PATH), iter_autoruns_disabled, ()))
+        for source_id, fingerprint, read, args in sources:
+            items = cache.get(source_id, fingerprint)
+            if items is None:
+                items = list(read(*args))
+                cache.put(source_id, fingerprint, items, generation)
+            folder_items.extend(items)
+    cache.save()
+    # In REGISTRY_PATHS order, like a full enumeration's report
+    registry_utils.last_hive_report = [hive_report[source_id] for source_id in registry_items]
+    return StartupSnapshot([item for items in registry_items.values() for item in items], folder_items,
+                           hive_report=registry_utils.last_hive_report)
+
+def load_cached_snapshot():
+    """The items of the last cached snapshot, without reading or checking any source, or None if there is none.
+
+    Lets a window show something straight away while take_snapshot checks what changed.
+    """
+    source_ids = [registry_source_id(root, path) for root, path, _ in REGISTRY_PATHS]
+    source_ids.extend(folder_source_id(folder) for folder, _, _ in get_startup_folders())
+    source_ids.append(registry_source_id(HKEY_CURRENT_USER, AUTORUNS_DISABLED_PATH))
+    items = snapshot_cache.get_cache().cached_items(source_ids)
+    if not items:
+        return None
+    registry_items = [item for item in items if item.source == REGISTRY_SOURCE]
+    return StartupSnapshot(registry_items, [item for item in items if item.source != REGISTRY_SOURCE])
+
+def _folder_matches(status, prefix, item):
+    if status is not None and item.enabled != (status.lower() == "enabled"):
+        return False
+    return prefix is None or item.name.lower().startswith(prefix.lower())
+
+def iter_startup_items(hive=None, status=None, prefix=None, source=None, limit=None):
+    """Yield StartupItems lazily, applying filters as early as possible.
+
+    hive is "HKCU" or "HKLM", status "enabled" or "disabled", prefix a
+    case-insensitive name prefix and source REGISTRY_SOURCE or FOLDER_SOURCE.
+    Sources and keys the filters rule out are never read, and reading stops
+    once limit items have been yielded. Items are classified as they go.
+    """
+    if limit is not None and limit <= 0:
+        return
+    rules = get_rule_set()
+    count = 0
+    if source in (None, REGISTRY_SOURCE):
+        for item in iter_registry_items(hive, status, prefix):
+            rules.classify_item(item)
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
+    # The startup folder isn't in a hive, so a hive filter rules it out
+    if source in (None, FOLDER_SOURCE) and hive is None:
+        for item in iter_startup_folder():
+            if _folder_matches(status, prefix, item):
+                rules.classify_item(item)
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+def find_startup_item(name, hive=None, status=None, source=None):
+    """Direct lookup of one item: a StartupItem or None, without enumerating."""
+    if source in (None, REGISTRY_SOURCE):
+        found = find_registry_item(name, hive, status)
+        if found is not None:
+            get_rule_set().classify_item(found)
+            return found
+    if source in (None, FOLDER_SOURCE) and hive is None:
+        found = find_startup_file(name)
+        if found is not None and _folder_matches(status, None, found):
+            get_rule_set().classify_item(found)
+            return found
+    return None
@@ -1,66 +1,233 @@
 import os
 import shutil
-import winreg
+import struct
+from registry_backend import get_backend, HKEY_CURRENT_USER
+from timing_utils import timed
+from startup_item import StartupItem, Status, Source
+import snapshot_cache
 
+# Registry path for the AutorunsDisabled (disabled items)
+AUTORUNS_DISABLED_PATH = r"Microsoft\\Windows\\CurrentVersion\\Run\\AutorunsDisabled"
+
+def get_startup_folder_path():
+    """Path of the current user's Startup folder, or None if APPDATA isn't set."""
+    app_data = os.getenv("APPDATA")
+    if not app_data:
+        return None
+    return os.path.join(app_data, "Microsoft\\Windows\\Start Menu\\Programs\\Startup")
+
+def get_common_startup_folder_path():
+    """Path of the all-users Startup folder, or None if PROGRAMDATA isn't set."""
+    program_data = os.getenv("PROGRAMDATA") or os.getenv("ALLUSERSPROFILE")
+    if not program_data:
+        return None
+    return os.path.join(program_data, "Microsoft\\Windows\\Start Menu\\Programs\\StartUp")
+
+def get_startup_folders():
+    """(folder, status, scope) for every Startup folder and the Disabled folder inside it."""
+    folders = []
+    for folder, scope in ((get_startup_folder_path(), "User"), (get_common_startup_folder_path(), "All Users")):
+        if folder:
+            folders.append((folder, Status.ENABLED_FOLDER, scope))
+            folders.append((os.path.join(folder, "Disabled"), Status.DISABLED_FOLDER, scope))
+    return folders
+
+# folder -> ((mtime_ns, size), entries) from the last scan of that folder
+_scan_cache = {}
+
+def read_lnk_target(path):
+    """Best-effort target path of a .lnk shortcut, parsed from the Shell Link header; None if unknown."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(65536)
+        if len(data) < 0x4C or struct.unpack_from("<I", data, 0)[0] != 0x4C:
+            return None
+        flags = struct.unpack_from("<I", data, 0x14)[0]
+        offset = 0x4C
+        if flags & 0x01:  # HasLinkTargetIDList
+            offset += 2 + struct.unpack_from("<H", data, offset)[0]
+        if flags & 0x02:  # HasLinkInfo
+            info_size, header_size, info_flags, _, base_offset, _, suffix_offset = struct.unpack_from("<7I", data, offset)
+            if info_flags & 0x01:  # VolumeIDAndLocalBasePath
+                if header_size >= 0x24:
+                    base_unicode, suffix_unicode = struct.unpack_from("<2I", data, offset + 0x1C)
+                    if base_unicode:
+                        return _read_wide(data, offset + base_unicode) + _read_wide(data, offset + suffix_unicode)
+                return _read_ansi(data, offset + base_offset) + _read_ansi(data, offset + suffix_offset)
+            offset += info_size
+        # No local path: fall back to the relative path in the string data
+        unicode = flags & 0x80
+        for flag in (0x04, 0x08):  # HasName, HasRelativePath
+            if not flags & flag:
+                continue
+            count = struct.unpack_from("<H", data, offset)[0]
+            size = count * 2 if unicode else count
+            text = data[offset + 2:offset + 2 + size].decode("utf-16-le" if unicode else "mbcs" if os.name == "nt" else "latin-1")
+            offset += 2 + size
+            if flag == 0x08:
+                return text
+    except (OSError, struct.error, UnicodeDecodeError, ValueError, IndexError):
+        # Truncated or malformed shortcut
+        pass
+    return None
+
+def _read_ansi(data, offset):
+    end = data.index(b"\0", offset)
+    return data[offset:end].decode("mbcs" if os.name == "nt" else "latin-1")
+
+def _read_wide(data, offset):
+    end = offset
+    while data[end:end + 2] != b"\0\0":
+        end += 2
+        if end >= len(data):
+            raise ValueError("unterminated string in shortcut")
+    return data[offset:end].decode("utf-16-le")
+
+def scan_folder(folder, status, scope):
+    """List the files in one folder as dicts with name, path, status, scope, size, mtime and target.
+
+    Uses os.scandir, whose entries already carry their stat data on Windows,
+    and skips the scan entirely while the folder's (mtime, size) is unchanged.
+    Adding, removing or renaming a file changes the folder mtime; editing a
+    file in place does not, so such edits show up on the next real change.
+    """
+    try:
+        folder_stat = os.stat(folder)
+    except (OSError, TypeError):
+        _scan_cache.pop(folder, None)
+        return []
+    signature = (folder_stat.st_mtime_ns, folder_stat.st_size)
+    cached = _scan_cache.get(folder)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    files = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            info = entry.stat()
+            files.append({
+                "name": entry.name,
+                "path": entry.path,
+                "status": status,
+                "scope": scope,
+                "size": info.st_size,
+                "mtime": info.st_mtime,
+                "target": read_lnk_target(entry.path) if entry.name.lower().endswith(".lnk") else None,
+            })
+    _scan_cache[folder] = (signature, files)
+    return files
+
+@timed
 def get_startup_folder():
     """Get a list of files in the startup folder, including active and inactive items."""
-    # Path for the active startup folder
-    startup_folder = os.path.join(os.getenv("APPDATA"), "Microsoft\\Windows\\Start Menu\\Programs\\Startup")
-    
-    # List of active items (files in the startup folder)
-    active_items = [f for f in os.listdir(startup_folder) if os.path.isfile(os.path.join(startup_folder, f))]
-    
-    # Registry path for the AutorunsDisabled (disabled items)
-    disabled_registry_path = r"Microsoft\\Windows\\CurrentVersion\\Run\\AutorunsDisabled"
-    
-    # List of disabled items fetched from the registry
-    disabled_items = []
+    return [item.name for item in iter_startup_folder()]
+
+def iter_startup_folder():
+    """Yield StartupItems for Startup folder files (enabled and disabled), then AutorunsDisabled values."""
+    for folder, status, scope in get_startup_folders():
+        yield from iter_folder_items(folder, status, scope)
+    yield from iter_autoruns_disabled()
+
+def iter_folder_items(folder, status, scope):
+    """Yield a StartupItem for each file in one folder from get_startup_folders, with its scan metadata as file_info."""
+    for file in scan_folder(folder, status, scope):
+        yield StartupItem(file["name"], file["path"], Source.FOLDER, status,
+                          file_info={"size": file["size"], "mtime": file["mtime"], "target": file["target"], "scope": scope})
+
+def iter_autoruns_disabled():
+    """Yield a disabled folder StartupItem for each value under the AutorunsDisabled key."""
+    backend = get_backend()
     try:
-        # Accessing the registry to get the list of disabled startup items
-        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, disabled_registry_path) as key:
-            i = 0
-            while True:
-                try:
-                    # Enumerate all disabled items in the registry
-                    disabled_items.append(winreg.EnumValue(key, i)[0])
-                    i += 1
-                except OSError:
-                    break
+        key = backend.open_key(HKEY_CURRENT_USER, AUTORUNS_DISABLED_PATH)
     except FileNotFoundError:
-        # If the registry key doesn't exist, we return an empty list
-        pass
+        return
+    with key:
+        i = 0
+        while True:
+            try:
+                name, value, _ = backend.enum_value(key, i)
+            except OSError:
+                break
+            yield StartupItem(name, value, Source.FOLDER, Status.DISABLED_FOLDER)
+            i += 1
 
-    # Debugging: Log the fetched items
-    print(f"Active items from Startup folder: {active_items}")
-    print(f"Disabled items from Registry: {disabled_items}")
-    
-    # Combine the active items (from the folder) and the disabled items (from the registry)
-    return active_items + disabled_items
+def locate_startup_file(file_name, status=None):
+    """(folder, status, scope) of the Startup or Disabled folder holding file_name, or None."""
+    for folder, folder_status, scope in get_startup_folders():
+        if status is not None and folder_status != status:
+            continue
+        if os.path.isfile(os.path.join(folder, file_name)):
+            return folder, folder_status, scope
+    return None
+
+def find_startup_file(file_name):
+    """Look one item up by name without listing the folder: a StartupItem or None."""
+    located = locate_startup_file(file_name)
+    if located is not None:
+        return StartupItem(file_name, os.path.join(located[0], file_name), Source.FOLDER, located[1])
+
+    backend = get_backend()
+    try:
+        with backend.open_key(HKEY_CURRENT_USER, AUTORUNS_DISABLED_PATH) as key:
+            value, _ = backend.query_value(key, file_name)
+    except FileNotFoundError:
+        return None
+    return StartupItem(file_name, value, Source.FOLDER, Status.DISABLED_FOLDER)
 
 def enable_startup_file(file_name, file_path):
     """Add a file to the startup folder."""
+    startup_folder = get_startup_folder_path()
+    if startup_folder is None:
+        print("Error enabling startup file: APPDATA is not set")
+        return False
     try:
-        startup_folder = os.path.join(os.getenv("APPDATA"), "Microsoft\\Windows\\Start Menu\\Programs\\Startup")
         shutil.copy(file_path, startup_folder)
+        snapshot_cache.invalidate(snapshot_cache.folder_source_id(startup_folder))
+        return True
+    except Exception as e:
+        print(f"Error enabling startup file: {e}")
+    return False
+
+@timed
+def restore_disabled_startup_file(file_name):
+    """Move a file disabled by disable_startup_file back into its startup folder."""
+    located = locate_startup_file(file_name, Status.DISABLED_FOLDER)
+    if located is None:
+        print(f"Error enabling startup file: '{file_name}' is not in a Disabled folder")
+        return False
+    disabled_folder = located[0]
+    try:
+        shutil.move(os.path.join(disabled_folder, file_name), os.path.join(os.path.dirname(disabled_folder), file_name))
+        snapshot_cache.invalidate(snapshot_cache.folder_source_id(disabled_folder),
+                                  snapshot_cache.folder_source_id(os.path.dirname(disabled_folder)))
         return True
     except Exception as e:
         print(f"Error enabling startup file: {e}")
     return False
 
 # Function to disable a startup file (remove it from execution but don't delete the file)
+@timed
 def disable_startup_file(file_name):
     # Here, we can simply modify the file's permissions or move it out of the startup folder temporarily
-    startup_folder = os.path.join(os.getenv("APPDATA"), "Microsoft\\Windows\\Start Menu\\Programs\\Startup")
+    located = locate_startup_file(file_name, Status.ENABLED_FOLDER)
+    startup_folder = located[0] if located else get_startup_folder_path()
+    if startup_folder is None:
+        print("Error disabling startup file: APPDATA is not set")
+        return False
     file_path = os.path.join(startup_folder, file_name)
     
     # Move the file to a disabled folder (not deleting it, just disabling it)
-    disabled_folder = os.path.join(os.getenv("APPDATA"), "Microsoft\\Windows\\Start Menu\\Programs\\Startup\\Disabled")
+    disabled_folder = os.path.join(startup_folder, "Disabled")
     
     if not os.path.exists(disabled_folder):
         os.makedirs(disabled_folder)
     
     try:
         shutil.move(file_path, os.path.join(disabled_folder, file_name))
+        snapshot_cache.invalidate(snapshot_cache.folder_source_id(startup_folder),
+                                  snapshot_cache.folder_source_id(disabled_folder))
         return True
     except Exception as e:
         print(f"Error disabling startup file: {e}")
@@ -0,0 +1,159 @@
+import os
+import sys
+from enum import IntEnum
+
+class Status(IntEnum):
+    """Where an item lives and whether it runs. Enabled statuses are positive, disabled ones negative."""
+
+    ENABLED_USER = 1
+    ENABLED_SYSTEM_64 = 2
+    ENABLED_SYSTEM_32 = 3
+    ENABLED_FOLDER = 4
+    DISABLED_STARTUP_FOLDER = -1
+    DISABLED_REGISTRY_USER = -2
+    DISABLED_REGISTRY_SYSTEM = -3
+    DISABLED_FOLDER = -4
+
+    @property
+    def enabled(self):
+        return self > 0
+
+    @property
+    def label(self):
+        return STATUS_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label):
+        """The Status for a label like "Enabled (User)", or None if it isn't one."""
+        return _STATUSES_BY_LABEL.get(label)
+
+    # Show the label wherever a status is printed or formatted
+    def __str__(self):
+        return self.label
+
+    def __format__(self, spec):
+        return format(self.label, spec)
+
+STATUS_LABELS = {
+    Status.ENABLED_USER: "Enabled (User)",
+    Status.ENABLED_SYSTEM_64: "Enabled (System - 64bit)",
+    Status.ENABLED_SYSTEM_32: "Enabled (System - 32bit)",
+    Status.ENABLED_FOLDER: "Enabled",
+    Status.DISABLED_STARTUP_FOLDER: "Disabled (Startup Folder)",
+    Status.DISABLED_REGISTRY_USER: "Disabled (Registry - User)",
+    Status.DISABLED_REGISTRY_SYSTEM: "Disabled (Registry - System)",
+    Status.DISABLED_FOLDER: "Disabled",
+}
+_STATUSES_BY_LABEL = {label: status for status, label in STATUS_LABELS.items()}
+
+class Source(IntEnum):
+    REGISTRY = 1
+    FOLDER = 2
+
+    @property
+    def label(self):
+        return SOURCE_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label):
+        return _SOURCES_BY_LABEL.get(label)
+
+    def __str__(self):
+        return self.label
+
+    def __format__(self, spec):
+        return format(self.label, spec)
+
+SOURCE_LABELS = {Source.REGISTRY: "Registry", Source.FOLDER: "Startup Folder"}
+_SOURCES_BY_LABEL = {label: source for source, label in SOURCE_LABELS.items()}
+
+class Classification(IntEnum):
+    """What the rules say about an item; see rules_utils."""
+
+    UNKNOWN = 0
+    PROTECTED = 1
+    RECOMMENDED_DISABLE = 2
+
+    @property
+    def label(self):
+        return CLASSIFICATION_LABELS[self]
+
+    def __str__(self):
+        return self.label
+
+    def __format__(self, spec):
+        return format(self.label, spec)
+
+CLASSIFICATION_LABELS = {Classification.UNKNOWN: "", Classification.PROTECTED: "Protected",
+                         Classification.RECOMMENDED_DISABLE: "Recommended to disable"}
+
+def command_executable(command):
+    """The program a command line runs: the quoted part, or everything up to ".exe", or the first word."""
+    command = command.strip()
+    if "%" in command:
+        command = os.path.expandvars(command)
+    if command.startswith('"'):
+        end = command.find('"', 1)
+        return command[1:end] if end > 0 else command[1:]
+    end = command.lower().find(".exe")
+    if end >= 0:
+        return command[:end + 4]
+    return command.split(" ", 1)[0]
+
+class StartupItem:
+    """One startup entry: name, command (or file path), Source and Status.
+
+    Slots keep large inventories small, and status checks are integer
+    comparisons (item.enabled is item.status > 0). classification is filled
+    in by the rules and isn't part of equality or to_dict, which gives the
+    plain strings written to backups and exports. Startup folder files carry
+    file_info, a dict with their size, mtime, .lnk target and folder scope
+    from the scan; it is None for everything else and isn't compared either.
+    """
+
+    __slots__ = ("name", "command", "source", "status", "classification", "file_info")
+
+    def __init__(self, name, command, source, status, classification=Classification.UNKNOWN, file_info=None):
+        # Names repeat on every refresh, so share one copy of each
+        self.name = sys.intern(name)
+        self.command = command
+        self.source = source
+        self.status = status
+        self.classification = classification
+        self.file_info = file_info
+
+    @property
+    def enabled(self):
+        return self.status is not None and self.status > 0
+
+    @property
+    def key(self):
+        """(name, source, status), the identity of an item across refreshes; a name can be in several Run keys at once."""
+        return self.name, self.source, self.status
+
+    def __eq__(self, other):
+        if not isinstance(other, StartupItem):
+            return NotImplemented
+        return (self.name, self.command, self.source, self.status) == (other.name, other.command, other.source, other.status)
+
+    def __hash__(self):
+        return hash((self.name, self.command, self.source, self.status))
+
+    def __repr__(self):
+        return f"StartupItem({self.name!r}, {self.command!r}, {self.source!r}, {self.status!r})"
+
+    def to_dict(self):
+        return {"name": self.name, "command": self.command,
+                "source": self.source.label if self.source is not None else "",
+                "status": self.status.label if self.status is not None else ""}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an item from to_dict output. Unknown labels give a None source or status."""
+        status = Status.from_label(data.get("status", ""))
+        source = Source.from_label(data.get("source", ""))
+        if source is not None and status is not None:
+            # "Enabled"/"Disabled" are folder labels; registry items always name their key
+            if source == Source.FOLDER and status not in (Status.ENABLED_FOLDER, Status.DISABLED_FOLDER):
+                status = Status.ENABLED_FOLDER if status.enabled else Status.DISABLED_FOLDER
+        return cls(data["name"], data.get("command", ""), source, status)
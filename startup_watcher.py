@@ -0,0 +1,156 @@
+import os
+import sys
+import threading
+
+from registry_backend import get_backend, WinregBackend
+from registry_utils import REGISTRY_PATHS
+from startup_folder_utils import get_startup_folders
+from snapshot_cache import key_fingerprint
+
+# Seconds between fingerprint checks when change notifications are unavailable
+POLL_INTERVAL = 5.0
+# Changes usually come in bursts (value written, then deleted); wait this long to coalesce them
+SETTLE_DELAY = 0.5
+
+# Win32 constants for RegNotifyChangeKeyValue / FindFirstChangeNotificationW
+KEY_NOTIFY = 0x0010
+REG_NOTIFY_CHANGE_NAME = 0x00000001
+REG_NOTIFY_CHANGE_LAST_SET = 0x00000004
+FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+FILE_NOTIFY_CHANGE_DIR_NAME = 0x00000002
+FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+INFINITE = 0xFFFFFFFF
+
+def watched_folders():
+    """Startup and Disabled folders to watch, skipping ones that don't exist."""
+    return [folder for folder, _, _ in get_startup_folders() if os.path.isdir(folder)]
+
+def take_fingerprint():
+    """Cheap summary of every watched source: value count and last write per key, mtime per folder."""
+    backend = get_backend()
+    fingerprint = []
+    for root, path, _ in REGISTRY_PATHS:
+        fingerprint.append(key_fingerprint(backend, root, path))
+    for folder in watched_folders():
+        try:
+            fingerprint.append(os.stat(folder).st_mtime_ns)
+        except OSError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+class StartupWatcher:
+    """Calls on_change from a background thread when a Run key or the Startup folder changes.
+
+    Uses registry and directory change notifications on Windows and falls back
+    to polling take_fingerprint() elsewhere (or when a non-winreg backend is active).
+    Notifications only wake the thread; on_change fires when the fingerprint differs.
+    """
+
+    def __init__(self, on_change, poll_interval=POLL_INTERVAL):
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._fingerprint = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._stop_handle = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._fingerprint = take_fingerprint()
+        native = sys.platform == "win32" and isinstance(get_backend(), WinregBackend)
+        self.mode = "notify" if native else "poll"
+        target = self._notify_loop if native else self._poll_loop
+        self._thread = threading.Thread(target=target, name="startup-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._stop_handle is not None:
+            import ctypes
+            ctypes.windll.kernel32.SetEvent(self._stop_handle)
+        self._thread = None
+
+    def resync(self, fingerprint):
+        """Accept fingerprint as seen: one taken before our own refresh read the sources.
+
+        Taking it before the read means a change made during or after the read
+        still differs from it, so it triggers another refresh instead of being
+        absorbed.
+        """
+        self._fingerprint = fingerprint
+
+    def _check(self):
+        fingerprint = take_fingerprint()
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"Error in change callback: {e}")
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self._check()
+
+    def _notify_loop(self):
+        import ctypes
+        import winreg
+        from ctypes import wintypes
+
+        kernel32 = ctypes.windll.kernel32
+        advapi32 = ctypes.windll.advapi32
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        invalid_handle = wintypes.HANDLE(-1).value
+        reg_filter = REG_NOTIFY_CHANGE_NAME | REG_NOTIFY_CHANGE_LAST_SET
+        dir_filter = FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_DIR_NAME | FILE_NOTIFY_CHANGE_LAST_WRITE
+
+        self._stop_handle = kernel32.CreateEventW(None, True, False, None)
+        registry_watches = []  # (key, event)
+        folder_handles = []
+        try:
+            for root, path, _ in REGISTRY_PATHS:
+                try:
+                    key = winreg.OpenKey(root, path, 0, winreg.KEY_READ | KEY_NOTIFY)
+                except OSError:
+                    continue
+                event = kernel32.CreateEventW(None, False, False, None)
+                advapi32.RegNotifyChangeKeyValue(wintypes.HANDLE(int(key)), False, reg_filter, event, True)
+                registry_watches.append((key, event))
+            for folder in watched_folders():
+                handle = kernel32.FindFirstChangeNotificationW(folder, False, dir_filter)
+                if handle and handle != invalid_handle:
+                    folder_handles.append(handle)
+
+            handles = [self._stop_handle] + [event for _, event in registry_watches] + folder_handles
+            handle_array = (wintypes.HANDLE * len(handles))(*handles)
+            while not self._stop.is_set():
+                result = kernel32.WaitForMultipleObjects(len(handles), handle_array, False, INFINITE)
+                if self._stop.is_set() or result == 0:
+                    break
+                index = result - 1
+                # Both notification kinds are one-shot, so re-arm the one that fired
+                if 0 <= index < len(registry_watches):
+                    key, event = registry_watches[index]
+                    advapi32.RegNotifyChangeKeyValue(wintypes.HANDLE(int(key)), False, reg_filter, event, True)
+                elif 0 <= index - len(registry_watches) < len(folder_handles):
+                    kernel32.FindNextChangeNotification(folder_handles[index - len(registry_watches)])
+                else:
+                    # WAIT_FAILED or an abandoned handle: fall back to polling
+                    self.mode = "poll"
+                    self._poll_loop()
+                    return
+                if self._stop.wait(SETTLE_DELAY):
+                    break
+                self._check()
+        finally:
+            for key, event in registry_watches:
+                winreg.CloseKey(key)
+                kernel32.CloseHandle(event)
+            for handle in folder_handles:
+                kernel32.FindCloseChangeNotification(handle)
+            kernel32.CloseHandle(self._stop_handle)
+            self._stop_handle = None
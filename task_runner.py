@@ -0,0 +1,158 @@
+import queue
+import threading
+
+class Cancelled(Exception):
+    """Raised inside a job that noticed it was cancelled."""
+
+class Job:
+    """One unit of background work, with cancellation and progress reporting."""
+
+    def __init__(self, func, args, label, on_done, on_error, with_job):
+        self.func = func
+        self.args = args
+        self.label = label
+        self.on_done = on_done
+        self.on_error = on_error
+        self.with_job = with_job
+        self._cancel = threading.Event()
+        self._runner = None
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        """Call between steps of a long job; raises Cancelled if the user cancelled it."""
+        if self._cancel.is_set():
+            raise Cancelled(self.label)
+
+    def report(self, done, total):
+        """Post progress back to the Tk thread."""
+        self._runner._results.put(("progress", self, (done, total)))
+
+    def run(self):
+        if self.with_job:
+            return self.func(self, *self.args)
+        return self.func(*self.args)
+
+class TaskRunner:
+    """Runs registry and file I/O on worker threads and hands results back via root.after.
+
+    on_busy(label) is called with the label of a running job, or None once
+    everything has finished. on_progress(label, done, total) follows
+    Job.report. Callbacks always run on the Tk thread.
+
+    post() hands a call to the Tk thread from any other thread. Calls are
+    picked up by the same polling, so with idle_poll_ms set the runner keeps
+    polling at that slower rate while no job is running.
+    """
+
+    def __init__(self, root, workers=2, poll_ms=50, on_busy=None, on_progress=None, idle_poll_ms=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.idle_poll_ms = idle_poll_ms
+        self.on_busy = on_busy
+        self.on_progress = on_progress
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._active = []
+        self._polling = False  # Polling at poll_ms because jobs are in flight
+        self._poll_id = None
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f"task-runner-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if idle_poll_ms is not None:
+            self._schedule(idle_poll_ms)
+
+    def submit(self, func, *args, label="Working", on_done=None, on_error=None, with_job=False):
+        """Queue func(*args), or func(job, *args) when with_job is set. Call from the Tk thread."""
+        job = Job(func, args, label, on_done, on_error, with_job)
+        job._runner = self
+        self._active.append(job)
+        self._jobs.put(job)
+        self._set_busy()
+        if not self._polling:
+            # Only poll quickly while something is in flight, so an idle window costs (next to) nothing
+            self._polling = True
+            if self._poll_id is not None:
+                self.root.after_cancel(self._poll_id)
+            self._schedule(self.poll_ms)
+        return job
+
+    def post(self, func, *args):
+        """Run func(*args) on the Tk thread at the next poll. Safe to call from any thread, unlike root.after."""
+        self._results.put(("call", None, (func, args)))
+
+    @property
+    def busy(self):
+        return bool(self._active)
+
+    def cancel_all(self):
+        for job in list(self._active):
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        for _ in self._threads:
+            self._jobs.put(None)
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if job.cancelled:
+                self._results.put(("error", job, Cancelled(job.label)))
+                continue
+            try:
+                self._results.put(("done", job, job.run()))
+            except Exception as e:
+                self._results.put(("error", job, e))
+
+    def _poll(self):
+        while True:
+            try:
+                kind, job, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if self.on_progress is not None:
+                    self.on_progress(job.label, *payload)
+                continue
+            if kind == "call":
+                func, args = payload
+                try:
+                    func(*args)
+                except Exception as e:
+                    print(f"Error in posted call '{getattr(func, '__name__', func)}': {e}")
+                continue
+            self._active.remove(job)
+            self._set_busy()
+            callback = job.on_done if kind == "done" else job.on_error
+            try:
+                if callback is not None:
+                    callback(payload)
+                elif kind == "error" and not isinstance(payload, Cancelled):
+                    print(f"Error in background task '{job.label}': {payload}")
+            except Exception as e:
+                print(f"Error in callback for '{job.label}': {e}")
+
+        if self._active:
+            self._schedule(self.poll_ms)
+        else:
+            self._polling = False
+            self._poll_id = None
+            if self.idle_poll_ms is not None:
+                self._schedule(self.idle_poll_ms)
+
+    def _schedule(self, delay_ms):
+        self._poll_id = self.root.after(delay_ms, self._poll)
+
+    def _set_busy(self):
+        if self.on_busy is not None:
+            self.on_busy(self._active[0].label if self._active else None)
@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fleet_utils
+
+class SavedFleetTest(unittest.TestCase):
+    """Queries over a saved fleet index answer like a fresh parse, and changed files are read again."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.temp_dir.name, "exports")
+        os.makedirs(self.folder)
+        self.cache_file = os.path.join(self.temp_dir.name, "fleet_cache.json")
+        for host in range(5):
+            self.write(f"PC-{host}", ["Common", f"Only{host}"])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, host, names):
+        with open(os.path.join(self.folder, f"{host}.jsonl"), "w") as f:
+            for name in names:
+                f.write(json.dumps({"name": name, "command": f"{name.lower()}.exe", "status": "Enabled (User)"}) + "\n")
+
+    def load(self):
+        return fleet_utils.load_fleet([self.folder], workers=1, cache_file=self.cache_file)
+
+    def test_saved_index_matches_a_fresh_parse(self):
+        fresh = self.load()
+        saved = self.load()
+        self.assertIsNot(fresh, saved)
+        self.assertEqual(saved.hosts_running("common.exe"), fresh.hosts_running("common.exe"))
+        self.assertEqual(saved.unique_entries("PC-3"), fresh.unique_entries("PC-3"))
+        self.assertEqual(saved.summary(), fresh.summary())
+
+    def test_new_and_changed_files_are_read(self):
+        self.load()
+        self.write("PC-9", ["Common"])
+        self.assertEqual(len(self.load().hosts_running("common.exe")), 6)
+        self.write("PC-0", ["Other"])
+        os.utime(os.path.join(self.folder, "PC-0.jsonl"), (1, 1))
+        fleet = self.load()
+        self.assertEqual(fleet.hosts_running("common.exe"), ["PC-1", "PC-2", "PC-3", "PC-4", "PC-9"])
+        self.assertEqual(fleet.hosts_running("other.exe"), ["PC-0"])
+
+if __name__ == "__main__":
+    unittest.main()
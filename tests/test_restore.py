@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from restore_utils import plan_restore
+from startup_item import StartupItem, Source, Status
+
+def run_item(name, command, status):
+    return StartupItem(name, command, Source.REGISTRY, status)
+
+class PlanRestoreTest(unittest.TestCase):
+    """Items with the same name in several Run keys are restored separately."""
+
+    def test_same_name_in_user_and_machine_run_keys(self):
+        live = [run_item("Upd", "b.exe", Status.ENABLED_SYSTEM_64)]
+        backup = [run_item("Upd", "a.exe", Status.ENABLED_USER), run_item("Upd", "b.exe", Status.ENABLED_SYSTEM_64)]
+        plan = plan_restore(backup, live)
+        self.assertEqual([(kind, item.status, item.command, current) for kind, item, current in plan.actions],
+                         [("add", Status.ENABLED_USER, "a.exe", None)])
+        self.assertEqual(plan.skipped, [])
+
+    def test_each_copy_keeps_its_own_key(self):
+        live = [run_item("Upd", "a.exe", Status.DISABLED_REGISTRY_USER), run_item("Upd", "b.exe", Status.ENABLED_SYSTEM_64)]
+        backup = [run_item("Upd", "a.exe", Status.ENABLED_USER), run_item("Upd", "b.exe", Status.ENABLED_SYSTEM_64)]
+        plan = plan_restore(backup, live)
+        self.assertEqual([(kind, item.status, current.status) for kind, item, current in plan.actions],
+                         [("enable", Status.ENABLED_USER, Status.DISABLED_REGISTRY_USER)])
+
+    def test_copy_missing_from_backup_is_removed(self):
+        live = [run_item("Upd", "a.exe", Status.ENABLED_USER), run_item("Upd", "b.exe", Status.ENABLED_SYSTEM_64)]
+        backup = [run_item("Upd", "b.exe", Status.ENABLED_SYSTEM_64)]
+        plan = plan_restore(backup, live)
+        self.assertEqual([(kind, item, current.status) for kind, item, current in plan.actions],
+                         [("remove", None, Status.ENABLED_USER)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules_utils import RuleSet
+from startup_item import Classification
+
+def regex_rule(pattern):
+    return {"kind": "regex", "pattern": pattern, "class": "protected"}
+
+class RegexRuleTest(unittest.TestCase):
+    """Regex rules are combined into one pattern, so each must still work next to the others."""
+
+    def test_leading_inline_flags(self):
+        rules = RuleSet([regex_rule("(?i)foo.*"), regex_rule("^Bar"), regex_rule("(?s)ba.z")])
+        self.assertEqual(len(rules), 3)
+        self.assertEqual(rules.classify("FOOTray"), Classification.PROTECTED)
+        self.assertEqual(rules.classify("Barrier"), Classification.PROTECTED)
+        self.assertEqual(rules.classify("Other"), Classification.UNKNOWN)
+
+    def test_flags_later_in_the_pattern_are_rejected(self):
+        rules = RuleSet([regex_rule("foo(?i)bar"), regex_rule("^Bar")])
+        self.assertEqual(len(rules), 1)
+        self.assertEqual(rules.classify("Barrier"), Classification.PROTECTED)
+
+if __name__ == "__main__":
+    unittest.main()
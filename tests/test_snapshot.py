@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import registry_backend
+from registry_backend import MemoryBackend
+from registry_utils import REGISTRY_PATHS
+import snapshot_cache
+import snapshot_utils
+import gui
+
+class CountingBackend(MemoryBackend):
+    """MemoryBackend counting the values enumerated from each key."""
+
+    def __init__(self):
+        super().__init__()
+        self.enumerated = {}  # (root, lower-cased path) -> enum_value calls
+        self._paths = {}  # id of a key's data -> (root, lower-cased path)
+
+    def open_key(self, root, path, access=registry_backend.KEY_READ):
+        key = super().open_key(root, path, access)
+        self._paths[id(key.data)] = (root, path.lower())
+        return key
+
+    def enum_value(self, key, index):
+        path = self._paths[id(key.data)]
+        self.enumerated[path] = self.enumerated.get(path, 0) + 1
+        return super().enum_value(key, index)
+
+class TakeSnapshotTest(unittest.TestCase):
+    """A refresh reads each changed key once, and lookups afterwards don't touch the registry."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.old_appdata = os.environ.get("APPDATA")
+        self.old_cache_file = snapshot_cache.CACHE_FILE
+        os.environ["APPDATA"] = self.temp_dir.name
+        snapshot_cache.CACHE_FILE = os.path.join(self.temp_dir.name, "snapshot_cache.json")
+        self.backend = CountingBackend()
+        self.backend.seed(REGISTRY_PATHS, 60)
+        registry_backend.set_backend(self.backend)
+        gui.watcher = None
+
+    def tearDown(self):
+        registry_backend.set_backend(None)
+        snapshot_cache.CACHE_FILE = self.old_cache_file
+        gui.current_snapshot = None
+        if self.old_appdata is None:
+            os.environ.pop("APPDATA", None)
+        else:
+            os.environ["APPDATA"] = self.old_appdata
+        self.temp_dir.cleanup()
+
+    def refresh(self):
+        """What the GUI does on a refresh: read a snapshot on the worker, then keep it for lookups."""
+        self.backend.enumerated.clear()
+        gui.current_snapshot = gui.read_snapshot()
+        return gui.current_snapshot
+
+    def test_each_key_is_enumerated_once(self):
+        snapshot = self.refresh()
+        self.assertEqual(len(snapshot), 60)
+        # Ten values per key, plus the call that finds no more
+        self.assertEqual(self.backend.enumerated, {(root, path.lower()): 11 for root, path, _ in REGISTRY_PATHS})
+
+    def test_unchanged_keys_are_not_read_again(self):
+        self.refresh()
+        self.assertEqual(len(self.refresh()), 60)
+        self.assertEqual(self.backend.enumerated, {})
+
+        root, path, _ = REGISTRY_PATHS[1]
+        with registry_backend.get_key_cache().key(root, path, registry_backend.KEY_ALL_ACCESS) as key:
+            self.backend.set_value(key, "Added", registry_backend.REG_SZ, "added.exe")
+        self.assertEqual(len(self.refresh()), 61)
+        self.assertEqual(self.backend.enumerated, {(root, path.lower()): 12})
+
+    def test_lookups_answer_from_the_snapshot(self):
+        snapshot = self.refresh()
+        calls = self.backend.calls
+        for item in snapshot.items:
+            self.assertEqual(gui.is_item_enabled(item.name), snapshot.lookup(item.name).enabled)
+        self.assertEqual(self.backend.calls, calls)
+
+    def test_missing_appdata_skips_the_startup_folder(self):
+        os.environ.pop("APPDATA", None)
+        self.assertEqual(len(self.refresh()), 60)
+        self.assertEqual(len(list(snapshot_utils.iter_startup_items())), 60)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import CountingTree
+from tree_view import VirtualTreeView
+
+HEIGHT = 20
+ROWS = 10000
+
+def make_rows():
+    return [((f"item{i:05d}", 1), (f"Item{i:05d}", f"C:\\Apps\\item{i}.exe", "Registry", "Enabled (User)"),
+             "enabled" if i % 2 else "disabled") for i in range(ROWS)]
+
+class VirtualTreeViewTest(unittest.TestCase):
+    """The Treeview only ever holds height items, and Tk is only called for pool items that change."""
+
+    def setUp(self):
+        self.tree = CountingTree()
+        self.view = VirtualTreeView(self.tree, height=HEIGHT)
+        self.rows = make_rows()
+        self.view.set_rows(self.rows)
+
+    def test_first_render_fills_only_the_pool(self):
+        self.assertEqual(len(self.tree.items), HEIGHT)
+        # One insert and one item() per pool slot
+        self.assertEqual(self.view.last_tk_calls, 2 * HEIGHT)
+
+    def test_unchanged_refresh_makes_no_tk_calls(self):
+        self.view.set_rows(list(self.rows))
+        self.assertEqual(self.view.last_tk_calls, 0)
+
+    def test_refresh_rewrites_only_changed_visible_rows(self):
+        key, values, tag = self.rows[3]
+        self.rows[3] = (key, values[:3] + ("Disabled (Registry - User)",), "disabled")
+        # Off-screen changes cost nothing
+        key, values, tag = self.rows[ROWS - 1]
+        self.rows[ROWS - 1] = (key, values[:3] + ("Disabled (Registry - User)",), "disabled")
+        self.view.set_rows(self.rows)
+        self.assertEqual(self.view.last_tk_calls, 1)
+        self.assertEqual(len(self.tree.items), HEIGHT)
+
+    def test_scrolling_touches_at_most_the_pool(self):
+        for offset in (ROWS // 2, ROWS // 2 + 1, ROWS - HEIGHT, 0):
+            self.view.scroll_to(offset)
+            self.assertLessEqual(self.view.last_tk_calls, HEIGHT)
+            self.assertEqual(len(self.tree.items), HEIGHT)
+        self.view.scroll_to(0)
+        self.assertEqual(self.view.last_tk_calls, 0)
+
+    def test_sorting_and_filtering_keep_the_pool_size(self):
+        self.view.sort_by("name", True)
+        self.assertLessEqual(self.view.last_tk_calls, HEIGHT)
+        self.assertEqual(self.tree.items["0"]["values"][0], f"Item{ROWS - 1:05d}")
+        self.view.set_filter("item0001")
+        self.assertEqual(len(self.view), 10)
+        self.assertEqual(len(self.tree.items), 10)
+        self.view.set_matches({("item00042", 1), ("missing", 1)})
+        self.assertEqual(len(self.view), 0)
+        self.view.set_filter("")
+        self.assertEqual(len(self.view), 1)
+        self.assertEqual(len(self.tree.items), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import functools
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets; slower calls land in a final overflow bucket
+BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
+
+# Off unless STARTUP_CLEANER_TIMINGS is set or enable_timing() is called, so timed calls cost one flag check
+enabled = bool(os.getenv("STARTUP_CLEANER_TIMINGS"))
+
+_lock = threading.Lock()
+_histograms = {}
+
+class Histogram:
+    """Call count, total/min/max and bucketed latencies of one timed operation."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls (the max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= wanted:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0,
+                "min": self.min or 0.0, "max": self.max, "p50": self.percentile(0.5), "p95": self.percentile(0.95),
+                "buckets": {f"<={bound}": count for bound, count in zip(BUCKETS, self.buckets)}
+                           | {f">{BUCKETS[-1]}": self.buckets[-1]}}
+
+def enable_timing(on=True):
+    global enabled
+    enabled = on
+
+def record(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.record(seconds)
+
+class timing:
+    """Context manager timing its block under name when timing is enabled."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter() if enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+
+def timed(func):
+    """Decorator recording each call of func as module.function when timing is enabled."""
+    name = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(name, time.perf_counter() - start)
+    return wrapper
+
+def get_stats():
+    """{name: histogram dict} for everything timed so far."""
+    with _lock:
+        return {name: histogram.to_dict() for name, histogram in sorted(_histograms.items())}
+
+def reset_stats():
+    with _lock:
+        _histograms.clear()
+
+def format_stats(stats=None):
+    """Text table of the timings, slowest total first."""
+    stats = get_stats() if stats is None else stats
+    if not stats:
+        return "No timings recorded." if enabled else "Timing is off."
+    lines = [f"{'operation':<48}{'calls':>7}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}{'total s':>10}"]
+    for name, data in sorted(stats.items(), key=lambda entry: -entry[1]["total"]):
+        lines.append(f"{name:<48}{data['count']:>7}{data['mean'] * 1000:>10.2f}{data['p95'] * 1000:>10.2f}"
+                     f"{data['max'] * 1000:>10.2f}{data['total']:>10.3f}")
+    return "\n".join(lines)
+
+def profile_call(func, *args, sort="cumulative", limit=30):
+    """Run func(*args) under cProfile. Returns (result, report text of the top limit functions)."""
+    # Only needed when profiling, so not loaded with the app
+    import cProfile
+    import io
+    import pstats
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+    return result, stream.getvalue()
@@ -0,0 +1,219 @@
+COLUMNS = ("name", "command", "source", "status")
+HEADINGS = {"name": "Name", "command": "Command", "source": "Source", "status": "Status", "classification": "Class",
+            "impact": "Impact"}
+
+class VirtualTreeView:
+    """Shows a large list of rows in a ttk.Treeview that only ever holds the visible ones.
+
+    Each row is a (key, values, tag) tuple: key identifies the item across
+    refreshes, values has one entry per column and tag (or None) picks a
+    Treeview tag for colouring. The Treeview keeps a fixed pool of height
+    items that are rewritten as the view scrolls, so scrolling, sorting and
+    filtering cost the same with fifty rows or fifty thousand. Selection is
+    kept by key, so it survives scrolling and refreshes.
+    """
+
+    def __init__(self, tree, scrollbar=None, columns=COLUMNS, headings=HEADINGS, height=15):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.columns = list(columns)
+        self.height = height
+        self.rows = []
+        self.order = []  # Indexes into rows after filtering and sorting
+        self.offset = 0  # Position in order of the first visible row
+        self.selected = set()
+        self.sort_column = None
+        self.sort_descending = False
+        self.filter_text = ""
+        self._haystacks = None  # Lower-cased row text, built on the first filter
+        self.matches = None  # Keys to show, from a search index; None shows every row
+        self._positions = None  # Key -> indexes into rows, built on the first set_matches
+        self._slots = []  # (values, tag, key) shown in each pool item
+        self._shown_selection = ()
+        self._extend = False
+        # Tk calls made by the last render and since the view was created
+        self.last_tk_calls = 0
+        self.total_tk_calls = 0
+
+        tree.configure(columns=self.columns, show="headings", height=height, selectmode="extended")
+        for column in self.columns:
+            tree.heading(column, text=headings.get(column, column), command=lambda c=column: self.sort_by(c))
+        self.headings = {column: headings.get(column, column) for column in self.columns}
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        tree.bind("<Button-1>", lambda event: self._set_extend(False), add="+")
+        for sequence in ("<Control-Button-1>", "<Shift-Button-1>"):
+            tree.bind(sequence, lambda event: self._set_extend(True), add="+")
+        tree.bind("<MouseWheel>", lambda event: self._wheel(-1 if event.delta > 0 else 1))
+        tree.bind("<Button-4>", lambda event: self._wheel(-1))
+        tree.bind("<Button-5>", lambda event: self._wheel(1))
+        tree.bind("<Up>", lambda event: self._step(-1))
+        tree.bind("<Down>", lambda event: self._step(1))
+        tree.bind("<Prior>", lambda event: self._page(-1))
+        tree.bind("<Next>", lambda event: self._page(1))
+
+    def _tk(self, method, *args, **kwargs):
+        self.last_tk_calls += 1
+        return getattr(self.tree, method)(*args, **kwargs)
+
+    def __len__(self):
+        return len(self.order)
+
+    def set_rows(self, rows):
+        """Replace the rows, keeping sort, filter, scroll position and the selection of surviving keys."""
+        self.rows = list(rows)
+        self._haystacks = None
+        self._positions = None
+        keys = {row[0] for row in self.rows}
+        self.selected &= keys
+        self._refresh_order()
+
+    def sort_by(self, column, descending=None):
+        """Sort on a column; calling it again for the same column flips the direction."""
+        if descending is None:
+            descending = not self.sort_descending if column == self.sort_column else False
+        if self.sort_column is not None:
+            self.tree.heading(self.sort_column, text=self.headings[self.sort_column])
+        self.sort_column, self.sort_descending = column, descending
+        self.tree.heading(column, text=f"{self.headings[column]} {'▼' if descending else '▲'}")
+        self._refresh_order()
+
+    def set_filter(self, text):
+        """Show only rows with text (case-insensitive) in any column."""
+        self.filter_text = text.strip().lower()
+        self.offset = 0
+        self._refresh_order()
+
+    def set_matches(self, keys):
+        """Show only rows whose key is in keys (None shows them all), e.g. the results of a SearchIndex.
+
+        Costs time in the number of matches, not rows, so narrowing a large
+        list stays fast. Combines with set_filter.
+        """
+        self.matches = None if keys is None else set(keys)
+        self.offset = 0
+        self._refresh_order()
+
+    def _refresh_order(self):
+        order = range(len(self.rows))
+        if self.matches is not None:
+            if self._positions is None:
+                self._positions = {}
+                for index, row in enumerate(self.rows):
+                    self._positions.setdefault(row[0], []).append(index)
+            positions = self._positions
+            order = sorted(index for key in self.matches for index in positions.get(key, ()))
+        if self.filter_text:
+            if self._haystacks is None:
+                self._haystacks = ["\0".join(str(value) for value in row[1]).lower() for row in self.rows]
+            needle = self.filter_text
+            order = [index for index in order if needle in self._haystacks[index]]
+        if self.sort_column is not None:
+            column = self.columns.index(self.sort_column)
+            rows = self.rows
+            order = sorted(order, key=lambda index: str(rows[index][1][column]).lower(), reverse=self.sort_descending)
+        self.order = list(order)
+        self.render()
+
+    def render(self):
+        """Rewrite the pool items whose row changed. Returns the Tk call count."""
+        self.last_tk_calls = 0
+        self.offset = max(0, min(self.offset, len(self.order) - self.height))
+        visible = [self.rows[index] for index in self.order[self.offset:self.offset + self.height]]
+
+        # Grow or shrink the pool to the number of visible rows
+        while len(self._slots) < len(visible):
+            self._tk("insert", "", "end", iid=str(len(self._slots)))
+            self._slots.append(None)
+        while len(self._slots) > len(visible):
+            self._slots.pop()
+            self._tk("delete", str(len(self._slots)))
+
+        for slot, (key, values, tag) in enumerate(visible):
+            shown = (tuple(values), tag, key)
+            if self._slots[slot] != shown:
+                self._tk("item", str(slot), values=shown[0], tags=(tag,) if tag else ())
+                self._slots[slot] = shown
+
+        wanted = tuple(str(slot) for slot, (key, _, _) in enumerate(visible) if key in self.selected)
+        if wanted != self._shown_selection:
+            if wanted:
+                self._tk("selection_set", wanted)
+            else:
+                self._tk("selection_remove", self._shown_selection)
+            self._shown_selection = wanted
+
+        if self.scrollbar is not None:
+            total = len(self.order) or 1
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.height) / total))
+        self.total_tk_calls += self.last_tk_calls
+        return self.last_tk_calls
+
+    def scroll_to(self, offset):
+        self.offset = offset
+        self.render()
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units" or "pages")."""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.order)))
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def _wheel(self, direction):
+        self.scroll_to(self.offset + direction * 3)
+        return "break"
+
+    def _page(self, direction):
+        self.scroll_to(self.offset + direction * self.height)
+        return "break"
+
+    def _step(self, direction):
+        """Arrow keys: move the selection, scrolling once it reaches the top or bottom row."""
+        if not self.order:
+            return "break"
+        focus = self.tree.focus()
+        slot = int(focus) if focus else 0
+        position = max(0, min(self.offset + slot + direction, len(self.order) - 1))
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.height:
+            self.offset = position - self.height + 1
+        self.selected = {self.rows[self.order[position]][0]}
+        self.render()
+        self.tree.focus(str(position - self.offset))
+        return "break"
+
+    def _set_extend(self, extend):
+        self._extend = extend
+
+    def _on_select(self, event=None):
+        current = tuple(self.tree.selection())
+        if current == self._shown_selection:
+            return  # Our own render, or nothing changed
+        visible_keys = {shown[2] for shown in self._slots}
+        # A plain click replaces the selection; Ctrl/Shift clicks keep rows scrolled out of view
+        kept = {key for key in self.selected if key not in visible_keys} if self._extend else set()
+        self.selected = kept | {self._slots[int(iid)][2] for iid in current}
+        self._shown_selection = current
+        self._extend = False
+
+    def selected_keys(self):
+        """Keys of the selected rows, in display order."""
+        if not self.selected:
+            return []
+        return [self.rows[index][0] for index in self.order if self.rows[index][0] in self.selected]
+
+    def key_at_y(self, y):
+        """Key of the row under a mouse position, or None."""
+        iid = self.tree.identify_row(y)
+        if not iid:
+            return None
+        return self._slots[int(iid)][2]
+
+    def select(self, keys):
+        self.selected = set(keys)
+        self.render()